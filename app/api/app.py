@@ -1,12 +1,22 @@
 """Flask application factory."""
 
+import atexit
+import os
 from flask import Flask
 from app.api.errors import register_error_handlers
 from app.models.datastore import DataStore
+from app.models.sqlite_backend import SQLiteBackend
 from app.authorization.engine import AuthorizationEngine
 from app.authorization.decision_logger import DecisionLogger
-from app.authorization.banking_rules import create_all_banking_rules
+from app.authorization.log_store import SegmentedLogStore
+from app.authorization.log_aggregator import AggregatorClient, RemoteDecisionLogger
+from app.authorization.rule_store import RuleStore, RuleSync
+from app.authorization.policy_bundle import BundleLoader
+from app.authorization.banking_rules import create_all_rules
 from app.models.transaction_executor import TransactionExecutor
+from app.models.batch_authorizer import BatchAuthorizer
+from app.models.bulk_importer import BulkImporter
+from app.models.access_finder import AccessFinder
 
 
 def create_app():
@@ -19,18 +29,136 @@ def create_app():
     # Initialize components
     datastore = DataStore()
     auth_engine = AuthorizationEngine()
-    decision_logger = DecisionLogger()
+    
+    # Workers of a multi-process deployment ship decisions to one aggregator
+    aggregator = os.environ.get('DECISION_LOG_AGGREGATOR')
+    if aggregator:
+        decision_logger = RemoteDecisionLogger(AggregatorClient(
+            aggregator,
+            os.environ.get('DECISION_LOG_AGGREGATOR_KEY', '').encode('utf-8')
+        ))
+    else:
+        decision_logger = DecisionLogger()
+    
     transaction_executor = TransactionExecutor(datastore, auth_engine, decision_logger)
+    batch_authorizer = BatchAuthorizer(datastore, auth_engine, decision_logger)
+    bulk_importer = BulkImporter(datastore)
+    access_finder = AccessFinder(datastore, auth_engine)
+    
+    # Keep users and accounts in SQLite so workers share them and restarts keep them
+    if os.environ.get('DATASTORE_BACKEND', 'memory') == 'sqlite':
+        backend = SQLiteBackend(os.environ.get('DATASTORE_PATH', 'abac.db'))
+        datastore.configure_backend(backend)
+        atexit.register(backend.close)
+    
+    shared_state_checks = []
+    
+    # Load rules from a policy bundle file if one is given, else the built-in banking rules
+    bundle_path = os.environ.get('POLICY_BUNDLE_PATH')
+    bundle_loader = BundleLoader(bundle_path) if bundle_path else None
+    if bundle_loader is not None:
+        initial_policy = bundle_loader.load()
+        initial_rules = initial_policy.rules
+    else:
+        initial_rules = create_all_rules()
+    
+    rule_store_path = os.environ.get('RULE_STORE_PATH')
+    if rule_store_path:
+        # Share one versioned rule set between processes; the first one seeds it
+        rule_store = RuleStore(rule_store_path)
+        rule_store.publish(initial_rules, only_if_empty=True)
+        rule_sync = RuleSync(rule_store, auth_engine, interval=float(os.environ.get('RULE_STORE_POLL', 1.0)))
+        rule_sync.check()
+        app.rule_sync = rule_sync
+        shared_state_checks.append(rule_sync.check)
+        
+        # A reloaded bundle is published for every worker, not just swapped in here
+        def apply_bundle(snapshot):
+            rule_store.publish(snapshot.rules)
+            rule_sync.check(force=True)
+    elif bundle_loader is not None:
+        auth_engine.swap_policy(initial_policy)
+        apply_bundle = auth_engine.swap_policy
+    else:
+        auth_engine.set_rules(initial_rules)
+    
+    # Reload the bundle on POST /api/policy/reload and, optionally, when the file changes
+    if bundle_loader is not None:
+        bundle_loader.apply = apply_bundle
+        if os.environ.get('POLICY_BUNDLE_WATCH', 'false').lower() == 'true':
+            bundle_loader.watch(float(os.environ.get('POLICY_BUNDLE_POLL', 1.0)))
+            atexit.register(bundle_loader.stop)
+    
+    # Cache decisions; keys carry the attribute values the rules read, so entries never go stale
+    cache_size = int(os.environ.get('DECISION_CACHE_SIZE', 10000))
+    if cache_size > 0:
+        auth_engine.enable_cache(
+            max_size=cache_size,
+            ttl=float(os.environ.get('DECISION_CACHE_TTL', 300))
+        )
+    
+    # Pick up changes made by other processes before each request (also run by the ASGI app)
+    app.shared_state_checks = shared_state_checks
+    
+    @app.before_request
+    def check_shared_state():
+        for check in shared_state_checks:
+            check()
+    
+    # Persist decisions to rotating segment files when a log directory is set
+    log_dir = os.environ.get('DECISION_LOG_DIR')
+    if log_dir and not aggregator:
+        max_segments = os.environ.get('DECISION_LOG_MAX_SEGMENTS')
+        store = SegmentedLogStore(
+            log_dir,
+            max_segment_bytes=int(os.environ.get('DECISION_LOG_SEGMENT_BYTES', 64 * 1024 * 1024)),
+            fsync_every=int(os.environ.get('DECISION_LOG_FSYNC_EVERY', 256)),
+            max_segments=int(max_segments) if max_segments else None
+        )
+        decision_logger.configure_storage(
+            store,
+            buffer_size=int(os.environ.get('DECISION_LOG_BUFFER', 10000))
+        )
+    elif not aggregator:
+        # Without a directory only the most recent decisions are kept, in memory
+        decision_logger.configure_storage(
+            None,
+            buffer_size=int(os.environ.get('DECISION_LOG_BUFFER', 10000))
+        )
+    
+    # Write decisions from a background thread instead of the request path
+    if os.environ.get('DECISION_LOG_ASYNC', 'false').lower() == 'true':
+        decision_logger.start_pipeline(
+            max_queue=int(os.environ.get('DECISION_LOG_QUEUE_SIZE', 10000)),
+            batch_size=int(os.environ.get('DECISION_LOG_BATCH_SIZE', 256)),
+            backpressure=os.environ.get('DECISION_LOG_BACKPRESSURE', 'block'),
+            sample_rate=float(os.environ.get('DECISION_LOG_SAMPLE_RATE', 0.1))
+        )
+    
+    # Count rule checks and time evaluation and logging for /api/metrics
+    if os.environ.get('METRICS_ENABLED', 'false').lower() == 'true':
+        decision_logger.metrics = auth_engine.enable_metrics()
+    
+    # Check the rules that usually decide first, within same-effect runs
+    if os.environ.get('ADAPTIVE_ORDERING', 'false').lower() == 'true':
+        auth_engine.enable_adaptive_ordering(
+            interval=int(os.environ.get('ADAPTIVE_ORDERING_INTERVAL', 10000)),
+            sample_every=int(os.environ.get('ADAPTIVE_ORDERING_SAMPLE_EVERY', 100))
+        )
     
-    # Load banking rules
-    for rule in create_all_banking_rules():
-        auth_engine.add_rule(rule)
+    # Drain queued decisions and close the store on shutdown
+    if decision_logger.store is not None or decision_logger.pipeline is not None:
+        atexit.register(decision_logger.close)
     
     # Store components in app context
     app.datastore = datastore
     app.auth_engine = auth_engine
     app.decision_logger = decision_logger
     app.transaction_executor = transaction_executor
+    app.batch_authorizer = batch_authorizer
+    app.bulk_importer = bulk_importer
+    app.access_finder = access_finder
+    app.bundle_loader = bundle_loader
     
     # Register error handlers
     register_error_handlers(app)
@@ -52,7 +180,10 @@ def create_app():
                 'users': '/api/users',
                 'accounts': '/api/accounts',
                 'transactions': '/api/transactions',
+                'authorize_batch': '/api/authorize/batch',
                 'decisions': '/api/decisions',
+                'metrics': '/api/metrics',
+                'policy': '/api/policy',
                 'schema': '/api/schema'
             }
         }
@@ -0,0 +1,250 @@
+"""
+ASGI application factory.
+
+``POST /api/transactions`` and ``GET /api/decisions`` are served by async
+handlers: the authorization engine runs on the event loop, while storage
+and logging that may wait on I/O run on a thread pool, so slow backends
+do not tie up the server. Every other route is served by the Flask
+application on the same thread pool, sharing its components.
+
+    uvicorn --factory app.api.asgi:create_asgi_app --port 5060
+
+Any ASGI server works; none is bundled. ``ASGI_THREADS`` sizes the pool.
+"""
+
+import asyncio
+import contextvars
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+from flask import Flask
+from app.api.app import create_app
+from app.api.errors import ValidationError, NotFoundError, error_body
+from app.api.routes import parse_transaction, parse_log_filters
+from app.models.async_datastore import AsyncDataStore
+from app.models.transaction_executor import AsyncTransactionExecutor
+from app.authorization.async_logger import AsyncDecisionLogger
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+async def read_body(receive: Receive) -> bytes:
+    """The whole request body."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionError('Client disconnected')
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+class WSGIBridge:
+    """Serves ASGI HTTP requests with a WSGI application on worker threads."""
+
+    def __init__(self, app: Callable, executor: ThreadPoolExecutor):
+        self.app = app
+        self.executor = executor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        environ = self.environ(scope, await read_body(receive))
+        response: Dict[str, Any] = {}
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+            ]
+
+        loop = asyncio.get_running_loop()
+        # Streamed bodies (e.g. exports) are produced one chunk at a time, maybe on
+        # different threads; one context keeps Flask's request context across them
+        context = contextvars.copy_context()
+
+        def run(function, *args):
+            return loop.run_in_executor(self.executor, context.run, function, *args)
+
+        iterable = await run(self.app, environ, start_response)
+        try:
+            iterator = iter(iterable)
+            chunk = await run(next, iterator, None)
+            await send({
+                'type': 'http.response.start',
+                'status': response['status'],
+                'headers': response['headers']
+            })
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await run(next, iterator, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                await run(close)
+
+    @staticmethod
+    def environ(scope: Scope, body: bytes) -> Dict[str, Any]:
+        """WSGI environ for an ASGI HTTP scope."""
+        script_name = scope.get('root_path', '')
+        path = scope['path']
+        if script_name and path.startswith(script_name):
+            path = path[len(script_name):]
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': script_name.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').lower()
+            if name == 'content-type':
+                key = 'CONTENT_TYPE'
+            elif name in ('content-length', 'transfer-encoding'):
+                # The body was read whole, whatever its framing
+                continue
+            else:
+                key = 'HTTP_' + name.upper().replace('-', '_')
+            value = value.decode('latin-1')
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        environ['CONTENT_LENGTH'] = str(len(body))
+        return environ
+
+
+class ASGIApp:
+    """Async handlers for the hot endpoints in front of the Flask application."""
+
+    def __init__(self, flask_app: Flask, executor: ThreadPoolExecutor):
+        self.flask_app = flask_app
+        self.executor = executor
+        self.datastore = AsyncDataStore(flask_app.datastore, executor)
+        self.decision_logger = AsyncDecisionLogger(flask_app.decision_logger, executor)
+        self.transaction_executor = AsyncTransactionExecutor(
+            flask_app.transaction_executor,
+            self.datastore,
+            self.decision_logger
+        )
+        self.wsgi = WSGIBridge(flask_app.wsgi_app, executor)
+        self.routes = {
+            ('POST', '/api/transactions'): self.execute_transaction,
+            ('GET', '/api/decisions'): self.query_decisions
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        handler = self.routes.get((scope['method'], scope['path']))
+        if handler is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        try:
+            if self.flask_app.shared_state_checks:
+                await self.datastore.run(self._check_shared_state)
+            status, payload = await handler(scope, receive)
+        except ConnectionError:
+            return
+        except Exception as e:
+            payload, status = error_body(e)
+
+        # Same encoding as jsonify
+        body = (self.flask_app.json.dumps(payload, separators=(',', ':')) + '\n').encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode('latin-1'))]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _check_shared_state(self):
+        for check in self.flask_app.shared_state_checks:
+            check()
+
+    async def lifespan(self, receive: Receive, send: Send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.decision_logger.flush()
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def execute_transaction(self, scope: Scope, receive: Receive) -> Tuple[int, Any]:
+        """Execute a transaction with authorization."""
+        body = await read_body(receive)
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            raise ValidationError("Request body must be valid JSON")
+
+        try:
+            user_id, account_id, action, amount, environment = parse_transaction(data)
+
+            user = await self.datastore.get_user(user_id)
+            if not user:
+                raise NotFoundError(f"User with ID {user_id} not found")
+
+            account = await self.datastore.get_account(account_id)
+            if not account:
+                raise NotFoundError(f"Account with ID {account_id} not found")
+
+            success, message, transaction = await self.transaction_executor.execute_transaction(
+                user=user,
+                account=account,
+                action=action,
+                amount=amount,
+                environment=environment
+            )
+        except (KeyError, TypeError) as e:
+            raise ValidationError(f"Invalid transaction data: {str(e)}")
+
+        return 200 if success else 403, {
+            'success': success,
+            'message': message,
+            'transaction': transaction.to_dict()
+        }
+
+    async def query_decisions(self, scope: Scope, receive: Receive) -> Tuple[int, Any]:
+        """Query authorization decision logs."""
+        args: Dict[str, str] = {}
+        for name, value in parse_qsl(scope.get('query_string', b'').decode('utf-8')):
+            args.setdefault(name, value)
+        decisions = await self.decision_logger.query(parse_log_filters(args))
+        return 200, [d.to_dict() for d in decisions]
+
+
+def create_asgi_app(flask_app: Optional[Flask] = None) -> ASGIApp:
+    """Create the ASGI application around ``flask_app`` (a new one by default)."""
+    executor = ThreadPoolExecutor(
+        max_workers=int(os.environ.get('ASGI_THREADS', 32)),
+        thread_name_prefix='asgi-worker'
+    )
+    return ASGIApp(flask_app or create_app(), executor)
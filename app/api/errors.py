@@ -43,61 +43,37 @@ class ServerError(Exception):
         self.details = details
 
 
+def error_body(error):
+    """Response body and status code for an exception, shared by the Flask and ASGI apps."""
+    codes = {
+        ValidationError: 'validation_error',
+        AuthorizationError: 'authorization_error',
+        NotFoundError: 'not_found',
+        ServerError: 'server_error'
+    }
+    for error_class, code in codes.items():
+        if isinstance(error, error_class):
+            break
+    else:
+        return {'error': {'code': 'server_error', 'message': 'An unexpected error occurred'}}, 500
+    
+    response = {
+        'error': {
+            'code': code,
+            'message': error.message
+        }
+    }
+    if error.details and code != 'server_error':
+        response['error']['details'] = error.details
+    return response, error.status_code
+
+
 def register_error_handlers(app):
     """Register error handlers with Flask app."""
 
-    @app.errorhandler(ValidationError)
-    def handle_validation_error(error):
-        response = {
-            'error': {
-                'code': 'validation_error',
-                'message': error.message
-            }
-        }
-        if error.details:
-            response['error']['details'] = error.details
-        return jsonify(response), error.status_code
-
-    @app.errorhandler(AuthorizationError)
-    def handle_authorization_error(error):
-        response = {
-            'error': {
-                'code': 'authorization_error',
-                'message': error.message
-            }
-        }
-        if error.details:
-            response['error']['details'] = error.details
-        return jsonify(response), error.status_code
-
-    @app.errorhandler(NotFoundError)
-    def handle_not_found_error(error):
-        response = {
-            'error': {
-                'code': 'not_found',
-                'message': error.message
-            }
-        }
-        if error.details:
-            response['error']['details'] = error.details
-        return jsonify(response), error.status_code
-
-    @app.errorhandler(ServerError)
-    def handle_server_error(error):
-        response = {
-            'error': {
-                'code': 'server_error',
-                'message': error.message
-            }
-        }
-        return jsonify(response), error.status_code
-
-    @app.errorhandler(Exception)
-    def handle_generic_error(error):
-        response = {
-            'error': {
-                'code': 'server_error',
-                'message': 'An unexpected error occurred'
-            }
-        }
-        return jsonify(response), 500
+    def handle_error(error):
+        response, status = error_body(error)
+        return jsonify(response), status
+
+    for error_class in (ValidationError, AuthorizationError, NotFoundError, ServerError, Exception):
+        app.register_error_handler(error_class, handle_error)
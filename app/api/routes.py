@@ -1,13 +1,89 @@
 """API routes for the banking application."""
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from datetime import datetime
 from app.models.user import User, UserAttributes, Location
 from app.models.account import Account, AccountAttributes
-from app.authorization.models import Environment
+from app.authorization.models import Environment, ActionAttributes
 from app.authorization.decision_logger import LogQueryFilters
+from app.authorization.log_export import EXPORT_FORMATS, EXPORT_MIMETYPES, encode_records, gzip_chunks
 from app.api.errors import ValidationError, NotFoundError
 
+# Maximum number of rows accepted by POST /api/authorize/batch
+MAX_BATCH_SIZE = 10000
+
+# Maximum number of NDJSON rows accepted by the bulk import endpoints
+MAX_IMPORT_ROWS = 100000
+
+# Maximum number of decisions GET /api/policy/mining reads; mine whole logs with the CLI
+MAX_MINING_RECORDS = 10000
+
+
+def _parse_reverse_query(args):
+    """Read (action, environment, action attributes) from reverse query parameters."""
+    action = args.get('action')
+    if not action:
+        raise ValidationError("Parameter 'action' is required")
+    
+    business_hours = args.get('business_hours', 'true').lower()
+    if business_hours not in ('true', 'false'):
+        raise ValidationError("Parameter 'business_hours' must be 'true' or 'false'")
+    
+    amount = args.get('amount')
+    try:
+        amount = float(amount) if amount is not None else None
+    except ValueError:
+        raise ValidationError(f"Invalid amount: {amount}")
+    
+    environment = Environment(
+        timestamp=datetime.now(),
+        business_hours=business_hours == 'true',
+        ip_address=args.get('ip_address'),
+        location=args.get('location')
+    )
+    return action, environment, ActionAttributes(amount=amount, type=action)
+
+
+def parse_transaction(data):
+    """Read (user_id, account_id, action, amount, environment) from a transaction body."""
+    if not data:
+        raise ValidationError("Request body is required")
+    
+    # Validate required fields
+    if 'user_id' not in data:
+        raise ValidationError("Field 'user_id' is required")
+    if 'account_id' not in data:
+        raise ValidationError("Field 'account_id' is required")
+    if 'action' not in data:
+        raise ValidationError("Field 'action' is required")
+    
+    environment = Environment(
+        timestamp=datetime.now(),
+        business_hours=bool(data.get('business_hours', True)),
+        ip_address=data.get('ip_address'),
+        location=data.get('location')
+    )
+    return data['user_id'], data['account_id'], data['action'], data.get('amount'), environment
+
+
+def parse_log_filters(args):
+    """Build LogQueryFilters from decision query parameters."""
+    try:
+        start_time = args.get('startTime')
+        end_time = args.get('endTime')
+        start_time = datetime.fromisoformat(start_time) if start_time else None
+        end_time = datetime.fromisoformat(end_time) if end_time else None
+    except ValueError as e:
+        raise ValidationError(f"Invalid time range: {str(e)}")
+    
+    return LogQueryFilters(
+        user_id=args.get('userId'),
+        action_type=args.get('actionType'),
+        decision=args.get('decision'),
+        start_time=start_time,
+        end_time=end_time
+    )
+
 
 def create_routes_blueprint():
     """Create and configure routes blueprint."""
@@ -23,7 +99,10 @@ def create_routes_blueprint():
                 'users': '/api/users',
                 'accounts': '/api/accounts',
                 'transactions': '/api/transactions',
+                'authorize_batch': '/api/authorize/batch',
                 'decisions': '/api/decisions',
+                'metrics': '/api/metrics',
+                'policy': '/api/policy',
                 'schema': '/api/schema',
                 'health': '/health'
             }
@@ -68,6 +147,15 @@ def create_routes_blueprint():
         except ValueError as e:
             raise ValidationError(str(e))
 
+    @bp.route('/users/bulk', methods=['POST'])
+    def bulk_create_users():
+        """Create users from an NDJSON body, one user object per line."""
+        try:
+            result = current_app.bulk_importer.import_users(request.stream, max_rows=MAX_IMPORT_ROWS)
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ValidationError(str(e))
+        return jsonify(result.to_dict()), 200
+
     @bp.route('/users/<user_id>', methods=['GET'])
     def get_user(user_id):
         """Get user by ID."""
@@ -76,6 +164,17 @@ def create_routes_blueprint():
             raise NotFoundError(f"User with ID {user_id} not found")
         return jsonify(user.to_dict())
 
+    @bp.route('/users/<user_id>/accessible', methods=['GET'])
+    def get_accessible_accounts(user_id):
+        """List the accounts a user may perform an action on."""
+        user = current_app.datastore.get_user(user_id)
+        if not user:
+            raise NotFoundError(f"User with ID {user_id} not found")
+        
+        action, environment, action_attributes = _parse_reverse_query(request.args)
+        result = current_app.access_finder.resources_for(user, action, environment, action_attributes)
+        return jsonify(result.to_dict())
+
     # Account endpoints
     @bp.route('/accounts', methods=['POST'])
     def create_account():
@@ -103,6 +202,15 @@ def create_routes_blueprint():
         except ValueError as e:
             raise ValidationError(str(e))
 
+    @bp.route('/accounts/bulk', methods=['POST'])
+    def bulk_upsert_accounts():
+        """Create or replace resources from an NDJSON body, one object per line."""
+        try:
+            result = current_app.bulk_importer.upsert_accounts(request.stream, max_rows=MAX_IMPORT_ROWS)
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ValidationError(str(e))
+        return jsonify(result.to_dict()), 200
+
     @bp.route('/accounts/<account_id>', methods=['GET'])
     def get_account(account_id):
         """Get account by ID."""
@@ -111,47 +219,39 @@ def create_routes_blueprint():
             raise NotFoundError(f"Account with ID {account_id} not found")
         return jsonify(account.to_dict())
 
+    @bp.route('/accounts/<account_id>/authorized-users', methods=['GET'])
+    def get_authorized_users(account_id):
+        """List the users that may perform an action on an account."""
+        account = current_app.datastore.get_account(account_id)
+        if not account:
+            raise NotFoundError(f"Account with ID {account_id} not found")
+        
+        action, environment, action_attributes = _parse_reverse_query(request.args)
+        result = current_app.access_finder.users_for(account, action, environment, action_attributes)
+        return jsonify(result.to_dict())
+
     # Transaction endpoint
     @bp.route('/transactions', methods=['POST'])
     def execute_transaction():
         """Execute a transaction with authorization."""
-        data = request.get_json()
-        
-        if not data:
-            raise ValidationError("Request body is required")
-        
         try:
-            # Validate required fields
-            if 'user_id' not in data:
-                raise ValidationError("Field 'user_id' is required")
-            if 'account_id' not in data:
-                raise ValidationError("Field 'account_id' is required")
-            if 'action' not in data:
-                raise ValidationError("Field 'action' is required")
+            user_id, account_id, action, amount, environment = parse_transaction(request.get_json())
             
             # Get user and account
-            user = current_app.datastore.get_user(data['user_id'])
+            user = current_app.datastore.get_user(user_id)
             if not user:
-                raise NotFoundError(f"User with ID {data['user_id']} not found")
+                raise NotFoundError(f"User with ID {user_id} not found")
             
-            account = current_app.datastore.get_account(data['account_id'])
+            account = current_app.datastore.get_account(account_id)
             if not account:
-                raise NotFoundError(f"Account with ID {data['account_id']} not found")
-            
-            # Create environment
-            environment = Environment(
-                timestamp=datetime.now(),
-                business_hours=data.get('business_hours', True),
-                ip_address=data.get('ip_address'),
-                location=data.get('location')
-            )
+                raise NotFoundError(f"Account with ID {account_id} not found")
             
             # Execute transaction
             success, message, transaction = current_app.transaction_executor.execute_transaction(
                 user=user,
                 account=account,
-                action=data['action'],
-                amount=data.get('amount'),
+                action=action,
+                amount=amount,
                 environment=environment
             )
             
@@ -164,17 +264,42 @@ def create_routes_blueprint():
         except (KeyError, TypeError) as e:
             raise ValidationError(f"Invalid transaction data: {str(e)}")
 
+    # Batch authorization endpoint
+    @bp.route('/authorize/batch', methods=['POST'])
+    def authorize_batch():
+        """Check many (user_id, resource_id, action, env) rows in one call."""
+        data = request.get_json()
+        
+        if not data:
+            raise ValidationError("Request body is required")
+        
+        rows = data.get('requests')
+        if not isinstance(rows, list):
+            raise ValidationError("Field 'requests' must be a list")
+        if len(rows) > MAX_BATCH_SIZE:
+            raise ValidationError(f"At most {MAX_BATCH_SIZE} requests are allowed per batch")
+        
+        environment = data.get('environment') or {}
+        if not isinstance(environment, dict):
+            raise ValidationError("Field 'environment' must be an object")
+        
+        mode = data.get('mode', 'scalar')
+        if mode not in ('scalar', 'vectorized'):
+            raise ValidationError("Field 'mode' must be 'scalar' or 'vectorized'")
+        
+        result = current_app.batch_authorizer.authorize(
+            rows,
+            default_environment=environment,
+            log=bool(data.get('log', True)),
+            vectorized=mode == 'vectorized'
+        )
+        return jsonify(result.to_dict())
+
     # Decision log endpoints
     @bp.route('/decisions', methods=['GET'])
     def query_decisions():
         """Query authorization decision logs."""
-        filters = LogQueryFilters(
-            user_id=request.args.get('userId'),
-            action_type=request.args.get('actionType'),
-            decision=request.args.get('decision')
-        )
-        
-        decisions = current_app.decision_logger.query(filters)
+        decisions = current_app.decision_logger.query(parse_log_filters(request.args))
         return jsonify([d.to_dict() for d in decisions])
 
     @bp.route('/decisions/statistics', methods=['GET'])
@@ -183,11 +308,116 @@ def create_routes_blueprint():
         stats = current_app.decision_logger.get_statistics()
         return jsonify(stats.to_dict())
 
+    @bp.route('/decisions/pipeline', methods=['GET'])
+    def get_pipeline_metrics():
+        """Get asynchronous decision logging queue metrics."""
+        pipeline = current_app.decision_logger.pipeline
+        if pipeline is None:
+            return jsonify({'enabled': False})
+        return jsonify(dict(enabled=True, **pipeline.get_metrics().to_dict()))
+
+    @bp.route('/cache/statistics', methods=['GET'])
+    def get_cache_statistics():
+        """Get decision cache counters."""
+        cache = current_app.auth_engine.cache
+        if cache is None:
+            return jsonify({'enabled': False})
+        return jsonify(dict(enabled=True, **cache.get_statistics().to_dict()))
+
+    @bp.route('/metrics', methods=['GET'])
+    def get_metrics():
+        """Get rule, evaluation and logging metrics in Prometheus text format."""
+        metrics = current_app.auth_engine.metrics
+        body = metrics.render() if metrics is not None else '# Metrics are disabled; set METRICS_ENABLED=true\n'
+        return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    # Policy endpoints
+    @bp.route('/policy', methods=['GET'])
+    def get_policy():
+        """Get the version and rules of the policy in force."""
+        result = current_app.auth_engine.policy.to_dict()
+        loader = current_app.bundle_loader
+        result['bundle'] = loader.status() if loader is not None else None
+        adaptive = current_app.auth_engine.adaptive
+        result['adaptive_ordering'] = adaptive.status() if adaptive is not None else None
+        return jsonify(result)
+
+    @bp.route('/policy/analysis', methods=['GET'])
+    def analyze_policy():
+        """Report dead, shadowed and redundant rules of the policy in force (requires numpy)."""
+        try:
+            report = current_app.auth_engine.policy.get_analysis()
+        except ValueError as e:
+            raise ValidationError(str(e))
+        return jsonify(report.to_dict())
+
+    @bp.route('/policy/mining', methods=['GET'])
+    def mine_policy():
+        """Propose rules from up to ``limit`` decisions logged since ``since`` (requires numpy)."""
+        from app.authorization.mining import (
+            DEFAULT_MAX_LENGTH, DEFAULT_MAX_RULES, DEFAULT_MIN_CONFIDENCE, DEFAULT_MIN_SUPPORT,
+            logger_records, mine
+        )
+        try:
+            limit = int(request.args.get('limit', MAX_MINING_RECORDS))
+            if limit > MAX_MINING_RECORDS:
+                raise ValueError(f"limit may be at most {MAX_MINING_RECORDS}; mine larger logs with the CLI")
+            since = request.args.get('since')
+            since = datetime.fromisoformat(since) if since else None
+            report = mine(
+                logger_records(current_app.decision_logger, since=since, limit=limit),
+                min_support=float(request.args.get('min_support', DEFAULT_MIN_SUPPORT)),
+                min_confidence=float(request.args.get('min_confidence', DEFAULT_MIN_CONFIDENCE)),
+                max_length=int(request.args.get('max_length', DEFAULT_MAX_LENGTH)),
+                max_rules=int(request.args.get('max_rules', DEFAULT_MAX_RULES))
+            )
+        except ValueError as e:
+            raise ValidationError(f"Invalid mining parameters: {str(e)}")
+        return jsonify(report.to_dict())
+
+    @bp.route('/policy/reload', methods=['POST'])
+    def reload_policy():
+        """Reload the policy bundle from disk and swap it in."""
+        loader = current_app.bundle_loader
+        if loader is None:
+            raise ValidationError("No policy bundle is configured; set POLICY_BUNDLE_PATH")
+        try:
+            snapshot = loader.reload()
+        except (OSError, ValueError) as e:
+            raise ValidationError(f"Policy bundle not loaded: {str(e)}")
+        return jsonify(snapshot.to_dict())
+
     @bp.route('/decisions/export', methods=['GET'])
     def export_decisions():
-        """Export decision logs as JSON."""
-        logs_json = current_app.decision_logger.export_logs('json')
-        return logs_json, 200, {'Content-Type': 'application/json'}
+        """Stream decision logs as a JSON array, NDJSON or columnar binary, optionally gzipped."""
+        export_format = request.args.get('format', 'json')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(f"Invalid format: {export_format}. Must be one of: {', '.join(EXPORT_FORMATS)}")
+        compression = request.args.get('compression')
+        if compression not in (None, 'gzip'):
+            raise ValidationError(f"Invalid compression: {compression}. Must be: gzip")
+        
+        try:
+            cursor = int(request.args.get('cursor', 0))
+            limit = request.args.get('limit')
+            limit = int(limit) if limit is not None else None
+            since = request.args.get('since')
+            since = datetime.fromisoformat(since) if since else None
+            records, next_cursor = current_app.decision_logger.export_records(
+                cursor=cursor,
+                since=since,
+                limit=limit
+            )
+        except ValueError as e:
+            raise ValidationError(f"Invalid export parameters: {str(e)}")
+        
+        chunks = encode_records(records, export_format)
+        headers = {'X-Next-Cursor': str(next_cursor)}
+        if compression == 'gzip':
+            chunks = gzip_chunks(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        mimetype = EXPORT_MIMETYPES[export_format]
+        return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
 
     # Schema endpoint
     @bp.route('/schema', methods=['GET'])
@@ -0,0 +1,159 @@
+"""
+Adaptive rule ordering: check the rules that usually decide a request first.
+
+The engine returns the effect of the first matching rule. Consecutive
+rules (in priority order) with the same effect form a run, and within a
+run the order cannot change a decision: the first match in the run has the
+run's effect whichever member it is, no match in the run falls through to
+the next run either way, and the runs are still visited in the same
+sequence. So any order that keeps the runs in sequence and only permutes
+rules inside each run decides every request like the priority order; only
+the rule named in the reason may differ. ``verify_reordering`` checks
+exactly that before an order is put in force.
+
+``AdaptiveOrdering`` samples the rule checks of one evaluation in
+``sample_every`` and, every ``interval`` evaluations, sorts each run by
+seconds spent checking a rule per match (cheap rules that often match
+first), the order minimizing the expected cost of finding a match. The
+new order is swapped in as a snapshot without clearing the decision
+cache, since no cached decision changes.
+"""
+
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.authorization.engine import AuthorizationEngine, PolicySnapshot
+from app.authorization.metrics import Metrics
+from app.authorization.rules import AuthorizationRule
+
+DEFAULT_INTERVAL = 10000
+DEFAULT_SAMPLE_EVERY = 100
+# Checks of a rule needed before its statistics are trusted
+DEFAULT_MIN_CALLS = 20
+
+
+def equivalence_groups(rules: Sequence[AuthorizationRule]) -> List[List[AuthorizationRule]]:
+    """Maximal runs of consecutive rules with the same effect, in the given order."""
+    groups: List[List[AuthorizationRule]] = []
+    for rule in rules:
+        if groups and groups[-1][0].effect == rule.effect:
+            groups[-1].append(rule)
+        else:
+            groups.append([rule])
+    return groups
+
+
+def verify_reordering(canonical: Sequence[AuthorizationRule], reordered: Sequence[AuthorizationRule]):
+    """
+    Raise ValueError unless ``reordered`` only permutes rules within the
+    same-effect runs of ``canonical`` (the priority order), which
+    guarantees it makes the same decisions.
+    """
+    if len(reordered) != len(canonical):
+        raise ValueError("Reordered rules differ in number from the policy")
+    position = 0
+    for group in equivalence_groups(canonical):
+        end = position + len(group)
+        if {id(rule) for rule in reordered[position:end]} != {id(rule) for rule in group}:
+            raise ValueError(f"Reordering moves rules across the run starting with {group[0].id}")
+        position = end
+
+
+class AdaptiveOrdering:
+    """
+    Collects per-rule match and cost statistics from sampled evaluations
+    and periodically reorders the engine's rules within equivalence groups.
+
+    Statistics are kept per window: each adaptation starts a new one, so
+    the order follows shifts in the workload. A policy swapped in by
+    someone else (a reload) becomes the new canonical order.
+    """
+
+    def __init__(
+        self,
+        engine: AuthorizationEngine,
+        interval: int = DEFAULT_INTERVAL,
+        sample_every: int = DEFAULT_SAMPLE_EVERY,
+        min_calls: int = DEFAULT_MIN_CALLS
+    ):
+        if interval < 1 or sample_every < 1:
+            raise ValueError("interval and sample_every must be positive")
+        self.engine = engine
+        self.interval = interval
+        self.sample_every = sample_every
+        self.min_calls = min_calls
+        self.metrics = Metrics()
+        self.reorders = 0
+        self.last_error: Optional[str] = None
+        self._evaluations = 0
+        self._lock = threading.Lock()
+        # The snapshot this instance last put in force, and the priority
+        # order it was derived from
+        self._policy: Optional[PolicySnapshot] = None
+        self._canonical: Tuple[AuthorizationRule, ...] = ()
+
+    def next_evaluation(self) -> bool:
+        """Count an evaluation; returns whether its rule checks are sampled."""
+        # Unlocked: a lost increment under contention only shifts the schedule
+        self._evaluations = count = self._evaluations + 1
+        if count % self.interval == 0:
+            self.adapt()
+        return count % self.sample_every == 0
+
+    def adapt(self) -> bool:
+        """Reorder the rules from the statistics of this window; returns whether they changed."""
+        # One adaptation at a time; concurrent callers just skip theirs
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            policy = self.engine.policy
+            if policy is not self._policy:
+                self._canonical = policy.rules
+            totals = self.metrics.rule_totals()
+            self.metrics.reset()
+            order = self.propose(policy.rules, totals)
+            if order == list(policy.rules):
+                return False
+            verify_reordering(self._canonical, order)
+            snapshot = PolicySnapshot(order, policy.version, policy.source, ordered=True)
+            if self.engine.swap_policy(snapshot, expected=policy, clear_cache=False) is None:
+                return False
+            self._policy = snapshot
+            self.reorders += 1
+            self.last_error = None
+            return True
+        except ValueError as e:
+            self.last_error = str(e)
+            return False
+        finally:
+            self._lock.release()
+
+    def propose(
+        self,
+        rules: Sequence[AuthorizationRule],
+        totals: Dict[str, Tuple[int, int, float]]
+    ) -> List[AuthorizationRule]:
+        """``rules`` with every equivalence group sorted by seconds per match."""
+        def score(rule: AuthorizationRule) -> float:
+            calls, matches, seconds = totals.get(rule.id, (0, 0, 0.0))
+            if calls < self.min_calls:
+                # Too little evidence: keep the rule's place relative to other unknowns
+                return math.inf
+            if matches == 0:
+                return math.inf
+            return seconds / matches
+
+        order = []
+        for group in equivalence_groups(rules):
+            # sorted is stable, so ties keep their current order
+            order.extend(sorted(group, key=score))
+        return order
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'interval': self.interval,
+            'sample_every': self.sample_every,
+            'reorders': self.reorders,
+            'adapted': self._policy is not None and self._policy is self.engine.policy,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,466 @@
+"""
+Static analysis of declarative rules: dead, shadowed and redundant rules.
+
+Every attribute the rules read gets a finite domain: the enums on the
+models where they exist (roles, levels, statuses, clearance 1-5, ...),
+otherwise one representative per class of values the rules can tell
+apart (each literal, the gaps between numeric literals, an unseen value
+and None). Attributes compared with each other share their candidate
+values, so both equal and unequal pairs occur. Every combination of
+those values is evaluated as NumPy masks, which gives the exact
+first-match decision for every distinguishable request. Attributes are
+split into groups that no rule reads together, and each group gets its
+own grid, so the work grows with the largest group rather than with the
+product of every domain. Within a group, combinations matched by the same
+set of rules are merged and weighted by their count; the classes of the
+whole rule set are the products of the groups' classes, so the rest of
+the analysis works on a few hundred columns.
+
+From the masks the analyzer reports rules that never match (dead), that
+match but are always preempted by a higher-priority rule (shadowed), or
+whose removal changes no decision (redundant), and emits a pruned list
+reordered so that decisive rules are tried first, with the same
+decisions for every request. Decisions may then name a different rule of
+the same effect in their reason.
+
+    python -m app.authorization.analyzer [bundle.json] [--output optimized.json]
+"""
+
+import argparse
+import json
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.authorization.conditions import AttributeRef, OPERATORS, SET_OPERATORS
+from app.authorization.rules import AuthorizationRule
+from app.models.user import UserAttributes
+from app.models.account import AccountAttributes
+
+# Attributes with a closed set of valid values
+ATTRIBUTE_DOMAINS: Dict[str, Tuple[Any, ...]] = {
+    'user.attributes.role': tuple(sorted(UserAttributes.VALID_ROLES)),
+    'user.attributes.level': tuple(sorted(UserAttributes.VALID_LEVELS)),
+    'user.attributes.clearance_level': tuple(range(1, 6)),
+    'resource.attributes.status': tuple(sorted(AccountAttributes.VALID_STATUSES)),
+    'resource.attributes.resource_type': tuple(sorted(AccountAttributes.VALID_TYPES)),
+    'environment.business_hours': (True, False)
+}
+
+# Upper bound on the attribute combinations evaluated for one group of
+# attributes, and on the classes of matching rules of the whole rule set
+MAX_POINTS = 20_000_000
+
+# Spacing of the priorities given to the optimized rules
+PRIORITY_STEP = 10
+
+_DEFAULT = -1
+
+
+class RuleFinding:
+    """What the analysis found about one rule."""
+
+    def __init__(self, rule: AuthorizationRule, matches: int, decides: int, status: str,
+                 shadowed_by: Sequence[str] = ()):
+        self.rule = rule
+        self.matches = matches
+        self.decides = decides
+        self.status = status
+        self.shadowed_by = list(shadowed_by)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.rule.id,
+            'name': self.rule.name,
+            'priority': self.rule.priority,
+            'effect': self.rule.effect,
+            'status': self.status,
+            'matches': self.matches,
+            'decides': self.decides,
+            'shadowed_by': self.shadowed_by
+        }
+
+
+class AnalysisReport:
+    """Findings per rule and the optimized rule list."""
+
+    def __init__(
+        self,
+        domains: Dict[str, List[Any]],
+        points: int,
+        findings: List[RuleFinding],
+        optimized_rules: List[AuthorizationRule],
+        average_checks: Tuple[float, float],
+        equivalent: bool
+    ):
+        self.domains = domains
+        self.points = points
+        self.findings = findings
+        self.optimized_rules = optimized_rules
+        self.average_checks = average_checks
+        self.equivalent = equivalent
+
+    def rule_ids(self, status: str) -> List[str]:
+        return [finding.rule.id for finding in self.findings if finding.status == status]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'points': self.points,
+            'domains': {path: [repr(value) for value in values] for path, values in self.domains.items()},
+            'dead': self.rule_ids('dead'),
+            'shadowed': self.rule_ids('shadowed'),
+            'redundant': self.rule_ids('redundant'),
+            'rules': [finding.to_dict() for finding in self.findings],
+            'optimized_rules': [{'id': rule.id, 'priority': rule.priority} for rule in self.optimized_rules],
+            'average_checks': {'original': self.average_checks[0], 'optimized': self.average_checks[1]},
+            'equivalent': self.equivalent
+        }
+
+
+def analyze(rules: Sequence[AuthorizationRule]) -> AnalysisReport:
+    """Analyze declarative rules; raises ValueError for opaque rules or too large a domain."""
+    rules = sorted(rules, key=lambda r: r.priority, reverse=True)
+    for rule in rules:
+        if not rule.is_declarative:
+            raise ValueError(f"Rule {rule.id} has an opaque condition and cannot be analyzed")
+        if rule.effect not in ('permit', 'deny'):
+            raise ValueError(f"Rule {rule.id} has invalid effect: {rule.effect}")
+
+    domains = build_domains(rules)
+    masks, weights = match_classes(rules, domains)
+    points = _product(len(values) for values in domains.values())
+    permits = np.array([rule.effect == 'permit' for rule in rules], dtype=bool)
+
+    order = list(range(len(rules)))
+    first = _first_match(masks, order)
+    decisions = _decisions(first, permits)
+
+    findings = []
+    for position, rule in enumerate(rules):
+        matches = int(weights[masks[position]].sum())
+        decides = int(weights[first == position].sum())
+        if not matches:
+            findings.append(RuleFinding(rule, matches, decides, 'dead'))
+        elif not decides:
+            preempting = np.unique(first[masks[position]])
+            findings.append(RuleFinding(rule, matches, decides, 'shadowed',
+                                        [rules[index].id for index in preempting]))
+        else:
+            findings.append(RuleFinding(rule, matches, decides, 'live'))
+
+    # Drop rules one at a time while every decision stays the same
+    kept = [position for position, finding in enumerate(findings) if finding.status == 'live']
+    for position in list(kept):
+        remaining = [index for index in kept if index != position]
+        if np.array_equal(_decisions(_first_match(masks, remaining), permits), decisions):
+            kept = remaining
+            findings[position].status = 'redundant'
+
+    optimized = _reorder(masks, weights, permits, kept, decisions)
+    optimized_first = _first_match(masks, optimized)
+    equivalent = bool(np.array_equal(_decisions(optimized_first, permits), decisions))
+    average_checks = (
+        _average_checks(first, weights, order),
+        _average_checks(optimized_first, weights, optimized)
+    )
+
+    optimized_rules = [
+        AuthorizationRule.from_dict(dict(rules[index].to_dict(), priority=(len(optimized) - rank) * PRIORITY_STEP))
+        for rank, index in enumerate(optimized)
+    ]
+    return AnalysisReport(domains, points, findings, optimized_rules, average_checks, equivalent)
+
+
+def build_domains(rules: Sequence[AuthorizationRule]) -> Dict[str, List[Any]]:
+    """Candidate values of every attribute the rules read."""
+    literals: Dict[str, List[Any]] = {}
+    links: Dict[str, str] = {}
+
+    def group(path: str) -> str:
+        links.setdefault(path, path)
+        while links[path] != path:
+            path = links[path]
+        return path
+
+    for rule in rules:
+        for condition in rule.conditions:
+            pool = literals.setdefault(condition.attribute, [])
+            group(condition.attribute)
+            if isinstance(condition.value, AttributeRef):
+                literals.setdefault(condition.value.path, [])
+                links[group(condition.value.path)] = group(condition.attribute)
+            elif condition.operator in SET_OPERATORS:
+                pool.extend(condition.value)
+            else:
+                pool.append(condition.value)
+
+    members: Dict[str, List[str]] = {}
+    for path in literals:
+        members.setdefault(group(path), []).append(path)
+
+    domains = {}
+    for paths in members.values():
+        pool = []
+        for path in paths:
+            pool.extend(literals[path])
+            pool.extend(ATTRIBUTE_DOMAINS.get(path, ()))
+        shared = _representatives(pool, fresh=2 if len(paths) > 1 else 1)
+        for path in sorted(paths):
+            domains[path] = list(ATTRIBUTE_DOMAINS[path]) if path in ATTRIBUTE_DOMAINS else shared
+    return dict(sorted(domains.items()))
+
+
+def _representatives(pool: List[Any], fresh: int) -> List[Any]:
+    """One value per class of values that comparisons with ``pool`` can distinguish."""
+    values = []
+    for value in pool:
+        if value not in values:
+            values.append(value)
+    numbers = [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    if values and len(numbers) == len(values):
+        numbers.sort()
+        result = [numbers[0] - 1]
+        for lower, upper in zip(numbers, numbers[1:]):
+            result += [lower, (lower + upper) / 2]
+        result += [numbers[-1], numbers[-1] + 1]
+    else:
+        result = values + [f"<other {index}>" for index in range(1, fresh + 1)]
+    return result + [None]
+
+
+def match_classes(rules: Sequence[AuthorizationRule], domains: Dict[str, List[Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The distinct sets of rules matching some combination of ``domains``,
+    and how many combinations each covers, as ``_Grid.match_classes``.
+
+    Each group of attributes read together gets its own grid. A rule only
+    reads one group, so over the whole domain the classes are every
+    combination of one class per group, weighted by the product of their
+    counts.
+    """
+    masks = np.zeros((len(rules), 1), dtype=bool)
+    weights = np.ones(1, dtype=np.int64)
+    if _product(len(values) for values in domains.values()) > np.iinfo(np.int64).max:
+        raise ValueError("Rules span too many attribute combinations to count")
+    for paths, positions in _attribute_groups(rules):
+        grid = _Grid({path: domains[path] for path in paths})
+        group_masks, counts = grid.match_classes([rules[position] for position in positions])
+        classes = masks.shape[1] * group_masks.shape[1]
+        if classes > MAX_POINTS:
+            raise ValueError(f"Rules split requests into {classes} classes; at most {MAX_POINTS} are analyzed")
+        # Class (i, j) is class i of the groups so far with class j of this one
+        masks = np.repeat(masks, group_masks.shape[1], axis=1)
+        masks[positions] = np.tile(group_masks, (1, classes // group_masks.shape[1]))
+        weights = np.outer(weights, counts).reshape(-1)
+    return masks, weights
+
+
+def _attribute_groups(rules: Sequence[AuthorizationRule]) -> List[Tuple[List[str], List[int]]]:
+    """Attributes linked by being read in one rule, with the positions of the rules reading them."""
+    links: Dict[str, str] = {}
+
+    def group(path: str) -> str:
+        links.setdefault(path, path)
+        while links[path] != path:
+            path = links[path]
+        return path
+
+    for rule in rules:
+        paths = _rule_paths(rule)
+        for path in paths:
+            links[group(path)] = group(paths[0])
+
+    groups: Dict[Optional[str], Tuple[List[str], List[int]]] = {}
+    for path in links:
+        groups.setdefault(group(path), ([], []))[0].append(path)
+    for position, rule in enumerate(rules):
+        paths = _rule_paths(rule)
+        # Rules without conditions match everywhere; they form a group of no attributes
+        groups.setdefault(group(paths[0]) if paths else None, ([], []))[1].append(position)
+    return [(sorted(paths), positions) for paths, positions in groups.values()]
+
+
+def _rule_paths(rule: AuthorizationRule) -> List[str]:
+    paths = []
+    for condition in rule.conditions:
+        paths.append(condition.attribute)
+        if isinstance(condition.value, AttributeRef):
+            paths.append(condition.value.path)
+    return paths
+
+
+def _product(values) -> int:
+    result = 1
+    for value in values:
+        result *= value
+    return result
+
+
+class _Grid:
+    """Every combination of attribute values, one axis per attribute."""
+
+    def __init__(self, domains: Dict[str, List[Any]]):
+        self.domains = domains
+        self.axes = {path: position for position, path in enumerate(domains)}
+        self.shape = tuple(len(values) for values in domains.values())
+        self.points = _product(self.shape)
+        if self.points > MAX_POINTS:
+            raise ValueError(
+                f"Attributes read together span {self.points} combinations; at most {MAX_POINTS} are analyzed"
+            )
+
+    def match_classes(self, rules: Sequence[AuthorizationRule]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The distinct sets of rules matching some combination, and how many do.
+
+        Returns a (rules x classes) boolean matrix and the count of each
+        class. Only one rule's mask is held at a time: each adds a bit to a
+        per-combination signature (one uint64 word per 64 rules).
+        """
+        words = []
+        for position, rule in enumerate(rules):
+            if position % 64 == 0:
+                words.append(np.zeros(self.points, dtype=np.uint64))
+            bit = np.uint64(1 << (position % 64))
+            words[-1] |= self.rule_mask(rule).reshape(-1).astype(np.uint64) * bit
+        if not words:
+            return np.zeros((0, 1), dtype=bool), np.array([self.points], dtype=np.int64)
+
+        if len(words) == 1:
+            signatures, counts = np.unique(words[0], return_counts=True)
+            signatures = signatures.reshape(-1, 1)
+        else:
+            # Compare whole rows as single opaque values, which sorts much faster than axis=0
+            rows = np.ascontiguousarray(np.stack(words, axis=1))
+            unique_rows, counts = np.unique(rows.view(np.dtype((np.void, rows.dtype.itemsize * len(words)))),
+                                            return_counts=True)
+            signatures = unique_rows.view(np.uint64).reshape(-1, len(words))
+        masks = np.array([
+            (signatures[:, position // 64] >> np.uint64(position % 64)) & np.uint64(1)
+            for position in range(len(rules))
+        ], dtype=bool)
+        return masks, counts.astype(np.int64)
+
+    def rule_mask(self, rule: AuthorizationRule) -> np.ndarray:
+        mask = np.ones(self.shape, dtype=bool)
+        for condition in rule.conditions:
+            mask &= self._condition_mask(condition)
+        return mask
+
+    def _condition_mask(self, condition) -> np.ndarray:
+        op = OPERATORS[condition.operator]
+        left = condition.attribute
+        right = condition.value.path if isinstance(condition.value, AttributeRef) else None
+        if right is None:
+            table = np.array([_holds(op, value, condition.value) for value in self.domains[left]], dtype=bool)
+            return self._place(table, [left])
+        if right == left:
+            table = np.array([_holds(op, value, value) for value in self.domains[left]], dtype=bool)
+            return self._place(table, [left])
+        table = np.array([
+            [_holds(op, value, other) for other in self.domains[right]]
+            for value in self.domains[left]
+        ], dtype=bool)
+        return self._place(table, [left, right])
+
+    def _place(self, table: np.ndarray, paths: List[str]) -> np.ndarray:
+        """Reshape a truth table over ``paths`` so it broadcasts over the grid."""
+        axes = [self.axes[path] for path in paths]
+        if len(axes) == 2 and axes[0] > axes[1]:
+            table = table.T
+            axes.reverse()
+        shape = [1] * len(self.shape)
+        for axis in axes:
+            shape[axis] = self.shape[axis]
+        return table.reshape(shape)
+
+
+def _holds(op, value: Any, other: Any) -> bool:
+    # A condition that raises does not match, as in the engine
+    try:
+        return bool(op(value, other))
+    except Exception:
+        return False
+
+
+def _first_match(masks: np.ndarray, order: List[int]) -> np.ndarray:
+    """Index of the rule deciding each point when ``order`` is tried, or _DEFAULT."""
+    first = np.full(masks.shape[1], _DEFAULT, dtype=np.int64)
+    undecided = np.ones(masks.shape[1], dtype=bool)
+    for index in order:
+        hits = masks[index] & undecided
+        first[hits] = index
+        undecided &= ~hits
+    return first
+
+
+def _decisions(first: np.ndarray, permits: np.ndarray) -> np.ndarray:
+    """Whether each point is permitted; the default is deny."""
+    return np.where(first == _DEFAULT, False, permits[first])
+
+
+def _average_checks(first: np.ndarray, weights: np.ndarray, order: List[int]) -> float:
+    """Mean number of rules tried per combination, without decision table pruning."""
+    rank = np.full(max(order, default=0) + 2, len(order), dtype=np.int64)
+    for position, index in enumerate(order):
+        rank[index] = position + 1
+    # _DEFAULT (-1) indexes the last slot: every rule was tried
+    return float((rank[first] * weights).sum() / weights.sum())
+
+
+def _reorder(
+    masks: np.ndarray,
+    weights: np.ndarray,
+    permits: np.ndarray,
+    kept: List[int],
+    decisions: np.ndarray
+) -> List[int]:
+    """
+    Greedily put first the rule deciding most undecided points.
+
+    A rule may go next only if, on every undecided point it matches, its
+    effect is the decision that point must get. The first remaining rule
+    in priority order always qualifies, and the remaining rules then still
+    decide every undecided point correctly, so decisions are unchanged.
+    """
+    remaining = list(kept)
+    undecided = np.ones(masks.shape[1], dtype=bool)
+    order = []
+    while remaining:
+        best: Optional[int] = None
+        best_hits = -1
+        for index in remaining:
+            hits = masks[index] & undecided
+            if np.any(decisions[hits] != permits[index]):
+                continue
+            count = int(weights[hits].sum())
+            if count > best_hits:
+                best, best_hits = index, count
+        order.append(best)
+        remaining.remove(best)
+        undecided &= ~masks[best]
+    return order
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find dead, shadowed and redundant rules.')
+    parser.add_argument('bundle', nargs='?', help='policy bundle to analyze (default: the built-in rules)')
+    parser.add_argument('--output', help='write the optimized rules here as a policy bundle')
+    args = parser.parse_args()
+
+    from app.authorization.policy_bundle import load_bundle, write_bundle
+    if args.bundle:
+        policy = load_bundle(args.bundle)
+        rules, version = policy.rules, policy.version
+    else:
+        from app.authorization.banking_rules import create_all_rules
+        rules, version = create_all_rules(), 'builtin'
+
+    report = analyze(rules)
+    result = report.to_dict()
+    del result['domains']
+    print(json.dumps(result, indent=2))
+    if args.output:
+        write_bundle(args.output, report.optimized_rules, f"{version}+optimized")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Asyncio interface to the decision logger."""
+
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Union
+from app.authorization.models import AuthorizationDecision
+from app.authorization.decision_logger import DecisionLogger, DecisionStatistics, LogQueryFilters
+from app.authorization.log_aggregator import RemoteDecisionLogger
+
+
+class AsyncDecisionLogger:
+    """
+    Awaitable decision logging for code running on an event loop.
+
+    ``log`` runs inline when it cannot wait: an in-memory logger, or a
+    pipeline that drops or samples instead of blocking when full. Logging
+    that may wait on disk, the aggregator or a full queue, as well as
+    queries and statistics, runs on ``executor``.
+    """
+
+    def __init__(self, logger: Union[DecisionLogger, RemoteDecisionLogger], executor: Optional[Executor] = None):
+        self.logger = logger
+        self.executor = executor
+
+    async def _run(self, function: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+    def _log_blocks(self) -> bool:
+        pipeline = self.logger.pipeline
+        if pipeline is not None:
+            return pipeline.backpressure == 'block'
+        return self.logger.store is not None or isinstance(self.logger, RemoteDecisionLogger)
+
+    async def log(self, decision: AuthorizationDecision):
+        if self._log_blocks():
+            await self._run(self.logger.log, decision)
+        else:
+            self.logger.log(decision)
+
+    async def query(self, filters: LogQueryFilters) -> List:
+        return await self._run(self.logger.query, filters)
+
+    async def get_statistics(self) -> DecisionStatistics:
+        return await self._run(self.logger.get_statistics)
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        return await self._run(self.logger.flush, timeout)
@@ -1,7 +1,7 @@
 """Authorization rules for Media-ABAC."""
 
 from app.authorization.rules import AuthorizationRule
-from app.authorization.models import AuthorizationRequest
+from app.authorization.conditions import Condition, AttributeRef
 
 
 def create_media_abac_rules():
@@ -9,130 +9,117 @@ def create_media_abac_rules():
     rules = []
     
     # Rule 1: Basic role-based access
-    def basic_access(req: AuthorizationRequest) -> bool:
-        return req.user.attributes.role in {"writer", "editor", "publisher"}
-    
     rules.append(AuthorizationRule(
         id='basic_access',
         name='Basic Access Rule',
-        condition=basic_access,
+        conditions=[
+            Condition('user.attributes.role', 'in', {"writer", "editor", "publisher"})
+        ],
         priority=100,
         effect='permit'
     ))
     
     # Rule 2: Senior level access
-    def senior_access(req: AuthorizationRequest) -> bool:
-        return (
-            req.user.attributes.level in {'senior', 'executive'} and
-            req.action in {"create_article", "edit_article", "publish", "unpublish"}
-        )
-    
     rules.append(AuthorizationRule(
         id='senior_access',
         name='Senior Level Access',
-        condition=senior_access,
+        conditions=[
+            Condition('user.attributes.level', 'in', {'senior', 'executive'}),
+            Condition('action', 'in', {"create_article", "edit_article", "publish", "unpublish"})
+        ],
         priority=90,
         effect='permit'
     ))
     
     # Rule 3: Owner access
-    def owner_access(req: AuthorizationRequest) -> bool:
-        return req.user.id == req.resource.attributes.owner_id
-    
     rules.append(AuthorizationRule(
         id='owner_access',
         name='Resource Owner Access',
-        condition=owner_access,
+        conditions=[
+            Condition('user.id', 'eq', AttributeRef('resource.attributes.owner_id'))
+        ],
         priority=95,
         effect='permit'
     ))
     
     # Rule 4: Location-based access
-    def location_access(req: AuthorizationRequest) -> bool:
-        return req.user.attributes.location.primary == req.resource.attributes.location
-    
     rules.append(AuthorizationRule(
         id='location_access',
         name='Same Location Access',
-        condition=location_access,
+        conditions=[
+            Condition('user.attributes.location.primary', 'eq', AttributeRef('resource.attributes.location'))
+        ],
         priority=85,
         effect='permit'
     ))
     
     # Rule 5: Clearance level access
-    def clearance_access(req: AuthorizationRequest) -> bool:
-        return req.user.attributes.clearance_level >= req.resource.attributes.sensitivity_level
-    
     rules.append(AuthorizationRule(
         id='clearance_access',
         name='Clearance Level Access',
-        condition=clearance_access,
+        conditions=[
+            Condition('user.attributes.clearance_level', 'ge', AttributeRef('resource.attributes.sensitivity_level'))
+        ],
         priority=80,
         effect='permit'
     ))
     
     # Rule 6: After hours restriction
-    def after_hours_deny(req: AuthorizationRequest) -> bool:
-        return not req.environment.business_hours and req.action_attributes.amount and req.action_attributes.amount > 1000
-    
     rules.append(AuthorizationRule(
         id='after_hours_deny',
         name='After Hours High-Value Restriction',
-        condition=after_hours_deny,
+        conditions=[
+            # Any falsy value is outside business hours, not only False
+            Condition('environment.business_hours', 'in', {False, None, ''}),
+            Condition('action_attributes.amount', 'gt', 1000)
+        ],
         priority=200,
         effect='deny'
     ))
     
     # Rule 7: Cross-location restriction
-    def cross_location_deny(req: AuthorizationRequest) -> bool:
-        return (
-            req.user.attributes.role == 'writer' and
-            req.user.attributes.location.primary != req.resource.attributes.location
-        )
-    
     rules.append(AuthorizationRule(
         id='cross_location_deny',
         name='Cross-Location Restriction',
-        condition=cross_location_deny,
+        conditions=[
+            Condition('user.attributes.role', 'eq', 'writer'),
+            Condition('user.attributes.location.primary', 'ne', AttributeRef('resource.attributes.location'))
+        ],
         priority=150,
         effect='deny'
     ))
     
     # Rule 8: Inactive resource restriction
-    def inactive_resource_deny(req: AuthorizationRequest) -> bool:
-        return req.resource.attributes.status == 'inactive'
-    
     rules.append(AuthorizationRule(
         id='inactive_resource_deny',
         name='Inactive Resource Restriction',
-        condition=inactive_resource_deny,
+        conditions=[
+            Condition('resource.attributes.status', 'eq', 'inactive')
+        ],
         priority=180,
         effect='deny'
     ))
     
     # Rule 9: Junior level restriction
-    def junior_restriction(req: AuthorizationRequest) -> bool:
-        return req.user.attributes.level == 'junior' and req.action in {"publish", "unpublish"}
-    
     rules.append(AuthorizationRule(
         id='junior_restriction',
         name='Junior Level Restriction',
-        condition=junior_restriction,
+        conditions=[
+            Condition('user.attributes.level', 'eq', 'junior'),
+            Condition('action', 'in', {"publish", "unpublish"})
+        ],
         priority=120,
         effect='deny'
     ))
     
     # Rule 10: High sensitivity restriction
-    def high_sensitivity_deny(req: AuthorizationRequest) -> bool:
-        return (
-            req.resource.attributes.sensitivity_level >= 4 and
-            req.user.attributes.clearance_level < 4
-        )
-    
     rules.append(AuthorizationRule(
         id='high_sensitivity_deny',
         name='High Sensitivity Restriction',
-        condition=high_sensitivity_deny,
+        conditions=[
+            Condition('resource.attributes.sensitivity_level', 'ge', 4),
+            Condition('user.attributes.clearance_level', 'lt', 4)
+        ],
         priority=190,
         effect='deny'
     ))
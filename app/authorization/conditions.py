@@ -0,0 +1,106 @@
+"""Declarative rule conditions for ABAC evaluation."""
+
+import operator
+from typing import Any, Callable, Dict, List
+from dataclasses import dataclass, field
+from operator import attrgetter
+
+
+def _contains(left: Any, right: Any) -> bool:
+    return left in right
+
+
+def _not_contains(left: Any, right: Any) -> bool:
+    return left not in right
+
+
+OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'lt': operator.lt,
+    'le': operator.le,
+    'gt': operator.gt,
+    'ge': operator.ge,
+    'in': _contains,
+    'not_in': _not_contains
+}
+
+SET_OPERATORS = {'in', 'not_in'}
+
+
+@dataclass(frozen=True)
+class AttributeRef:
+    """Reference to another request attribute, used as a condition value."""
+    path: str
+
+
+@dataclass
+class Condition:
+    """Single (attribute, operator, value) test against a request.
+
+    ``attribute`` is a dotted path into the authorization request, for
+    example ``user.attributes.role`` or ``resource.attributes.status``.
+    ``value`` is either a literal or an ``AttributeRef`` to compare two
+    request attributes with each other.
+    """
+    attribute: str
+    operator: str
+    value: Any
+    _evaluate: Callable[[Any], bool] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.operator not in OPERATORS:
+            raise ValueError(f"Invalid operator: {self.operator}")
+        if self.operator in SET_OPERATORS and not isinstance(self.value, AttributeRef):
+            self.value = frozenset(self.value)
+
+        op = OPERATORS[self.operator]
+        get_attribute = attrgetter(self.attribute)
+        if isinstance(self.value, AttributeRef):
+            get_value = attrgetter(self.value.path)
+            self._evaluate = lambda request: op(get_attribute(request), get_value(request))
+        else:
+            value = self.value
+            self._evaluate = lambda request: op(get_attribute(request), value)
+
+    @property
+    def compares_attributes(self) -> bool:
+        """Whether the condition compares two request attributes."""
+        return isinstance(self.value, AttributeRef)
+
+    def evaluate(self, request) -> bool:
+        """Evaluate the condition; errors propagate to the caller."""
+        return self._evaluate(request)
+
+    def to_dict(self) -> Dict[str, Any]:
+        value = self.value
+        if isinstance(value, AttributeRef):
+            value = {'ref': value.path}
+        elif isinstance(value, frozenset):
+            value = sorted(value, key=repr)
+        return {'attribute': self.attribute, 'operator': self.operator, 'value': value}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Condition':
+        """Inverse of ``to_dict``: ``{"ref": path}`` values become AttributeRefs."""
+        value = data['value']
+        if isinstance(value, dict):
+            if set(value) != {'ref'}:
+                raise ValueError(f"Invalid condition value: {value}")
+            value = AttributeRef(value['ref'])
+        return cls(data['attribute'], data['operator'], value)
+
+
+def compile_conditions(conditions: List[Condition]) -> Callable[[Any], bool]:
+    """Compile a list of conditions into a single AND-ed callable."""
+    evaluators = tuple(c._evaluate for c in conditions)
+    if len(evaluators) == 1:
+        return evaluators[0]
+
+    def condition(request) -> bool:
+        for evaluate in evaluators:
+            if not evaluate(request):
+                return False
+        return True
+
+    return condition
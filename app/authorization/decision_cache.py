@@ -0,0 +1,259 @@
+"""Bounded TTL cache of authorization decisions with approximate LRU eviction."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from operator import attrgetter
+from app.authorization.models import AuthorizationRequest
+from app.authorization.rules import AuthorizationRule
+from app.authorization.conditions import OPERATORS, SET_OPERATORS
+
+# Sentinels for attribute values that cannot be read or hashed
+_MISSING = ('__missing__',)
+_UNHASHABLE = ('__unhashable__',)
+# Bucket for values that no rule compares against
+_OTHER = ('__other__',)
+# Outcome of a condition that raised
+_ERROR = ('__error__',)
+
+EQUALITY_OPERATORS = {'eq', 'ne', 'in', 'not_in'}
+
+CachedDecision = Tuple[str, str, Tuple[str, ...]]
+
+
+class CacheKeyBuilder:
+    """Derives a cache key from the attributes the rules actually read.
+
+    Attributes only tested for (in)equality against literals contribute
+    their value, bucketed to ``_OTHER`` when no rule names it. Ordering
+    tests against literals (such as ``amount > 1000``) and comparisons
+    between two attributes (such as owner or location match) contribute
+    their outcome. Requests with equal keys therefore get equal decisions.
+    Rules with opaque callables cannot be keyed, which disables caching.
+    """
+
+    def __init__(self, rules: List[AuthorizationRule]):
+        self.cacheable = all(rule.is_declarative for rule in rules)
+        self._value_specs: List[Tuple[int, frozenset]] = []
+        self._outcome_specs: List[Tuple[Callable, int, Optional[int], Any]] = []
+        if not self.cacheable:
+            return
+
+        literals: Dict[str, Set] = {}
+        outcomes = {}
+        for rule in rules:
+            for condition in rule.conditions:
+                if not condition.compares_attributes and condition.operator in EQUALITY_OPERATORS:
+                    values = condition.value if condition.operator in SET_OPERATORS else [condition.value]
+                    try:
+                        literals.setdefault(condition.attribute, set()).update(values)
+                        continue
+                    except TypeError:
+                        pass
+                outcomes[(condition.attribute, condition.operator, repr(condition.value))] = condition
+
+        # Read every attribute with one attrgetter call per request
+        paths: List[str] = []
+
+        def position(path: str) -> int:
+            if path not in paths:
+                paths.append(path)
+            return paths.index(path)
+
+        for attribute in sorted(literals):
+            self._value_specs.append((position(attribute), frozenset(literals[attribute])))
+        for condition in outcomes.values():
+            op = OPERATORS[condition.operator]
+            if condition.compares_attributes:
+                spec = (op, position(condition.attribute), position(condition.value.path), None)
+            else:
+                spec = (op, position(condition.attribute), None, condition.value)
+            self._outcome_specs.append(spec)
+
+        self._paths = paths
+        self._getters = [attrgetter(path) for path in paths]
+        self._get_all = attrgetter(*paths) if len(paths) > 1 else None
+
+    def build(self, request: AuthorizationRequest) -> Optional[Tuple]:
+        """Build the cache key for a request, or None if it cannot be cached."""
+        if not self.cacheable:
+            return None
+        try:
+            values = self._get_all(request) if self._get_all else (self._getters[0](request),)
+        except Exception:
+            values = tuple(self._read(getter, request) for getter in self._getters)
+
+        key = []
+        for index, literals in self._value_specs:
+            value = values[index]
+            if value is _MISSING:
+                key.append(_MISSING)
+                continue
+            try:
+                key.append(value if value in literals else _OTHER)
+            except TypeError:
+                key.append(_UNHASHABLE)
+        for op, left, right, literal in self._outcome_specs:
+            value = values[left]
+            other = literal if right is None else values[right]
+            if value is _MISSING or other is _MISSING:
+                key.append(_ERROR)
+                continue
+            try:
+                key.append(bool(op(value, other)))
+            except Exception:
+                key.append(_ERROR)
+        return tuple(key)
+
+    @staticmethod
+    def _read(getter: Callable, request: AuthorizationRequest) -> Any:
+        try:
+            return getter(request)
+        except Exception:
+            return _MISSING
+
+
+class CacheStatistics:
+    """Counters describing decision cache effectiveness."""
+
+    def __init__(
+        self,
+        size: int,
+        max_size: int,
+        hits: int,
+        misses: int,
+        evictions: int,
+        expirations: int,
+        invalidations: int,
+        bypasses: int
+    ):
+        self.size = size
+        self.max_size = max_size
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+        self.expirations = expirations
+        self.invalidations = invalidations
+        self.bypasses = bypasses
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': self.size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'bypasses': self.bypasses
+        }
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'referenced')
+
+    def __init__(self, value: CachedDecision, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.referenced = False
+
+
+class DecisionCache:
+    """Bounded cache with per-entry TTL and second-chance (CLOCK) eviction.
+
+    Keys carry the value or outcome of everything the rules read, so a
+    change to a user or resource changes the key of its requests; entries
+    never go stale and need no invalidation, only bounding. Hits take no
+    lock and only set the entry's referenced bit. Eviction, under the
+    lock, skips (and clears) referenced entries once before dropping the
+    oldest unreferenced one, which approximates LRU.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        if max_size <= 0:
+            raise ValueError(f"Invalid max_size: {max_size}")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Tuple, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by clear(), so puts computed before it can be told apart
+        self.generation = 0
+        # Counters updated outside the lock may lose increments under contention
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.bypasses = 0
+
+    def get(self, key: Tuple) -> Optional[CachedDecision]:
+        """Look up a decision, marking it recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                    self.expirations += 1
+            self.misses += 1
+            return None
+        entry.referenced = True
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: Tuple, value: CachedDecision, generation: Optional[int] = None):
+        """Store a decision, evicting an entry not used recently if full.
+
+        With ``generation`` the decision is dropped if the cache has been
+        cleared since that generation was read.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.value = value
+                entry.expires_at = time.monotonic() + self.ttl
+                entry.referenced = True
+                return
+            while len(self._entries) >= self.max_size:
+                oldest_key, oldest = next(iter(self._entries.items()))
+                if oldest.referenced:
+                    oldest.referenced = False
+                    self._entries.move_to_end(oldest_key)
+                else:
+                    del self._entries[oldest_key]
+                    self.evictions += 1
+            self._entries[key] = _Entry(value, time.monotonic() + self.ttl)
+
+    def record_bypass(self):
+        """Count a request that could not be cached."""
+        self.bypasses += 1
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def get_statistics(self) -> CacheStatistics:
+        """Get cache counters."""
+        return CacheStatistics(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            invalidations=self.invalidations,
+            bypasses=self.bypasses
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,9 +1,22 @@
 """Decision logger for authorization decisions."""
 
+import bisect
 import json
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Dict, Any, Optional, Iterator, Sequence, Tuple
 from datetime import datetime
 from app.authorization.models import AuthorizationDecision
+from app.authorization.decision_record import DecisionRecord
+from app.authorization.log_store import SegmentedLogStore, encode_payload
+from app.authorization.log_index import DecisionIndex
+from app.authorization.log_statistics import StripedStatistics
+from app.authorization.log_pipeline import DecisionLogPipeline
+from app.authorization.metrics import Metrics
+
+# Most recent decisions kept in memory, with or without an on-disk store
+DEFAULT_BUFFER_SIZE = 10000
 
 
 class LogQueryFilters:
@@ -33,13 +46,17 @@ class DecisionStatistics:
         permit_rate: float,
         deny_rate: float,
         by_user_department: Dict[str, int],
-        by_action_type: Dict[str, int]
+        by_action_type: Dict[str, int],
+        by_matched_rule: Optional[Dict[str, int]] = None,
+        windows: Optional[Dict[str, Dict[str, Any]]] = None
     ):
         self.total_decisions = total_decisions
         self.permit_rate = permit_rate
         self.deny_rate = deny_rate
         self.by_user_department = by_user_department
         self.by_action_type = by_action_type
+        self.by_matched_rule = by_matched_rule or {}
+        self.windows = windows or {}
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -47,12 +64,19 @@ class DecisionStatistics:
             'permit_rate': self.permit_rate,
             'deny_rate': self.deny_rate,
             'by_user_department': self.by_user_department,
-            'by_action_type': self.by_action_type
+            'by_action_type': self.by_action_type,
+            'by_matched_rule': self.by_matched_rule,
+            'windows': self.windows
         }
 
 
 class DecisionLogger:
-    """Logger for authorization decisions (Singleton pattern)."""
+    """Logger for authorization decisions (Singleton pattern).
+
+    Safe to use from many threads. Only sequencing, the ring buffer and the
+    log index are guarded by one lock; records are encoded before taking it
+    and statistics are counted in stripes keyed by user ID.
+    """
     
     _instance = None
     _initialized = False
@@ -66,70 +90,256 @@ class DecisionLogger:
     def __init__(self):
         """Initialize logger only once."""
         if not DecisionLogger._initialized:
-            self.decisions: List[AuthorizationDecision] = []
+            self.decisions: Deque[DecisionRecord] = deque(maxlen=DEFAULT_BUFFER_SIZE)
+            self.store: Optional[SegmentedLogStore] = None
+            self.index = DecisionIndex()
+            self.statistics = StripedStatistics()
+            self.pipeline: Optional[DecisionLogPipeline] = None
+            self.metrics: Optional[Metrics] = None
+            self.next_seq = 0
+            self._lock = threading.RLock()
             DecisionLogger._initialized = True
 
+    def configure_storage(self, store: Optional[SegmentedLogStore], buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        Persist decisions to an on-disk store.
+
+        ``decisions`` is a ring buffer of the ``buffer_size`` most recent
+        decisions. With a store, every decision is also appended to it and
+        queries and exports read older decisions back from its segments;
+        passing None keeps only the ring buffer, so older decisions are
+        dropped.
+        """
+        if self.pipeline is not None:
+            self.pipeline.flush()
+        with self._lock:
+            if store is None:
+                if self.store is not None:
+                    self.store.close()
+                self.store = None
+                self.decisions = deque(self.decisions, maxlen=buffer_size)
+                self._reindex()
+                return
+
+            # Decisions only held in memory so far are carried over to the store
+            pending = list(self.decisions) if self.store is None else []
+            if self.store is not None and self.store is not store:
+                self.store.close()
+            for record in pending:
+                store.append(record.to_dict())
+
+            self.store = store
+            self.decisions = deque(pending[-buffer_size:], maxlen=buffer_size)
+            self.next_seq = store.next_seq
+            self._reindex()
+
+    def start_pipeline(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        backpressure: str = 'block',
+        sample_rate: float = 0.1
+    ) -> DecisionLogPipeline:
+        """
+        Log asynchronously: ``log()`` only enqueues and a writer thread
+        appends decisions in batches (see ``DecisionLogPipeline``).
+
+        Decisions become visible to queries, statistics and exports once
+        written; ``flush()`` waits for that.
+        """
+        self.stop_pipeline()
+        self.pipeline = DecisionLogPipeline(
+            self.write_batch,
+            flush=self._flush_store,
+            max_queue=max_queue,
+            batch_size=batch_size,
+            backpressure=backpressure,
+            sample_rate=sample_rate
+        )
+        self.pipeline.start()
+        return self.pipeline
+
+    def stop_pipeline(self, timeout: Optional[float] = None):
+        """Write every queued decision and return to synchronous logging."""
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            pipeline.stop(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for queued decisions to be written and flush the store."""
+        if self.pipeline is not None and not self.pipeline.flush(timeout):
+            return False
+        self._flush_store()
+        return True
+
+    def close(self):
+        """Drain the pipeline and close the store (shutdown hook)."""
+        self.stop_pipeline()
+        with self._lock:
+            if self.store is not None:
+                self.store.close()
+
+    def _flush_store(self):
+        with self._lock:
+            if self.store is not None:
+                self.store.flush()
+
+    def _reindex(self):
+        """Rebuild the indexes and statistics from every available decision."""
+        self.index.clear()
+        self.statistics = StripedStatistics()
+        seq = self._first_buffered_seq()
+        if self.store is not None:
+            for record in self.store.iter_records(end_seq=seq):
+                request = record.get('request')
+                user_attributes = request['user']['attributes'] if request else {}
+                rules = record.get('evaluated_rules')
+                self._index(
+                    record['seq'],
+                    record['decision'],
+                    datetime.fromisoformat(record['timestamp']),
+                    request['user']['id'] if request else None,
+                    request['action'] if request else None,
+                    user_attributes.get('department'),
+                    rules[-1] if rules else None
+                )
+        for record in self.decisions:
+            self._index_decision(seq, record)
+            seq += 1
+
+    def _index_decision(self, seq: int, record: DecisionRecord):
+        self._index(seq, *self._index_fields(record))
+
+    @staticmethod
+    def _index_fields(record: DecisionRecord) -> tuple:
+        """(decision, timestamp, user_id, action, department, rule) of a record."""
+        return (
+            record.decision,
+            record.timestamp,
+            record.get('user.id'),
+            record.get('action'),
+            record.get('user.attributes.department'),
+            record.matched_rule
+        )
+
+    def _index(
+        self,
+        seq: int,
+        decision: str,
+        timestamp: datetime,
+        user_id: Optional[str],
+        action: Optional[str],
+        department: Optional[str],
+        rule: Optional[str]
+    ):
+        self.index.add(seq, user_id, action, decision, timestamp)
+        self.statistics.add(user_id, decision, timestamp.timestamp(), department, action, rule)
+
     def log(self, decision: AuthorizationDecision):
-        """Log an authorization decision."""
-        self.decisions.append(decision)
+        """Log an authorization decision.
 
-    def query(self, filters: LogQueryFilters) -> List[AuthorizationDecision]:
-        """Query decision logs with filters."""
-        results = self.decisions
+        The decision is snapshotted into a ``DecisionRecord`` right away, so
+        later changes to its user or resource do not alter the log.
+        """
+        metrics = self.metrics
+        started = time.perf_counter() if metrics is not None else None
+        record = DecisionRecord.from_decision(decision)
+        pipeline = self.pipeline
+        if pipeline is not None:
+            pipeline.submit(record)
+        else:
+            self.write_batch([record])
+        if metrics is not None:
+            metrics.observe_log(time.perf_counter() - started)
 
-        if filters.user_id:
-            results = [d for d in results if d.request and d.request.user.id == filters.user_id]
+    def write_batch(self, records: Sequence[DecisionRecord]):
+        """Append records to the log, the store and the indexes."""
+        fields = [self._index_fields(record) for record in records]
+        store = self.store
+        payloads = [encode_payload(record.to_dict()) for record in records] if store is not None else None
 
-        if filters.action_type:
-            results = [d for d in results if d.request and d.request.action == filters.action_type]
+        with self._lock:
+            statistics = self.statistics
+            for position, record in enumerate(records):
+                if self.store is None:
+                    seq = self.next_seq
+                elif self.store is store:
+                    seq = self.store.append_payload(payloads[position])
+                else:
+                    # The store was replaced while encoding
+                    seq = self.store.append(record.to_dict())
+                self.next_seq = seq + 1
+                self.decisions.append(record)
+                decision, timestamp, user_id, action, _, _ = fields[position]
+                self.index.add(seq, user_id, action, decision, timestamp)
+            # Decisions that left the buffer (and the store's retained segments) are not indexed
+            oldest = self._first_buffered_seq()
+            if self.store is not None:
+                oldest = min(oldest, self.store.oldest_seq)
+            self.index.evict_before(oldest)
 
-        if filters.decision:
-            results = [d for d in results if d.decision == filters.decision]
+        for decision, timestamp, user_id, action, department, rule in fields:
+            statistics.add(user_id, decision, timestamp.timestamp(), department, action, rule)
 
-        if filters.start_time:
-            results = [d for d in results if d.timestamp >= filters.start_time]
+    def query(self, filters: LogQueryFilters) -> List[DecisionRecord]:
+        """Query decision logs with filters, using the secondary indexes."""
+        with self._lock:
+            seqs = self.index.lookup(
+                user_id=filters.user_id,
+                action=filters.action_type,
+                decision=filters.decision,
+                start_time=filters.start_time,
+                end_time=filters.end_time
+            )
+        if seqs is None:
+            return list(self.iter_decisions())
+        return self._fetch(seqs)
 
-        if filters.end_time:
-            results = [d for d in results if d.timestamp <= filters.end_time]
+    def _fetch(self, seqs: List[int]) -> List[DecisionRecord]:
+        """Load decisions by sorted sequence number from disk or the buffer."""
+        first_buffered, buffered = self._snapshot()
+        split = bisect.bisect_left(seqs, first_buffered)
 
+        results = []
+        # Without a store, decisions older than the buffer are gone
+        if self.store is not None and split:
+            for record in self.store.read_records(seqs[:split]):
+                results.append(DecisionRecord.from_dict(record))
+        for seq in seqs[split:]:
+            results.append(buffered[seq - first_buffered])
         return results
 
-    def get_statistics(self) -> DecisionStatistics:
-        """Get statistics about authorization decisions."""
-        total = len(self.decisions)
-        
-        if total == 0:
-            return DecisionStatistics(
-                total_decisions=0,
-                permit_rate=0.0,
-                deny_rate=0.0,
-                by_user_department={},
-                by_action_type={}
-            )
+    def iter_decisions(self) -> Iterator[DecisionRecord]:
+        """Iterate over every logged decision, oldest first."""
+        first_buffered, buffered = self._snapshot()
+        if self.store is not None:
+            for record in self.store.iter_records(end_seq=first_buffered):
+                yield DecisionRecord.from_dict(record)
+        yield from list(buffered)
 
-        permits = sum(1 for d in self.decisions if d.decision == 'permit')
-        denies = sum(1 for d in self.decisions if d.decision == 'deny')
+    def _first_buffered_seq(self) -> int:
+        """Sequence number of the oldest decision still in the ring buffer."""
+        return self.next_seq - len(self.decisions)
 
-        # Count by user department
-        by_department: Dict[str, int] = {}
-        for decision in self.decisions:
-            if decision.request:
-                dept = decision.request.user.attributes.department
-                by_department[dept] = by_department.get(dept, 0) + 1
+    def _snapshot(self) -> Tuple[int, Sequence[DecisionRecord]]:
+        """First buffered sequence number and an indexable view of the buffer."""
+        with self._lock:
+            buffered = list(self.decisions)
+            return self.next_seq - len(buffered), buffered
 
-        # Count by action type
-        by_action: Dict[str, int] = {}
-        for decision in self.decisions:
-            if decision.request:
-                action = decision.request.action
-                by_action[action] = by_action.get(action, 0) + 1
+    def get_statistics(self) -> DecisionStatistics:
+        """Get statistics about authorization decisions from the running counters."""
+        totals = self.statistics.totals()
+        total = totals['total']
 
         return DecisionStatistics(
             total_decisions=total,
-            permit_rate=permits / total,
-            deny_rate=denies / total,
-            by_user_department=by_department,
-            by_action_type=by_action
+            permit_rate=totals['permits'] / total if total else 0.0,
+            deny_rate=totals['denies'] / total if total else 0.0,
+            by_user_department=totals['by_department'],
+            by_action_type=totals['by_action'],
+            by_matched_rule=totals['by_rule'],
+            windows=totals['windows']
         )
 
     def export_logs(self, format: str = 'json') -> str:
@@ -137,9 +347,85 @@ class DecisionLogger:
         if format != 'json':
             raise ValueError(f"Unsupported format: {format}")
 
-        logs = [d.to_dict() for d in self.decisions]
+        logs = list(self._iter_records())
         return json.dumps(logs, indent=2)
 
+    def _iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over every logged decision as a dict, oldest first."""
+        for record in self._iter_range(0, self.next_seq):
+            del record['seq']
+            yield record
+
+    def export_records(
+        self,
+        cursor: int = 0,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[Iterator[Dict[str, Any]], int]:
+        """
+        Select decisions for a streaming export.
+
+        Returns an iterator over the records (each carrying its ``seq``) with
+        seq >= ``cursor`` and, if given, timestamp >= ``since``, at most
+        ``limit`` of them, together with the cursor that resumes after the
+        last one. Decisions logged while the export is read are left for
+        the next page.
+        """
+        if cursor < 0:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if limit is not None and limit <= 0:
+            raise ValueError(f"Invalid limit: {limit}")
+
+        with self._lock:
+            end_seq = self.next_seq
+            if since is None:
+                start = max(cursor, self._first_available_seq())
+                stop = end_seq if limit is None else min(end_seq, start + limit)
+                return self._iter_range(start, stop), max(stop, cursor)
+            seqs = self.index.lookup(start_time=since)
+
+        seqs = seqs[bisect.bisect_left(seqs, cursor):]
+        if limit is not None:
+            seqs = seqs[:limit]
+        next_cursor = seqs[-1] + 1 if seqs else max(cursor, end_seq)
+        return self._fetch_records(seqs), next_cursor
+
+    def _first_available_seq(self) -> int:
+        if self.store is not None:
+            segments = self.store.segments()
+            if segments:
+                return segments[0][0]
+        return self._first_buffered_seq()
+
+    def _iter_range(self, start_seq: int, end_seq: int) -> Iterator[Dict[str, Any]]:
+        """Records with start_seq <= seq < end_seq, from disk and then the buffer."""
+        first_buffered, buffered = self._snapshot()
+        if self.store is not None and start_seq < first_buffered:
+            yield from self.store.iter_records(start_seq, min(end_seq, first_buffered))
+        for seq in range(max(start_seq, first_buffered), end_seq):
+            record = buffered[seq - first_buffered].to_dict()
+            record['seq'] = seq
+            yield record
+
+    def _fetch_records(self, seqs: List[int]) -> Iterator[Dict[str, Any]]:
+        """Records by sorted sequence number from disk or the buffer."""
+        first_buffered, buffered = self._snapshot()
+        split = bisect.bisect_left(seqs, first_buffered)
+        if self.store is not None and split:
+            yield from self.store.read_records(seqs[:split])
+        for seq in seqs[split:]:
+            record = buffered[seq - first_buffered].to_dict()
+            record['seq'] = seq
+            yield record
+
     def clear(self):
         """Clear all logs (useful for testing)."""
-        self.decisions.clear()
+        if self.pipeline is not None:
+            self.pipeline.flush()
+        with self._lock:
+            self.decisions.clear()
+            if self.store is not None:
+                self.store.clear()
+            self.index.clear()
+            self.statistics = StripedStatistics()
+            self.next_seq = 0
@@ -0,0 +1,313 @@
+"""Compact, immutable snapshots of authorization decisions for the log."""
+
+import threading
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.authorization.models import AuthorizationDecision
+
+Path = Tuple[str, ...]
+
+# Leaves that are (nearly) unique per decision or entity and not worth interning
+_RAW_KEYS = {'timestamp', 'amount', 'ip_address', 'id', 'owner_id', 'name'}
+# Distinct values interned before further new values are kept raw
+MAX_INTERNED = 1 << 16
+
+
+class InternTable:
+    """Maps repeated low-cardinality values (roles, actions, locations, rule IDs...) to small int codes.
+
+    Codes are never reused, so the table grows with the number of distinct
+    values seen, not with the number of decisions; once it holds
+    ``max_size`` values, new ones are refused and stored raw by the caller.
+    """
+
+    def __init__(self, max_size: int = MAX_INTERNED):
+        self.max_size = max_size
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: Any) -> int:
+        """
+        The code of a value, assigning one if needed; raises TypeError if it
+        is unhashable and OverflowError if it is new and the table is full.
+        """
+        # Strings key themselves; other values are tagged with their type so
+        # 1, 1.0 and True keep separate codes
+        key = value if value.__class__ is str else (value.__class__, value)
+        code = self._codes.get(key)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(key)
+                if code is None:
+                    if len(self.values) >= self.max_size:
+                        raise OverflowError("Intern table is full")
+                    code = self._codes[key] = len(self.values)
+                    self.values.append(value)
+        return code
+
+    def intern(self, value: Any) -> Any:
+        """The canonical instance of a value, or the value itself if it cannot be interned."""
+        try:
+            return self.values[self.code(value)]
+        except (TypeError, OverflowError):
+            return value
+
+
+class RecordShape:
+    """Key layout of a request dict: its leaf paths, in order."""
+
+    __slots__ = ('paths', 'raw', 'positions')
+
+    def __init__(self, paths: Tuple[Path, ...], raw: Tuple[bool, ...]):
+        self.paths = paths
+        self.raw = raw
+        # Position of each leaf in the codes (interned) or raw values
+        positions = {}
+        coded = raw_count = 0
+        for path, is_raw in zip(paths, raw):
+            if is_raw:
+                positions[path] = (True, raw_count)
+                raw_count += 1
+            else:
+                positions[path] = (False, coded)
+                coded += 1
+        self.positions = positions
+
+
+_table = InternTable()
+_shapes: Dict[Tuple[Tuple[Path, ...], Tuple[bool, ...]], RecordShape] = {}
+# Flattened key signature -> shape with no unhashable leaves
+_signatures: Dict[Tuple[Any, ...], RecordShape] = {}
+
+
+def intern_table() -> InternTable:
+    """The process-wide table shared by every decision record."""
+    return _table
+
+
+class DecisionRecord:
+    """
+    A logged decision, snapshotted when it is logged.
+
+    Unlike ``AuthorizationDecision`` it holds no reference to the live
+    ``User``/``Article`` objects, so later changes to them do not rewrite
+    history and they can be garbage collected. Request attributes are
+    flattened into int32 codes into a shared ``InternTable`` (packed in one
+    bytes object) for low-cardinality values, plus raw values for the
+    per-decision and per-entity ones such as timestamps, amounts and IDs;
+    ``to_dict()`` rebuilds exactly what ``AuthorizationDecision.to_dict()``
+    returns.
+    """
+
+    __slots__ = ('decision', 'reason', 'evaluated_rules', 'timestamp', '_shape', '_codes', '_raw')
+
+    def __init__(
+        self,
+        decision: str,
+        reason: str,
+        evaluated_rules: Tuple[str, ...],
+        timestamp: datetime,
+        shape: Optional[RecordShape] = None,
+        codes: bytes = b'',
+        raw: Tuple[Any, ...] = ()
+    ):
+        self.decision = decision
+        self.reason = reason
+        self.evaluated_rules = evaluated_rules
+        self.timestamp = timestamp
+        self._shape = shape
+        self._codes = codes
+        self._raw = raw
+
+    @classmethod
+    def from_decision(cls, decision: AuthorizationDecision) -> 'DecisionRecord':
+        request = decision.request
+        request_dict = request.to_dict() if request else None
+        record = cls._build(
+            decision.decision,
+            decision.reason,
+            decision.evaluated_rules,
+            decision.timestamp,
+            request_dict
+        )
+        if request_dict is not None:
+            # Keep the (shared) environment datetime rather than its string
+            position = record._shape.positions.get(('environment', 'timestamp'))
+            if position is not None and isinstance(request.environment.timestamp, datetime):
+                raw = list(record._raw)
+                raw[position[1]] = request.environment.timestamp
+                record._raw = tuple(raw)
+        return record
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DecisionRecord':
+        return cls._build(
+            data['decision'],
+            data['reason'],
+            data.get('evaluated_rules', []),
+            datetime.fromisoformat(data['timestamp']),
+            data.get('request')
+        )
+
+    @classmethod
+    def _build(
+        cls,
+        decision: str,
+        reason: str,
+        evaluated_rules: List[str],
+        timestamp: datetime,
+        request: Optional[Dict[str, Any]]
+    ) -> 'DecisionRecord':
+        table = _table
+        shape = None
+        codes = b''
+        raw: Tuple[Any, ...] = ()
+        if request:
+            keys: List[Any] = []
+            values: List[Any] = []
+            _flatten(request, keys, values)
+            signature = tuple(keys)
+            shape = _signatures.get(signature)
+            if shape is None:
+                shape = _signatures[signature] = _shape(_paths(signature), None)
+            coded = array('i')
+            raw_values = []
+            try:
+                for value, is_raw in zip(values, shape.raw):
+                    if is_raw:
+                        raw_values.append(value)
+                    else:
+                        coded.append(table.code(value))
+            except (TypeError, OverflowError):
+                # Unhashable leaves, and new values once the table is full,
+                # are kept raw under a shape of their own
+                flags = []
+                for value, is_raw in zip(values, shape.raw):
+                    if not is_raw:
+                        try:
+                            table.code(value)
+                        except (TypeError, OverflowError):
+                            is_raw = True
+                    flags.append(is_raw)
+                shape = _shape(shape.paths, tuple(flags))
+                coded = array('i')
+                raw_values = []
+                for value, is_raw in zip(values, shape.raw):
+                    if is_raw:
+                        raw_values.append(value)
+                    else:
+                        coded.append(table.code(value))
+            codes = coded.tobytes()
+            raw = tuple(raw_values)
+        return cls(
+            table.intern(decision),
+            table.intern(reason),
+            table.intern(tuple(evaluated_rules)),
+            timestamp,
+            shape,
+            codes,
+            raw
+        )
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """A request attribute by dotted path, e.g. ``user.attributes.role``."""
+        if self._shape is None:
+            return default
+        position = self._shape.positions.get(tuple(path.split('.')))
+        if position is None:
+            return default
+        is_raw, index = position
+        if is_raw:
+            value = self._raw[index]
+            return value.isoformat() if isinstance(value, datetime) else value
+        codes = array('i')
+        codes.frombytes(self._codes[index * codes.itemsize:(index + 1) * codes.itemsize])
+        return _table.values[codes[0]]
+
+    @property
+    def matched_rule(self) -> Optional[str]:
+        return self.evaluated_rules[-1] if self.evaluated_rules else None
+
+    def request_dict(self) -> Optional[Dict[str, Any]]:
+        """The request as ``AuthorizationRequest.to_dict()`` returned it."""
+        if self._shape is None:
+            return None
+        values = _table.values
+        codes = array('i')
+        codes.frombytes(self._codes)
+        coded = iter(codes)
+        raw = iter(self._raw)
+        result: Dict[str, Any] = {}
+        for path, is_raw in zip(self._shape.paths, self._shape.raw):
+            if is_raw:
+                value = next(raw)
+                if isinstance(value, datetime):
+                    value = value.isoformat()
+            else:
+                value = values[next(coded)]
+            target = result
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            'decision': self.decision,
+            'reason': self.reason,
+            'evaluated_rules': list(self.evaluated_rules),
+            'timestamp': self.timestamp.isoformat()
+        }
+        request = self.request_dict()
+        if request is not None:
+            result['request'] = request
+        return result
+
+    def to_decision(self) -> AuthorizationDecision:
+        """Rebuild a full ``AuthorizationDecision`` (with fresh model objects)."""
+        return AuthorizationDecision.from_dict(self.to_dict())
+
+
+# Markers delimiting nested dicts in a flattened key signature
+_OPEN = ('__open__',)
+_CLOSE = ('__close__',)
+
+
+def _flatten(value: Dict[str, Any], keys: List[Any], values: List[Any]):
+    for key, item in value.items():
+        if item.__class__ is dict and item:
+            keys.append(key)
+            keys.append(_OPEN)
+            _flatten(item, keys, values)
+            keys.append(_CLOSE)
+        else:
+            keys.append(key)
+            values.append(item)
+
+
+def _paths(signature: Tuple[Any, ...]) -> Tuple[Path, ...]:
+    paths: List[Path] = []
+    prefix: List[str] = []
+    for position, key in enumerate(signature):
+        if key is _OPEN:
+            prefix.append(signature[position - 1])
+        elif key is _CLOSE:
+            prefix.pop()
+        elif position + 1 == len(signature) or signature[position + 1] is not _OPEN:
+            paths.append(tuple(prefix) + (key,))
+    return tuple(paths)
+
+
+def _shape(paths: Tuple[Path, ...], raw: Optional[Tuple[bool, ...]]) -> RecordShape:
+    if raw is None:
+        raw = tuple(path[-1] in _RAW_KEYS for path in paths)
+    key = (paths, raw)
+    shape = _shapes.get(key)
+    if shape is None:
+        shape = _shapes.setdefault(key, RecordShape(paths, raw))
+    return shape
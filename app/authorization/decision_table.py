@@ -0,0 +1,125 @@
+"""Decision table that indexes rules by action, role and level."""
+
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+from operator import attrgetter
+from app.authorization.models import AuthorizationRequest
+from app.authorization.rules import AuthorizationRule
+from app.authorization.conditions import compile_conditions
+
+
+INDEXED_ATTRIBUTES = ('action', 'user.attributes.role', 'user.attributes.level')
+
+# Upper bound on materialized table rows; keys beyond it are computed per request
+MAX_TABLE_SIZE = 4096
+
+
+def indexed_values(rule: AuthorizationRule, attribute: str) -> Optional[FrozenSet]:
+    """Values of ``attribute`` the rule can match, or None if unconstrained."""
+    if not rule.is_declarative:
+        return None
+
+    allowed = None
+    for condition in rule.conditions:
+        if condition.attribute != attribute or condition.compares_attributes:
+            continue
+        if condition.operator == 'eq':
+            values = frozenset([condition.value])
+        elif condition.operator == 'in':
+            values = condition.value
+        else:
+            continue
+        allowed = values if allowed is None else allowed & values
+    return allowed
+
+
+def _is_indexed(condition) -> bool:
+    return (
+        condition.attribute in INDEXED_ATTRIBUTES and
+        condition.operator in ('eq', 'in') and
+        not condition.compares_attributes
+    )
+
+
+def residual_check(rule: AuthorizationRule) -> Optional[Callable[[AuthorizationRequest], bool]]:
+    """Check for the part of a rule not already implied by its table row.
+
+    Returns None when the table row alone proves the rule matches. The
+    check may raise; callers treat an exception as no match.
+    """
+    if not rule.is_declarative:
+        return rule.condition
+
+    remaining = [c for c in rule.conditions if not _is_indexed(c)]
+    if not remaining:
+        return None
+
+    return compile_conditions(remaining)
+
+
+Candidate = Tuple[AuthorizationRule, Optional[Callable[[AuthorizationRequest], bool]]]
+
+
+class DecisionTable:
+    """Rules compiled into per-attribute bitmasks.
+
+    Each indexed attribute maps a value to the bitmask of rules that can
+    match it; rules that do not constrain the attribute sit in a wildcard
+    mask. The candidate rules for a request are the AND of those masks,
+    materialized lazily per (action, role, level) key, each paired with
+    the residual check still needed once the key is known.
+    """
+
+    def __init__(self, rules: List[AuthorizationRule]):
+        self.rules = tuple(rules)
+        self._get_key = attrgetter(*INDEXED_ATTRIBUTES)
+        self._postings: List[Dict[object, int]] = []
+        self._wildcards: List[int] = []
+        self._checks = [residual_check(rule) for rule in self.rules]
+        self._all = tuple((rule, rule.condition) for rule in self.rules)
+        self._table: Dict[Tuple, Tuple[Candidate, ...]] = {}
+
+        for attribute in INDEXED_ATTRIBUTES:
+            postings: Dict[object, int] = {}
+            wildcard = 0
+            for position, rule in enumerate(self.rules):
+                bit = 1 << position
+                values = indexed_values(rule, attribute)
+                if values is None:
+                    wildcard |= bit
+                    continue
+                for value in values:
+                    postings[value] = postings.get(value, 0) | bit
+            self._postings.append(postings)
+            self._wildcards.append(wildcard)
+
+    def candidates(self, request: AuthorizationRequest) -> Tuple[Candidate, ...]:
+        """(rule, check) pairs that could match the request, in priority order.
+
+        ``check`` is None when the rule is known to match; otherwise it
+        may raise, which means the rule does not apply.
+        """
+        try:
+            key = self._get_key(request)
+            rules = self._table.get(key)
+        except (AttributeError, TypeError):
+            # Malformed or unhashable attributes: let every rule decide
+            return self._all
+
+        if rules is None:
+            rules = self._lookup(key)
+            if len(self._table) < MAX_TABLE_SIZE:
+                self._table[key] = rules
+        return rules
+
+    def _lookup(self, key: Tuple) -> Tuple[Candidate, ...]:
+        mask = (1 << len(self.rules)) - 1
+        for value, postings, wildcard in zip(key, self._postings, self._wildcards):
+            mask &= postings.get(value, 0) | wildcard
+        return tuple(
+            (rule, self._checks[position])
+            for position, rule in enumerate(self.rules)
+            if mask >> position & 1
+        )
+
+    def __len__(self) -> int:
+        return len(self._table)
@@ -1,53 +1,329 @@
 """Authorization engine for ABAC evaluation."""
 
-from typing import List
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
 from app.authorization.models import AuthorizationRequest, AuthorizationDecision
 from app.authorization.rules import AuthorizationRule
+from app.authorization.decision_table import DecisionTable
+from app.authorization.decision_cache import DecisionCache, CacheKeyBuilder
+from app.authorization.residual import Residual, partial_evaluate
+from app.authorization.metrics import Metrics
+
+
+class PolicySnapshot:
+    """
+    An immutable, compiled rule set.
+
+    The rules are sorted by priority and compiled into a decision table and
+    cache key builder when the snapshot is built, so swapping one into an
+    engine costs nothing on the request path. With ``ordered`` the rules
+    are kept in the order given, which the caller guarantees decides like
+    the priority order (see ``app.authorization.adaptive``).
+    """
+
+    __slots__ = (
+        'rules', 'version', 'source', 'loaded_at', 'decision_table', 'cache_keys', '_vectorized', '_analysis'
+    )
+
+    def __init__(
+        self,
+        rules: Sequence[AuthorizationRule],
+        version: Optional[str] = None,
+        source: Optional[str] = None,
+        ordered: bool = False
+    ):
+        # Sort rules by priority (higher priority first)
+        if not ordered:
+            rules = sorted(rules, key=lambda r: r.priority, reverse=True)
+        self.rules: Tuple[AuthorizationRule, ...] = tuple(rules)
+        self.version = version
+        self.source = source
+        self.loaded_at = datetime.now()
+        self.decision_table = DecisionTable(self.rules)
+        self.cache_keys = CacheKeyBuilder(self.rules)
+        self._vectorized = None
+        self._analysis = None
+
+    def get_vectorized_evaluator(self):
+        """The NumPy evaluator for these rules (requires numpy), built on first use."""
+        if self._vectorized is None:
+            from app.authorization.vectorized import VectorizedEvaluator
+            self._vectorized = VectorizedEvaluator(self.rules)
+        return self._vectorized
+
+    def get_analysis(self):
+        """The static analysis of these rules (requires numpy), computed on first use."""
+        if self._analysis is None:
+            from app.authorization.analyzer import analyze
+            self._analysis = analyze(self.rules)
+        return self._analysis
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'source': self.source,
+            'loaded_at': self.loaded_at.isoformat(),
+            'rules': [rule.id for rule in self.rules]
+        }
 
 
 class AuthorizationEngine:
-    """ABAC authorization engine."""
+    """ABAC authorization engine.
+
+    The rules live in a ``PolicySnapshot`` that is replaced as a whole by a
+    single reference assignment. Each evaluation reads the snapshot once,
+    so in-flight requests finish on the rules they started with.
+    """
 
     def __init__(self):
-        self.rules: List[AuthorizationRule] = []
+        self._policy = PolicySnapshot(())
+        self.cache: Optional[DecisionCache] = None
+        self.metrics: Optional[Metrics] = None
+        self.adaptive = None
+        self._swap_lock = threading.Lock()
+
+    @property
+    def policy(self) -> PolicySnapshot:
+        """The rule set currently in force."""
+        return self._policy
+
+    @property
+    def rules(self) -> Tuple[AuthorizationRule, ...]:
+        return self._policy.rules
+
+    def enable_cache(self, max_size: int = 10000, ttl: float = 300.0) -> DecisionCache:
+        """Put a bounded TTL decision cache in front of evaluation."""
+        self.cache = DecisionCache(max_size=max_size, ttl=ttl)
+        return self.cache
+
+    def enable_metrics(self, metrics: Optional[Metrics] = None) -> Metrics:
+        """Record per-rule and per-request counters and latencies."""
+        self.metrics = metrics or Metrics()
+        return self.metrics
+
+    def enable_adaptive_ordering(self, **options):
+        """
+        Reorder rules within runs of equal effect by observed cost and match
+        rate, without changing any decision (see ``AdaptiveOrdering``).
+        """
+        # Imported here: the module builds on this one
+        from app.authorization.adaptive import AdaptiveOrdering
+        self.adaptive = AdaptiveOrdering(self, **options)
+        return self.adaptive
+
+    def swap_policy(
+        self,
+        policy: PolicySnapshot,
+        expected: Optional[PolicySnapshot] = None,
+        clear_cache: bool = True
+    ) -> Optional[PolicySnapshot]:
+        """Put a compiled rule set in force; returns the one it replaced.
+
+        With ``expected`` nothing happens (and None is returned) unless that
+        snapshot is still in force. ``clear_cache`` may only be turned off
+        for a snapshot that makes the same decisions.
+        """
+        with self._swap_lock:
+            if expected is not None and self._policy is not expected:
+                return None
+            previous, self._policy = self._policy, policy
+        if clear_cache and self.cache is not None:
+            self.cache.clear()
+        return previous
 
     def add_rule(self, rule: AuthorizationRule):
         """Add an authorization rule."""
-        self.rules.append(rule)
-        # Sort rules by priority (higher priority first)
-        self.rules.sort(key=lambda r: r.priority, reverse=True)
+        # Retry if another swap lands while the new snapshot is compiled
+        while True:
+            policy = self._policy
+            snapshot = PolicySnapshot(policy.rules + (rule,), policy.version, policy.source)
+            if self.swap_policy(snapshot, expected=policy) is not None:
+                return
+
+    def set_rules(self, rules: Sequence[AuthorizationRule], version: Optional[str] = None):
+        """Replace every rule at once."""
+        self.swap_policy(PolicySnapshot(rules, version))
 
     def get_rules(self) -> List[AuthorizationRule]:
         """Get all authorization rules."""
-        return self.rules.copy()
+        return list(self._policy.rules)
+
+    def get_decision_table(self) -> DecisionTable:
+        """Get the decision table compiled from the current rules."""
+        return self._policy.decision_table
 
     def evaluate(self, request: AuthorizationRequest) -> AuthorizationDecision:
         """Evaluate authorization request against all rules."""
+        policy = self._policy
+        metrics = self.metrics
+        started = time.perf_counter() if metrics is not None else None
+        key = policy.cache_keys.build(request) if self.cache is not None else None
+        decision, reason, evaluated_rules = self._decide(policy, request, key)
+        if metrics is not None:
+            metrics.observe_evaluation(time.perf_counter() - started)
+
+        return AuthorizationDecision(
+            decision=decision,
+            reason=reason,
+            evaluated_rules=list(evaluated_rules),
+            timestamp=datetime.now(),
+            request=request
+        )
+
+    def evaluate_batch(
+        self,
+        requests: List[AuthorizationRequest],
+        vectorized: bool = False
+    ) -> List[AuthorizationDecision]:
+        """Evaluate many requests at once.
+
+        Rows whose cache keys are equal share a single evaluation, whether
+        or not the decision cache is enabled. With ``vectorized`` the rules
+        are evaluated as NumPy masks over the whole batch instead.
+        """
+        policy = self._policy
+        if vectorized:
+            return policy.get_vectorized_evaluator().evaluate(requests)
+
+        cache_keys = policy.cache_keys
+        metrics = self.metrics
+        timestamp = datetime.now()
+        outcomes = {}
+        decisions = []
+
+        for request in requests:
+            started = time.perf_counter() if metrics is not None else None
+            key = cache_keys.build(request)
+            outcome = outcomes.get(key) if key is not None else None
+            if outcome is None:
+                outcome = self._decide(policy, request, key)
+                if key is not None:
+                    outcomes[key] = outcome
+            if metrics is not None:
+                metrics.observe_evaluation(time.perf_counter() - started)
+
+            decision, reason, evaluated_rules = outcome
+            decisions.append(AuthorizationDecision(
+                decision=decision,
+                reason=reason,
+                evaluated_rules=list(evaluated_rules),
+                timestamp=timestamp,
+                request=request
+            ))
+
+        return decisions
+
+    def partial_evaluate(self, request: AuthorizationRequest, unknown: str = 'resource') -> Residual:
+        """
+        Specialize the rules to a request with its ``unknown`` side (the
+        resource or the user) set to None.
+
+        Returns a residual predicate over that side which holds exactly for
+        the entities ``evaluate`` would permit; it can be passed to
+        ``DataStore.filter_accounts``/``filter_users``.
+        """
+        return partial_evaluate(self._policy.rules, request, unknown)
+
+    def get_vectorized_evaluator(self):
+        """Get the NumPy evaluator for the current rules (requires numpy)."""
+        return self._policy.get_vectorized_evaluator()
+
+    def _decide(
+        self,
+        policy: PolicySnapshot,
+        request: AuthorizationRequest,
+        key: Optional[Tuple]
+    ) -> Tuple[str, str, List[str]]:
+        """Decide a request through the cache, if enabled."""
+        cache = self.cache
+        if cache is None:
+            return self._evaluate_rules(policy, request)
+        if key is None:
+            cache.record_bypass()
+            return self._evaluate_rules(policy, request)
+
+        # A swap replaces the policy and then clears the cache, bumping its
+        # generation; only store decisions of a policy still current then
+        generation = cache.generation
+        current = policy is self._policy
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        decision, reason, evaluated_rules = self._evaluate_rules(policy, request)
+        if current:
+            cache.put(key, (decision, reason, tuple(evaluated_rules)), generation)
+        return decision, reason, evaluated_rules
+
+    def _evaluate_rules(self, policy: PolicySnapshot, request: AuthorizationRequest) -> Tuple[str, str, List[str]]:
+        """Evaluate candidate rules, returning (decision, reason, evaluated_rules)."""
         evaluated_rules = []
         
         # Default deny
         decision = 'deny'
         reason = 'No applicable rules found'
         
-        # Evaluate rules in priority order
-        for rule in self.rules:
-            if rule.evaluate(request):
-                evaluated_rules.append(rule.name)
-                
-                if rule.effect == 'permit':
-                    decision = 'permit'
-                    reason = f'Permitted by rule: {rule.name}'
-                    break  # First permit wins
-                elif rule.effect == 'deny':
-                    decision = 'deny'
-                    reason = f'Denied by rule: {rule.name}'
-                    break  # First deny wins
+        # Evaluate candidate rules in priority order
+        recorders = self._recorders()
+        if recorders is None:
+            matching = self._matching_rules(policy, request)
+        else:
+            matching = self._matching_rules_instrumented(policy, request, recorders)
+        for rule in matching:
+            evaluated_rules.append(rule.name)
+            
+            if rule.effect == 'permit':
+                decision = 'permit'
+                reason = f'Permitted by rule: {rule.name}'
+                break  # First permit wins
+            elif rule.effect == 'deny':
+                decision = 'deny'
+                reason = f'Denied by rule: {rule.name}'
+                break  # First deny wins
         
-        return AuthorizationDecision(
-            decision=decision,
-            reason=reason,
-            evaluated_rules=evaluated_rules,
-            timestamp=datetime.now(),
-            request=request
-        )
+        return decision, reason, evaluated_rules
+
+    def _recorders(self) -> Optional[Tuple[Metrics, ...]]:
+        """Metrics to record this evaluation's rule checks in, or None for the fast path."""
+        metrics = self.metrics
+        adaptive = self.adaptive
+        if adaptive is not None and adaptive.next_evaluation():
+            return (adaptive.metrics,) if metrics is None else (metrics, adaptive.metrics)
+        return (metrics,) if metrics is not None else None
+
+    @staticmethod
+    def _matching_rules(policy: PolicySnapshot, request: AuthorizationRequest) -> Iterator[AuthorizationRule]:
+        """Candidate rules whose conditions hold, in priority order."""
+        for rule, check in policy.decision_table.candidates(request):
+            if check is not None:
+                try:
+                    if not check(request):
+                        continue
+                except Exception:
+                    # If evaluation fails, rule doesn't apply
+                    continue
+            yield rule
+
+    @staticmethod
+    def _matching_rules_instrumented(
+        policy: PolicySnapshot,
+        request: AuthorizationRequest,
+        recorders: Tuple[Metrics, ...]
+    ) -> Iterator[AuthorizationRule]:
+        """``_matching_rules``, recording every check in each of ``recorders``."""
+        clock = time.perf_counter
+        for rule, check in policy.decision_table.candidates(request):
+            error = None
+            started = clock()
+            try:
+                matched = check is None or bool(check(request))
+            except Exception as e:
+                matched = False
+                error = e
+            elapsed = clock() - started
+            for metrics in recorders:
+                metrics.observe_rule(rule.id, elapsed, matched, error)
+            if matched:
+                yield rule
@@ -0,0 +1,344 @@
+"""
+Log aggregator sidecar: one decision log fed by every worker process.
+
+Workers run a ``RemoteDecisionLogger`` that ships batches of decisions to
+a ``LogAggregator`` over a local socket and asks it for queries,
+statistics and exports, so all workers share a single log. Messages are
+pickled ``multiprocessing.connection`` messages, authenticated with a
+shared key; only bind the aggregator to local addresses.
+
+    DECISION_LOG_AGGREGATOR_KEY=secret python -m app.authorization.log_aggregator \\
+        --address /tmp/abac-log.sock --log-dir ./decision-logs
+"""
+
+import argparse
+import os
+import stat
+import threading
+import time
+from datetime import datetime
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from app.authorization.models import AuthorizationDecision
+from app.authorization.decision_logger import DecisionLogger, DecisionStatistics, LogQueryFilters
+from app.authorization.decision_record import DecisionRecord
+from app.authorization.log_pipeline import DecisionLogPipeline
+from app.authorization.log_store import SegmentedLogStore
+from app.authorization.metrics import Metrics
+
+Address = Union[str, Tuple[str, int]]
+
+# Records per 'export' message; larger exports are fetched page by page
+EXPORT_PAGE_SIZE = 10000
+
+
+def parse_address(address: str) -> Address:
+    """``host:port`` is a TCP address; anything else is a Unix socket path."""
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+class LogAggregator:
+    """Serves one ``DecisionLogger`` to any number of worker connections."""
+
+    def __init__(self, address: str, authkey: bytes, logger: DecisionLogger):
+        parsed = parse_address(address)
+        if isinstance(parsed, str) and os.path.exists(parsed) and stat.S_ISSOCK(os.stat(parsed).st_mode):
+            # Left over from a previous run
+            os.unlink(parsed)
+        self.logger = logger
+        self.listener = Listener(parsed, authkey=authkey)
+        self.address = self.listener.address
+        self._closed = False
+
+    def serve_forever(self):
+        """Accept connections until ``close()``, serving each on its own thread."""
+        while not self._closed:
+            try:
+                connection = self.listener.accept()
+            except Exception:
+                # A failed handshake only affects that client
+                continue
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        self.listener.close()
+        self.logger.flush()
+
+    def _serve(self, connection):
+        with connection:
+            while True:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ('ok', self._handle(*message))
+                except Exception as e:
+                    reply = ('error', f"{type(e).__name__}: {e}")
+                connection.send(reply)
+
+    def _handle(self, operation: str, *args) -> Any:
+        if operation == 'write':
+            records = args[0]
+            self.logger.write_batch([DecisionRecord.from_dict(record) for record in records])
+            return len(records)
+        if operation == 'flush':
+            return self.logger.flush()
+        if operation == 'statistics':
+            return self.logger.get_statistics().to_dict()
+        if operation == 'query':
+            return [record.to_dict() for record in self.logger.query(_filters_from_dict(args[0]))]
+        if operation == 'export':
+            records, next_cursor = self._export(*args)
+            return list(records), next_cursor
+        if operation == 'export_cursor':
+            # Where an export ends, without reading its records
+            return self._export(*args)[1]
+        raise ValueError(f"Unknown operation: {operation}")
+
+    def _export(self, cursor: int, since: Optional[str], limit: Optional[int]) -> Tuple[Iterator[Dict[str, Any]], int]:
+        return self.logger.export_records(
+            cursor=cursor,
+            since=datetime.fromisoformat(since) if since else None,
+            limit=limit
+        )
+
+
+class AggregatorClient:
+    """A connection to a ``LogAggregator``, shared by the threads of one process."""
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def call(self, operation: str, *args) -> Any:
+        """
+        Run one operation on the aggregator.
+
+        A broken connection is reopened and the call retried once if the
+        request had not been sent yet; errors raised by the aggregator
+        come back as ValueError.
+        """
+        with self._lock:
+            for attempt in range(2):
+                sent = False
+                try:
+                    if self._connection is None:
+                        self._connection = Client(parse_address(self.address), authkey=self.authkey)
+                    self._connection.send((operation,) + args)
+                    sent = True
+                    status, result = self._connection.recv()
+                    break
+                except (EOFError, OSError):
+                    self._close()
+                    if sent or attempt:
+                        raise
+        if status == 'error':
+            raise ValueError(result)
+        return result
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except OSError:
+                pass
+            self._connection = None
+
+
+class RemoteDecisionLogger:
+    """
+    Stands in for ``DecisionLogger`` in a worker process.
+
+    Decisions are snapshotted locally and written to the aggregator, in
+    batches when the pipeline is running; queries, statistics and exports
+    are answered by the aggregator, so every worker sees the same log.
+    """
+
+    def __init__(self, client: AggregatorClient, page_size: int = EXPORT_PAGE_SIZE):
+        if page_size <= 0:
+            raise ValueError(f"Invalid page_size: {page_size}")
+        self.client = client
+        self.page_size = page_size
+        self.store = None
+        self.pipeline: Optional[DecisionLogPipeline] = None
+        self.metrics: Optional[Metrics] = None
+
+    def start_pipeline(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        backpressure: str = 'block',
+        sample_rate: float = 0.1
+    ) -> DecisionLogPipeline:
+        """Ship decisions from a background thread (see ``DecisionLogPipeline``)."""
+        self.stop_pipeline()
+        self.pipeline = DecisionLogPipeline(
+            self.write_batch,
+            max_queue=max_queue,
+            batch_size=batch_size,
+            backpressure=backpressure,
+            sample_rate=sample_rate
+        )
+        self.pipeline.start()
+        return self.pipeline
+
+    def stop_pipeline(self, timeout: Optional[float] = None):
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            pipeline.stop(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for queued decisions to reach the aggregator and be flushed."""
+        if self.pipeline is not None and not self.pipeline.flush(timeout):
+            return False
+        return self.client.call('flush')
+
+    def close(self):
+        self.stop_pipeline()
+        self.client.close()
+
+    def log(self, decision: AuthorizationDecision):
+        metrics = self.metrics
+        started = time.perf_counter() if metrics is not None else None
+        record = DecisionRecord.from_decision(decision)
+        pipeline = self.pipeline
+        if pipeline is not None:
+            pipeline.submit(record)
+        else:
+            self.write_batch([record])
+        if metrics is not None:
+            metrics.observe_log(time.perf_counter() - started)
+
+    def write_batch(self, records: Sequence[DecisionRecord]):
+        self.client.call('write', [record.to_dict() for record in records])
+
+    def query(self, filters: LogQueryFilters) -> List[DecisionRecord]:
+        return [DecisionRecord.from_dict(record) for record in self.client.call('query', _filters_to_dict(filters))]
+
+    def iter_decisions(self) -> Iterator[DecisionRecord]:
+        """Every logged decision, oldest first, read from the aggregator one page at a time."""
+        records, _ = self.export_records()
+        for record in records:
+            yield DecisionRecord.from_dict(record)
+
+    def get_statistics(self) -> DecisionStatistics:
+        stats = self.client.call('statistics')
+        return DecisionStatistics(
+            total_decisions=stats['total_decisions'],
+            permit_rate=stats['permit_rate'],
+            deny_rate=stats['deny_rate'],
+            by_user_department=stats['by_user_department'],
+            by_action_type=stats['by_action_type'],
+            by_matched_rule=stats['by_matched_rule'],
+            windows=stats['windows']
+        )
+
+    def export_records(
+        self,
+        cursor: int = 0,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[Iterator[Dict[str, Any]], int]:
+        """
+        Like ``DecisionLogger.export_records``.
+
+        Only the end cursor is fetched up front; the records are read lazily
+        with ``export`` calls of at most ``page_size`` records, so a large
+        export never travels as one message.
+        """
+        since_text = since.isoformat() if since else None
+        next_cursor = self.client.call('export_cursor', cursor, since_text, limit)
+        return self._export_pages(cursor, since_text, limit, next_cursor), next_cursor
+
+    def _export_pages(
+        self,
+        cursor: int,
+        since: Optional[str],
+        limit: Optional[int],
+        end: int
+    ) -> Iterator[Dict[str, Any]]:
+        """Records from ``cursor`` up to (not including) seq ``end``, one page at a time."""
+        remaining = limit
+        while cursor < end and (remaining is None or remaining > 0):
+            page_size = self.page_size if remaining is None else min(self.page_size, remaining)
+            records, cursor = self.client.call('export', cursor, since, page_size)
+            if not records:
+                return
+            for record in records:
+                # Decisions logged since the export started belong to the next one
+                if record['seq'] >= end:
+                    return
+                yield record
+            if remaining is not None:
+                remaining -= len(records)
+
+
+def _filters_to_dict(filters: LogQueryFilters) -> Dict[str, Any]:
+    return {
+        'user_id': filters.user_id,
+        'action_type': filters.action_type,
+        'decision': filters.decision,
+        'start_time': filters.start_time.isoformat() if filters.start_time else None,
+        'end_time': filters.end_time.isoformat() if filters.end_time else None
+    }
+
+
+def _filters_from_dict(data: Dict[str, Any]) -> LogQueryFilters:
+    return LogQueryFilters(
+        user_id=data.get('user_id'),
+        action_type=data.get('action_type'),
+        decision=data.get('decision'),
+        start_time=datetime.fromisoformat(data['start_time']) if data.get('start_time') else None,
+        end_time=datetime.fromisoformat(data['end_time']) if data.get('end_time') else None
+    )
+
+
+def create_aggregator(
+    address: str,
+    authkey: bytes,
+    log_dir: Optional[str] = None,
+    buffer_size: int = 10000,
+    max_segments: Optional[int] = None
+) -> LogAggregator:
+    """An aggregator over this process's ``DecisionLogger``, persisted to ``log_dir`` if given."""
+    logger = DecisionLogger()
+    if log_dir:
+        logger.configure_storage(SegmentedLogStore(log_dir, max_segments=max_segments), buffer_size=buffer_size)
+    else:
+        logger.configure_storage(None, buffer_size=buffer_size)
+    return LogAggregator(address, authkey, logger)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the decision log aggregator sidecar.')
+    parser.add_argument('--address', default=os.environ.get('DECISION_LOG_AGGREGATOR', '/tmp/abac-log.sock'))
+    parser.add_argument('--log-dir', default=os.environ.get('DECISION_LOG_DIR'))
+    parser.add_argument('--buffer', type=int, default=int(os.environ.get('DECISION_LOG_BUFFER', 10000)))
+    parser.add_argument('--max-segments', type=int, default=os.environ.get('DECISION_LOG_MAX_SEGMENTS') or None)
+    args = parser.parse_args()
+
+    key = os.environ.get('DECISION_LOG_AGGREGATOR_KEY')
+    if not key:
+        parser.error('DECISION_LOG_AGGREGATOR_KEY must be set')
+    aggregator = create_aggregator(args.address, key.encode('utf-8'), args.log_dir, args.buffer, args.max_segments)
+    try:
+        aggregator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        aggregator.close()
+
+
+if __name__ == '__main__':
+    main()
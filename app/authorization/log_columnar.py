@@ -0,0 +1,269 @@
+"""Self-contained columnar binary format for decision log exports.
+
+A file is the magic bytes followed by blocks of up to ``block_rows``
+decisions and an end marker::
+
+    MAGIC
+    b'B' rows:u32 columns:u16
+        (name_length:u16 name kind:u8 data) * columns
+    ...
+    b'E'
+
+Every leaf of a decision's request is flattened into a column named after
+its attribute path (``user.attributes.role``, ``environment.location``,
+...), next to ``seq``, ``timestamp``, ``decision``, ``reason``,
+``matched_rule`` and ``evaluated_rules``. Sequence numbers are int64 and
+timestamps float64 seconds since the epoch; every other column is
+dictionary-encoded as int32 codes. A column's dictionary is shared by the
+whole file: each block carries only the values first seen in it, as a JSON
+list, so the format can be written as a stream. Once a column appears it is
+written in every later block; a column first seen after row 0 gets None as
+its first dictionary entry for the rows before it. All integers are
+little-endian.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List
+
+MAGIC = b'ABACCOL1'
+BLOCK_ROWS = 65536
+
+KIND_DICTIONARY = 0
+KIND_FLOAT64 = 1
+KIND_INT64 = 2
+
+_BLOCK = b'B'
+_END = b'E'
+_BLOCK_HEADER = struct.Struct('<IH')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_ARRAY_TYPES = {KIND_DICTIONARY: 'i', KIND_FLOAT64: 'd', KIND_INT64: 'q'}
+_SWAP = sys.byteorder != 'little'
+
+
+def flatten_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """One exported decision as a flat {column: value} row."""
+    rules = record.get('evaluated_rules') or []
+    row = {
+        'seq': record.get('seq', 0),
+        'timestamp': _epoch(record['timestamp']),
+        'decision': record['decision'],
+        'reason': record.get('reason'),
+        'matched_rule': rules[-1] if rules else None,
+        'evaluated_rules': rules
+    }
+    request = record.get('request')
+    if request:
+        _flatten(request, '', row)
+    return row
+
+
+def _flatten(value: Dict[str, Any], prefix: str, row: Dict[str, Any]):
+    for key, item in value.items():
+        if isinstance(item, dict):
+            _flatten(item, f'{prefix}{key}.', row)
+        elif key == 'timestamp' and isinstance(item, str):
+            row[prefix + key] = _epoch(item)
+        else:
+            row[prefix + key] = item
+
+
+def _epoch(timestamp: str) -> float:
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def _column_kind(name: str) -> int:
+    if name == 'seq':
+        return KIND_INT64
+    if name == 'timestamp' or name.endswith('.timestamp'):
+        return KIND_FLOAT64
+    return KIND_DICTIONARY
+
+
+def _dictionary_key(value: Any) -> Any:
+    # Strings key themselves; other values are tagged with their type so 1
+    # and True stay apart, and lists (evaluated_rules) are hashed as tuples
+    if value.__class__ is str:
+        return value
+    if isinstance(value, list):
+        return (list, tuple(value))
+    return (type(value), value)
+
+
+class ColumnarEncoder:
+    """Encodes flattened decisions into blocks of the columnar format."""
+
+    def __init__(self, block_rows: int = BLOCK_ROWS):
+        if block_rows <= 0:
+            raise ValueError(f"Invalid block_rows: {block_rows}")
+        self.block_rows = block_rows
+        self._dictionaries: Dict[str, Dict[Any, int]] = {}
+        self._columns: Dict[str, None] = {}
+        self._rows_written = 0
+
+    def encode(self, records: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+        """Yield the encoded file, one block at a time."""
+        yield MAGIC
+        rows: List[Dict[str, Any]] = []
+        for record in records:
+            rows.append(flatten_record(record))
+            if len(rows) >= self.block_rows:
+                yield self._encode_block(rows)
+                rows = []
+        if rows:
+            yield self._encode_block(rows)
+        yield _END
+
+    def _encode_block(self, rows: List[Dict[str, Any]]) -> bytes:
+        for row in rows:
+            for name in row:
+                if name not in self._columns:
+                    self._columns[name] = None
+        names = list(self._columns)
+        parts = [_BLOCK, _BLOCK_HEADER.pack(len(rows), len(names))]
+        for name in names:
+            encoded_name = name.encode('utf-8')
+            kind = _column_kind(name)
+            parts.append(_U16.pack(len(encoded_name)) + encoded_name + bytes((kind,)))
+            if kind == KIND_DICTIONARY:
+                parts.extend(self._encode_dictionary_column(name, rows))
+            else:
+                default = 0 if kind == KIND_INT64 else float('nan')
+                values = array(_ARRAY_TYPES[kind], [
+                    default if row.get(name) is None else row[name] for row in rows
+                ])
+                parts.append(_to_little_endian(values))
+        self._rows_written += len(rows)
+        return b''.join(parts)
+
+    def _encode_dictionary_column(self, name: str, rows: List[Dict[str, Any]]) -> List[bytes]:
+        new_values = []
+        dictionary = self._dictionaries.get(name)
+        if dictionary is None:
+            dictionary = self._dictionaries[name] = {}
+            if self._rows_written:
+                dictionary[_dictionary_key(None)] = 0
+                new_values.append(None)
+        codes = array('i')
+        append = codes.append
+        for row in rows:
+            value = row.get(name)
+            key = value if value.__class__ is str else _dictionary_key(value)
+            code = dictionary.get(key)
+            if code is None:
+                code = dictionary[key] = len(dictionary)
+                new_values.append(value)
+            append(code)
+        entries = json.dumps(new_values, separators=(',', ':')).encode('utf-8')
+        return [_U32.pack(len(entries)), entries, _to_little_endian(codes)]
+
+
+def _to_little_endian(values: array) -> bytes:
+    if _SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_columnar(records: Iterable[Dict[str, Any]], block_rows: int = BLOCK_ROWS) -> Iterator[bytes]:
+    """Encode exported decision records in the columnar format."""
+    return ColumnarEncoder(block_rows).encode(records)
+
+
+class Column:
+    """A decoded column.
+
+    Dictionary columns hold int32 ``codes`` into ``dictionary``; numeric
+    columns hold their ``values`` directly (missing timestamps are NaN).
+    """
+
+    def __init__(self, name: str, kind: int):
+        self.name = name
+        self.kind = kind
+        self.dictionary: List[Any] = []
+        self.data = array(_ARRAY_TYPES[kind])
+
+    @property
+    def codes(self) -> array:
+        return self.data
+
+    @property
+    def values(self) -> List[Any]:
+        """Decoded values, one per row."""
+        if self.kind != KIND_DICTIONARY:
+            return self.data.tolist()
+        dictionary = self.dictionary
+        return [dictionary[code] for code in self.data]
+
+    def _pad(self, rows: int):
+        # Rows written before the column first appeared (code 0 is None)
+        filler = float('nan') if self.kind == KIND_FLOAT64 else 0
+        self.data.extend(array(self.data.typecode, [filler]) * rows)
+
+
+class ColumnarTable:
+    """Decision log loaded from the columnar format."""
+
+    def __init__(self, num_rows: int, columns: Dict[str, Column]):
+        self.num_rows = num_rows
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def column(self, name: str) -> Column:
+        return self.columns[name]
+
+
+def read_columnar(source: BinaryIO) -> ColumnarTable:
+    """Load a columnar export from a binary file object."""
+    if source.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a columnar decision log")
+
+    columns: Dict[str, Column] = {}
+    num_rows = 0
+    while True:
+        marker = source.read(1)
+        if marker == _END:
+            break
+        if marker != _BLOCK:
+            raise ValueError("Truncated or corrupt columnar decision log")
+        rows, count = _BLOCK_HEADER.unpack(_read(source, _BLOCK_HEADER.size))
+        seen = set()
+        for _ in range(count):
+            (length,) = _U16.unpack(_read(source, _U16.size))
+            name = _read(source, length).decode('utf-8')
+            kind = _read(source, 1)[0]
+            if kind not in _ARRAY_TYPES:
+                raise ValueError(f"Unknown column kind: {kind}")
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = Column(name, kind)
+                if num_rows:
+                    column._pad(num_rows)
+            elif column.kind != kind:
+                raise ValueError(f"Column {name} changes kind")
+            if kind == KIND_DICTIONARY:
+                (length,) = _U32.unpack(_read(source, _U32.size))
+                column.dictionary.extend(json.loads(_read(source, length)))
+            data = array(_ARRAY_TYPES[kind])
+            data.frombytes(_read(source, rows * data.itemsize))
+            if _SWAP:
+                data.byteswap()
+            column.data.extend(data)
+            seen.add(name)
+        if len(seen) != len(columns):
+            raise ValueError("Block is missing columns")
+        num_rows += rows
+    return ColumnarTable(num_rows, columns)
+
+
+def _read(source: BinaryIO, size: int) -> bytes:
+    data = source.read(size)
+    if len(data) < size:
+        raise ValueError("Truncated or corrupt columnar decision log")
+    return data
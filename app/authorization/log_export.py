@@ -0,0 +1,74 @@
+"""Streaming encoders for decision log exports."""
+
+import json
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Union
+from app.authorization.log_columnar import encode_columnar
+
+EXPORT_FORMATS = ('json', 'ndjson', 'columnar')
+EXPORT_MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'columnar': 'application/octet-stream'
+}
+
+# Records encoded per yielded chunk
+CHUNK_RECORDS = 256
+
+_encoder = json.JSONEncoder(separators=(',', ':'))
+
+
+def encode_records(
+    records: Iterable[Dict[str, Any]],
+    format: str = 'ndjson',
+    chunk_records: int = CHUNK_RECORDS
+) -> Iterator[Union[str, bytes]]:
+    """
+    Encode records incrementally as NDJSON, a compact JSON array or the
+    binary columnar format (see ``log_columnar``).
+
+    Only ``chunk_records`` encoded records (one block for the columnar
+    format) are held at a time, so memory stays flat however long the log is.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {format}")
+    if format == 'columnar':
+        return encode_columnar(records)
+    return _encode_json(records, format, chunk_records)
+
+
+def _encode_json(records: Iterable[Dict[str, Any]], format: str, chunk_records: int) -> Iterator[str]:
+    ndjson = format == 'ndjson'
+    separator = '\n' if ndjson else ','
+    chunk = []
+    first = True
+    if not ndjson:
+        yield '['
+    for record in records:
+        chunk.append(_encoder.encode(record))
+        if len(chunk) >= chunk_records:
+            yield _join(chunk, separator, ndjson, first)
+            chunk = []
+            first = False
+    if chunk:
+        yield _join(chunk, separator, ndjson, first)
+    if not ndjson:
+        yield ']'
+
+
+def _join(chunk, separator: str, ndjson: bool, first: bool) -> str:
+    if ndjson:
+        return separator.join(chunk) + separator
+    return ('' if first else separator) + separator.join(chunk)
+
+
+def gzip_chunks(chunks: Iterable[Union[str, bytes]], level: int = 6) -> Iterator[bytes]:
+    """Gzip a stream of chunks without buffering the whole output."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
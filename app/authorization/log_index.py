@@ -0,0 +1,166 @@
+"""Incremental secondary indexes over the decision log."""
+
+import bisect
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class DecisionIndex:
+    """
+    Secondary indexes keyed by decision sequence number.
+
+    ``user_id``, ``action`` and ``decision`` map each value to an ascending
+    array of sequence numbers. Timestamps are kept twice: by sequence
+    number, for O(1) range checks, and sorted by time, so a
+    ``start_time``/``end_time`` range is found with two binary searches.
+
+    Entries below ``floor`` belong to decisions no longer available and
+    are never returned; ``evict_before`` raises the floor and reclaims
+    their memory in batches.
+    """
+
+    def __init__(self):
+        self.by_user: Dict[str, array] = {}
+        self.by_action: Dict[str, array] = {}
+        self.by_decision: Dict[str, array] = {}
+        self.base_seq = 0
+        self.floor = 0
+        self._timestamps = array('d')
+        self._sorted_times = array('d')
+        self._sorted_seqs = array('q')
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def add(
+        self,
+        seq: int,
+        user_id: Optional[str],
+        action: Optional[str],
+        decision: str,
+        timestamp: datetime
+    ):
+        """Index a decision; sequence numbers must be added in increasing order."""
+        if not self._timestamps:
+            self.base_seq = seq
+        expected = self.base_seq + len(self._timestamps)
+        if seq < expected:
+            raise ValueError(f"Out-of-order sequence number: {seq}")
+        # Gaps (records lost to a corrupt segment) never match a time range
+        self._timestamps.extend([float('nan')] * (seq - expected))
+
+        if user_id is not None:
+            self.by_user.setdefault(user_id, array('q')).append(seq)
+        if action is not None:
+            self.by_action.setdefault(action, array('q')).append(seq)
+        self.by_decision.setdefault(decision, array('q')).append(seq)
+
+        ts = timestamp.timestamp()
+        self._timestamps.append(ts)
+        # Decisions arrive in near time order, so this is usually an append
+        position = bisect.bisect_right(self._sorted_times, ts)
+        self._sorted_times.insert(position, ts)
+        self._sorted_seqs.insert(position, seq)
+
+    def lookup(
+        self,
+        user_id: Optional[str] = None,
+        action: Optional[str] = None,
+        decision: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Optional[List[int]]:
+        """
+        Sorted sequence numbers matching every given filter.
+
+        Candidate sets are intersected starting from the smallest; returns
+        None when no filter is given.
+        """
+        postings = []
+        for index, value in ((self.by_user, user_id), (self.by_action, action), (self.by_decision, decision)):
+            if value:
+                seqs = index.get(value)
+                if not seqs:
+                    return []
+                postings.append(seqs)
+
+        time_range = None
+        if start_time or end_time:
+            time_range = self._time_range(start_time, end_time)
+            if time_range[0] >= time_range[1]:
+                return []
+
+        if not postings and time_range is None:
+            return None
+
+        postings.sort(key=len)
+        if time_range is not None and (not postings or time_range[1] - time_range[0] < len(postings[0])):
+            lo, hi = time_range
+            candidates = sorted(self._sorted_seqs[lo:hi])
+            check_time = False
+        else:
+            candidates = postings.pop(0)
+            check_time = time_range is not None
+
+        if check_time:
+            low = start_time.timestamp() if start_time else float('-inf')
+            high = end_time.timestamp() if end_time else float('inf')
+
+        floor = self.floor
+        results = []
+        for seq in candidates:
+            if seq < floor:
+                continue
+            if check_time and not (low <= self._timestamps[seq - self.base_seq] <= high):
+                continue
+            if all(_contains(other, seq) for other in postings):
+                results.append(seq)
+        return results
+
+    def _time_range(self, start_time: Optional[datetime], end_time: Optional[datetime]) -> Tuple[int, int]:
+        """Slice of the time-sorted arrays covering [start_time, end_time]."""
+        lo = bisect.bisect_left(self._sorted_times, start_time.timestamp()) if start_time else 0
+        hi = bisect.bisect_right(self._sorted_times, end_time.timestamp()) if end_time else len(self._sorted_times)
+        return lo, hi
+
+    def evict_before(self, seq: int):
+        """
+        Forget decisions with sequence numbers below ``seq``.
+
+        The arrays are compacted once at least half of what they hold is
+        evicted, so the cost is spread over the decisions added meanwhile.
+        """
+        if seq <= self.floor:
+            return
+        self.floor = seq
+        stale = seq - self.base_seq
+        if stale * 2 < len(self._timestamps):
+            return
+        if stale >= len(self._timestamps):
+            self.__init__()
+            self.floor = seq
+            return
+
+        for index in (self.by_user, self.by_action, self.by_decision):
+            for value in list(index):
+                seqs = index[value]
+                position = bisect.bisect_left(seqs, seq)
+                if position == len(seqs):
+                    del index[value]
+                elif position:
+                    del seqs[:position]
+        del self._timestamps[:stale]
+        self.base_seq = seq
+        kept = [position for position, other in enumerate(self._sorted_seqs) if other >= seq]
+        self._sorted_times = array('d', (self._sorted_times[position] for position in kept))
+        self._sorted_seqs = array('q', (self._sorted_seqs[position] for position in kept))
+
+    def clear(self):
+        """Drop all index entries."""
+        self.__init__()
+
+
+def _contains(seqs: array, seq: int) -> bool:
+    position = bisect.bisect_left(seqs, seq)
+    return position < len(seqs) and seqs[position] == seq
@@ -0,0 +1,242 @@
+"""Background pipeline that takes decision logging off the request path."""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+from app.authorization.decision_record import DecisionRecord
+
+BACKPRESSURE_MODES = ('block', 'drop_oldest', 'sample')
+
+
+class PipelineMetrics:
+    """Counters describing the logging pipeline."""
+
+    def __init__(
+        self,
+        running: bool,
+        backpressure: str,
+        queue_depth: int,
+        max_queue: int,
+        submitted: int,
+        written: int,
+        dropped: int,
+        sampled_out: int,
+        batches: int,
+        blocked: int,
+        errors: int
+    ):
+        self.running = running
+        self.backpressure = backpressure
+        self.queue_depth = queue_depth
+        self.max_queue = max_queue
+        self.submitted = submitted
+        self.written = written
+        self.dropped = dropped
+        self.sampled_out = sampled_out
+        self.batches = batches
+        self.blocked = blocked
+        self.errors = errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'backpressure': self.backpressure,
+            'queue_depth': self.queue_depth,
+            'max_queue': self.max_queue,
+            'submitted': self.submitted,
+            'written': self.written,
+            'dropped': self.dropped,
+            'sampled_out': self.sampled_out,
+            'batches': self.batches,
+            'average_batch_size': self.written / self.batches if self.batches else 0.0,
+            'blocked': self.blocked,
+            'errors': self.errors
+        }
+
+
+class DecisionLogPipeline:
+    """
+    Bounded queue drained by a writer thread in batches.
+
+    ``submit`` only enqueues; the writer hands up to ``batch_size``
+    decisions at a time to ``write_batch`` and calls ``flush`` whenever the
+    queue runs dry. When the queue is full, ``backpressure`` decides what
+    happens to new decisions:
+
+    - ``block``: the caller waits for room
+    - ``drop_oldest``: the oldest queued decision is discarded
+    - ``sample``: once the queue is half full, only ``sample_rate`` of new
+      decisions are kept; when it is full they are dropped
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[DecisionRecord]], None],
+        flush: Optional[Callable[[], None]] = None,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        backpressure: str = 'block',
+        sample_rate: float = 0.1
+    ):
+        if max_queue <= 0:
+            raise ValueError(f"Invalid max_queue: {max_queue}")
+        if batch_size <= 0:
+            raise ValueError(f"Invalid batch_size: {batch_size}")
+        if backpressure not in BACKPRESSURE_MODES:
+            raise ValueError(f"Invalid backpressure: {backpressure}. Must be one of: {', '.join(BACKPRESSURE_MODES)}")
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"Invalid sample_rate: {sample_rate}")
+
+        self.write_batch = write_batch
+        self.flush_sink = flush
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.backpressure = backpressure
+        self.sample_rate = sample_rate
+
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._in_flight = 0
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.batches = 0
+        self.blocked = 0
+        self.errors = 0
+
+    def start(self):
+        """Start the writer thread."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='decision-log-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, decision: DecisionRecord) -> bool:
+        """Queue a decision for writing; returns False if it was dropped."""
+        with self._lock:
+            self.submitted += 1
+            if self._stopping:
+                # Shutting down: nothing will drain the queue, write directly
+                self._in_flight += 1
+                self._write([decision])
+                return True
+            depth = len(self._queue)
+            if depth >= self.max_queue:
+                if self.backpressure == 'block':
+                    self.blocked += 1
+                    while len(self._queue) >= self.max_queue and not self._stopping:
+                        self._not_full.wait()
+                    if self._stopping:
+                        # Woken by stop(), which may already have drained
+                        self._in_flight += 1
+                        self._write([decision])
+                        return True
+                elif self.backpressure == 'drop_oldest':
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    self.dropped += 1
+                    return False
+            elif self.backpressure == 'sample' and depth * 2 >= self.max_queue:
+                if random.random() >= self.sample_rate:
+                    self.sampled_out += 1
+                    return False
+
+            self._queue.append(decision)
+            self._not_empty.notify()
+            return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued decision is written; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._queue or self._in_flight:
+                if self._thread is None:
+                    # Not running: write what is left on the caller's thread
+                    self._write(self._take_batch())
+                    continue
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._drained.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Write everything still queued and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        with self._lock:
+            self._thread = None
+        self.flush()
+
+    def get_metrics(self) -> PipelineMetrics:
+        with self._lock:
+            return PipelineMetrics(
+                running=self._thread is not None and not self._stopping,
+                backpressure=self.backpressure,
+                queue_depth=len(self._queue),
+                max_queue=self.max_queue,
+                submitted=self.submitted,
+                written=self.written,
+                dropped=self.dropped,
+                sampled_out=self.sampled_out,
+                batches=self.batches,
+                blocked=self.blocked,
+                errors=self.errors
+            )
+
+    def _run(self):
+        with self._lock:
+            while True:
+                while not self._queue and not self._stopping:
+                    self._not_empty.wait()
+                if not self._queue:
+                    return
+                self._write(self._take_batch())
+
+    def _take_batch(self) -> List[DecisionRecord]:
+        count = min(self.batch_size, len(self._queue))
+        batch = [self._queue.popleft() for _ in range(count)]
+        self._in_flight += count
+        self._not_full.notify_all()
+        return batch
+
+    def _write(self, batch: List[DecisionRecord]):
+        """Write a batch with the queue lock released; called holding it."""
+        self._lock.release()
+        try:
+            error = False
+            try:
+                self.write_batch(batch)
+                if self.flush_sink is not None and not self._queue:
+                    self.flush_sink()
+            except Exception:
+                # A failing sink must not kill the writer; the batch is lost
+                error = True
+        finally:
+            self._lock.acquire()
+        self._in_flight -= len(batch)
+        if error:
+            self.errors += 1
+            self.dropped += len(batch)
+        else:
+            self.written += len(batch)
+            self.batches += 1
+        if not self._queue and not self._in_flight:
+            self._drained.notify_all()
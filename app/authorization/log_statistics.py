@@ -0,0 +1,181 @@
+"""Running decision statistics maintained at log time."""
+
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from app.models.locks import LockStripes
+
+# Window name -> span in seconds
+WINDOWS = {'1m': 60, '5m': 300, '1h': 3600}
+
+
+class WindowCounter:
+    """
+    Permit/deny counts over a trailing time window.
+
+    The window is split into ``buckets`` tumbling buckets; running totals
+    are adjusted as buckets enter and expire, so adding a decision and
+    reading the totals are both amortized O(1).
+    """
+
+    def __init__(self, span: float, buckets: int = 60):
+        self.span = span
+        self.width = span / buckets
+        self.buckets = buckets
+        self._buckets: deque = deque()  # [bucket_index, permits, denies]
+        self.permits = 0
+        self.denies = 0
+
+    def add(self, timestamp: float, decision: str):
+        """Count a decision made at ``timestamp`` (seconds since the epoch)."""
+        index = int(timestamp // self.width)
+        if self._buckets and index < self._buckets[-1][0]:
+            # Late arrival: count it in its own bucket if still in the window
+            if index <= self._buckets[-1][0] - self.buckets:
+                return
+            position = len(self._buckets)
+            while position > 0 and self._buckets[position - 1][0] > index:
+                position -= 1
+            if position > 0 and self._buckets[position - 1][0] == index:
+                bucket = self._buckets[position - 1]
+            else:
+                bucket = [index, 0, 0]
+                self._buckets.insert(position, bucket)
+        else:
+            self._expire(index)
+            if self._buckets and self._buckets[-1][0] == index:
+                bucket = self._buckets[-1]
+            else:
+                bucket = [index, 0, 0]
+                self._buckets.append(bucket)
+
+        if decision == 'permit':
+            bucket[1] += 1
+            self.permits += 1
+        elif decision == 'deny':
+            bucket[2] += 1
+            self.denies += 1
+
+    def totals(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Counts and rates for the window ending at ``now``."""
+        self._expire(int((time.time() if now is None else now) // self.width))
+        total = self.permits + self.denies
+        return {
+            'total': total,
+            'permits': self.permits,
+            'denies': self.denies,
+            'permit_rate': self.permits / total if total else 0.0,
+            'deny_rate': self.denies / total if total else 0.0
+        }
+
+    def _expire(self, current_index: int):
+        oldest = current_index - self.buckets + 1
+        while self._buckets and self._buckets[0][0] < oldest:
+            _, permits, denies = self._buckets.popleft()
+            self.permits -= permits
+            self.denies -= denies
+
+
+class RunningStatistics:
+    """Counters updated once per logged decision."""
+
+    def __init__(self):
+        self.total = 0
+        self.permits = 0
+        self.denies = 0
+        self.by_department: Dict[str, int] = {}
+        self.by_action: Dict[str, int] = {}
+        self.by_rule: Dict[str, int] = {}
+        self.windows = {name: WindowCounter(span) for name, span in WINDOWS.items()}
+
+    def add(
+        self,
+        decision: str,
+        timestamp: float,
+        department: Optional[str] = None,
+        action: Optional[str] = None,
+        rule: Optional[str] = None
+    ):
+        """Count one decision."""
+        self.total += 1
+        if decision == 'permit':
+            self.permits += 1
+        elif decision == 'deny':
+            self.denies += 1
+        if department is not None:
+            self.by_department[department] = self.by_department.get(department, 0) + 1
+        if action is not None:
+            self.by_action[action] = self.by_action.get(action, 0) + 1
+        if rule is not None:
+            self.by_rule[rule] = self.by_rule.get(rule, 0) + 1
+        for window in self.windows.values():
+            window.add(timestamp, decision)
+
+    def window_totals(self, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Totals for every trailing window."""
+        now = time.time() if now is None else now
+        return {name: window.totals(now) for name, window in self.windows.items()}
+
+
+class StripedStatistics:
+    """
+    ``RunningStatistics`` split into stripes keyed by user ID.
+
+    Each stripe has its own lock, so threads logging decisions for
+    different users rarely contend; reads merge the stripes.
+    """
+
+    def __init__(self, stripes: int = 16):
+        self.stripes = [RunningStatistics() for _ in range(stripes)]
+        self.locks = LockStripes(stripes)
+
+    def add(
+        self,
+        key: Optional[str],
+        decision: str,
+        timestamp: float,
+        department: Optional[str] = None,
+        action: Optional[str] = None,
+        rule: Optional[str] = None
+    ):
+        """Count one decision in the stripe of ``key`` (normally the user ID)."""
+        index = self.locks.index(key)
+        with self.locks.locks[index]:
+            self.stripes[index].add(decision, timestamp, department, action, rule)
+
+    def totals(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Counters and window totals merged over every stripe."""
+        now = time.time() if now is None else now
+        merged: Dict[str, Any] = {
+            'total': 0,
+            'permits': 0,
+            'denies': 0,
+            'by_department': {},
+            'by_action': {},
+            'by_rule': {},
+            'windows': {}
+        }
+        windows = {name: [0, 0] for name in WINDOWS}
+        for lock, stripe in zip(self.locks.locks, self.stripes):
+            with lock:
+                merged['total'] += stripe.total
+                merged['permits'] += stripe.permits
+                merged['denies'] += stripe.denies
+                for name in ('by_department', 'by_action', 'by_rule'):
+                    counts = merged[name]
+                    for value, count in getattr(stripe, name).items():
+                        counts[value] = counts.get(value, 0) + count
+                for name, totals in stripe.window_totals(now).items():
+                    windows[name][0] += totals['permits']
+                    windows[name][1] += totals['denies']
+
+        for name, (permits, denies) in windows.items():
+            total = permits + denies
+            merged['windows'][name] = {
+                'total': total,
+                'permits': permits,
+                'denies': denies,
+                'permit_rate': permits / total if total else 0.0,
+                'deny_rate': denies / total if total else 0.0
+            }
+        return merged
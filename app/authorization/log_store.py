@@ -0,0 +1,236 @@
+"""Append-only, segmented on-disk store for decision log records."""
+
+import bisect
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Record header: payload length, CRC32 of the payload and sequence number
+_HEADER = struct.Struct('>IIQ')
+_SEGMENT_PREFIX = 'segment-'
+_SEGMENT_SUFFIX = '.log'
+
+
+def encode_record(seq: int, record: Dict[str, Any]) -> bytes:
+    """Frame a record as a length-prefixed, checksummed compact JSON payload."""
+    payload = json.dumps(dict(record, seq=seq), separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(len(payload), zlib.crc32(payload), seq) + payload
+
+
+def encode_payload(record: Dict[str, Any]) -> bytes:
+    """Compact JSON of a record without ``seq``, for ``SegmentedLogStore.append_payload``."""
+    return json.dumps(record, separators=(',', ':')).encode('utf-8')
+
+
+def _frame_payload(seq: int, payload: bytes) -> bytes:
+    """Frame an ``encode_payload`` result, adding ``seq`` as its last key like ``encode_record``."""
+    payload = payload[:-1] + (b',' if len(payload) > 2 else b'') + b'"seq":%d}' % seq
+    return _HEADER.pack(len(payload), zlib.crc32(payload), seq) + payload
+
+
+def read_segment(path: str, wanted: Optional[Sequence[int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of one segment, stopping at a torn or corrupt tail.
+
+    With ``wanted`` (sorted sequence numbers) only those records are
+    decoded; the payloads of the others are skipped using the header.
+    """
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            length, checksum, seq = _HEADER.unpack(header)
+            if wanted is not None:
+                position = bisect.bisect_left(wanted, seq)
+                if position == len(wanted):
+                    return
+                if wanted[position] != seq:
+                    f.seek(length, os.SEEK_CUR)
+                    continue
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            yield json.loads(payload)
+
+
+class SegmentedLogStore:
+    """
+    Append-only decision log split into rotating segment files.
+
+    Each record is a JSON object carrying a monotonically increasing
+    ``seq``. Segments are named after the first sequence number they hold,
+    so readers can skip whole segments when resuming from a sequence
+    number. Writes are flushed to the OS on every ``fsync_every``-th
+    record and fsynced at the same time; ``flush()`` forces both.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        fsync_every: int = 256,
+        max_segments: Optional[int] = None
+    ):
+        if max_segment_bytes <= 0:
+            raise ValueError(f"Invalid max_segment_bytes: {max_segment_bytes}")
+        if fsync_every <= 0:
+            raise ValueError(f"Invalid fsync_every: {fsync_every}")
+        if max_segments is not None and max_segments <= 0:
+            raise ValueError(f"Invalid max_segments: {max_segments}")
+
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_every = fsync_every
+        self.max_segments = max_segments
+        self._lock = threading.RLock()
+        self._file = None
+        self._file_size = 0
+        self._unsynced = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.next_seq = self._recover_next_seq()
+        # Sequence number of the oldest record retention has not removed
+        segments = self.segments()
+        self.oldest_seq = segments[0][0] if segments else self.next_seq
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Append a record, assigning and returning its sequence number."""
+        with self._lock:
+            return self._write(encode_record(self.next_seq, record))
+
+    def append_payload(self, payload: bytes) -> int:
+        """
+        Append a record already encoded by ``encode_payload``.
+
+        Encoding can then happen before the caller takes any lock; only the
+        sequence number is added here.
+        """
+        with self._lock:
+            return self._write(_frame_payload(self.next_seq, payload))
+
+    def _write(self, data: bytes) -> int:
+        """Write a framed record; called holding the lock."""
+        seq = self.next_seq
+        if self._file is None or self._file_size + len(data) > self.max_segment_bytes:
+            self._rotate(seq)
+        self._file.write(data)
+        self._file_size += len(data)
+        self.next_seq = seq + 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self._sync()
+        return seq
+
+    def flush(self):
+        """Flush buffered records to disk and fsync the current segment."""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._sync()
+
+    def iter_records(self, start_seq: int = 0, end_seq: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield records with start_seq <= seq < end_seq across all segments."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            segments = self.segments()
+
+        for position, (first_seq, path) in enumerate(segments):
+            if end_seq is not None and first_seq >= end_seq:
+                return
+            if position + 1 < len(segments) and segments[position + 1][0] <= start_seq:
+                continue
+            try:
+                for record in read_segment(path):
+                    seq = record['seq']
+                    if seq < start_seq:
+                        continue
+                    if end_seq is not None and seq >= end_seq:
+                        return
+                    yield record
+            except FileNotFoundError:
+                # Segment removed by retention or clear() while reading
+                continue
+
+    def read_records(self, seqs: Sequence[int]) -> Iterator[Dict[str, Any]]:
+        """Yield the records with the given sorted sequence numbers.
+
+        Segments holding none of them are skipped without being opened.
+        """
+        if not seqs:
+            return
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            segments = self.segments()
+
+        for position, (first_seq, path) in enumerate(segments):
+            next_first = segments[position + 1][0] if position + 1 < len(segments) else None
+            lo = bisect.bisect_left(seqs, first_seq)
+            hi = len(seqs) if next_first is None else bisect.bisect_left(seqs, next_first)
+            if lo == hi:
+                continue
+            try:
+                yield from read_segment(path, seqs[lo:hi])
+            except FileNotFoundError:
+                continue
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """(first_seq, path) of every segment, oldest first."""
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+                first_seq = int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+                segments.append((first_seq, os.path.join(self.directory, name)))
+        segments.sort()
+        return segments
+
+    def clear(self):
+        """Delete every segment (useful for testing)."""
+        with self._lock:
+            self._close_file()
+            for _, path in self.segments():
+                os.remove(path)
+            self.next_seq = 0
+            self.oldest_seq = 0
+
+    def close(self):
+        """Flush and close the current segment."""
+        with self._lock:
+            self._close_file()
+
+    def _rotate(self, first_seq: int):
+        self._close_file()
+        path = os.path.join(self.directory, f'{_SEGMENT_PREFIX}{first_seq:016d}{_SEGMENT_SUFFIX}')
+        # A segment named after next_seq holds no intact records, so truncate it
+        self._file = open(path, 'wb')
+        self._file_size = 0
+        if self.max_segments is not None:
+            segments = self.segments()
+            for _, old_path in segments[:-self.max_segments]:
+                os.remove(old_path)
+            self.oldest_seq = segments[-self.max_segments:][0][0]
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def _close_file(self):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def _recover_next_seq(self) -> int:
+        """Find the sequence number following the last intact record."""
+        for _, path in reversed(self.segments()):
+            last = None
+            for record in read_segment(path):
+                last = record
+            if last is not None:
+                return last['seq'] + 1
+        return 0
@@ -0,0 +1,162 @@
+"""Opt-in instrumentation of rule evaluation and decision logging."""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1.0
+)
+
+
+class Histogram:
+    """Counts of observations per bucket, with their count and sum."""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus one for values above the last bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs as Prometheus expects them, ending with +Inf."""
+        pairs = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((repr(bound), total))
+        pairs.append(('+Inf', self.count))
+        return pairs
+
+
+class RuleMetrics:
+    """Counters and latency of one rule."""
+
+    __slots__ = ('calls', 'matches', 'errors', 'latency')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.calls = 0
+        self.matches = 0
+        # Exception type name -> count
+        self.errors: Dict[str, int] = {}
+        self.latency = Histogram(buckets)
+
+
+class Metrics:
+    """
+    Per-rule and per-request counters for the authorization hot path.
+
+    The engine records, for every candidate rule it checks, the call, its
+    latency, whether it matched and any exception the condition raised
+    (which still counts as no match). Whole-request evaluation latency and
+    decision logging latency get their own histograms. Nothing is
+    recorded unless an instance is attached with
+    ``AuthorizationEngine.enable_metrics``.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.rules: Dict[str, RuleMetrics] = {}
+        self.evaluation_latency = Histogram(self.buckets)
+        self.log_latency = Histogram(self.buckets)
+        self._lock = threading.Lock()
+
+    def observe_rule(self, rule_id: str, seconds: float, matched: bool, error: Optional[BaseException] = None):
+        """Record one check of a rule's condition."""
+        with self._lock:
+            rule = self.rules.get(rule_id)
+            if rule is None:
+                rule = self.rules[rule_id] = RuleMetrics(self.buckets)
+            rule.calls += 1
+            rule.latency.observe(seconds)
+            if matched:
+                rule.matches += 1
+            if error is not None:
+                name = type(error).__name__
+                rule.errors[name] = rule.errors.get(name, 0) + 1
+
+    def observe_evaluation(self, seconds: float):
+        """Record the latency of deciding one request."""
+        with self._lock:
+            self.evaluation_latency.observe(seconds)
+
+    def observe_log(self, seconds: float):
+        """Record the latency of logging one decision."""
+        with self._lock:
+            self.log_latency.observe(seconds)
+
+    def rule_totals(self) -> Dict[str, Tuple[int, int, float]]:
+        """(calls, matches, seconds spent checking) of every rule seen so far."""
+        with self._lock:
+            return {
+                rule_id: (rule.calls, rule.matches, rule.latency.sum)
+                for rule_id, rule in self.rules.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self.rules = {}
+            self.evaluation_latency = Histogram(self.buckets)
+            self.log_latency = Histogram(self.buckets)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            rules = sorted(self.rules.items())
+            lines = []
+
+            _header(lines, 'abac_rule_calls_total', 'counter', 'Times a rule condition was checked.')
+            for rule_id, rule in rules:
+                lines.append(f'abac_rule_calls_total{{rule="{_escape(rule_id)}"}} {rule.calls}')
+
+            _header(lines, 'abac_rule_matches_total', 'counter', 'Times a rule condition held.')
+            for rule_id, rule in rules:
+                lines.append(f'abac_rule_matches_total{{rule="{_escape(rule_id)}"}} {rule.matches}')
+
+            _header(lines, 'abac_rule_errors_total', 'counter',
+                    'Exceptions raised by a rule condition, which count as no match.')
+            for rule_id, rule in rules:
+                for name, count in sorted(rule.errors.items()):
+                    lines.append(
+                        f'abac_rule_errors_total{{rule="{_escape(rule_id)}",exception="{_escape(name)}"}} {count}'
+                    )
+
+            _header(lines, 'abac_rule_check_seconds', 'histogram', 'Latency of checking a rule condition.')
+            for rule_id, rule in rules:
+                _histogram(lines, 'abac_rule_check_seconds', rule.latency, f'rule="{_escape(rule_id)}"')
+
+            _header(lines, 'abac_engine_evaluation_seconds', 'histogram', 'Latency of deciding one request.')
+            _histogram(lines, 'abac_engine_evaluation_seconds', self.evaluation_latency)
+
+            _header(lines, 'abac_decision_log_seconds', 'histogram', 'Latency of logging one decision.')
+            _histogram(lines, 'abac_decision_log_seconds', self.log_latency)
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _header(lines: List[str], name: str, kind: str, help_text: str):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+
+
+def _histogram(lines: List[str], name: str, histogram: Histogram, labels: str = ''):
+    prefix = labels + ',' if labels else ''
+    for bound, count in histogram.cumulative():
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {count}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {histogram.sum!r}')
+    lines.append(f'{name}_count{suffix} {histogram.count}')
@@ -0,0 +1,603 @@
+"""
+Policy mining: candidate rules learned from logged decisions.
+
+Decisions are streamed once. Each becomes a transaction of items, an item
+being an attribute test that held for its request:
+
+- ``(path, 'eq', value)`` for every categorical leaf of the request (role,
+  level, status, action, business hours, ...). Identifiers and timestamps
+  are left out, and an attribute is dropped as soon as it shows more than
+  ``max_values`` distinct values;
+- ``(left, op, AttributeRef(right))`` or its negation for the attribute
+  pairs in ``relations`` (ownership, same location, clearance against
+  sensitivity), which is how the built-in rules relate users to resources.
+
+Equal transactions are counted together per decision, so memory grows with
+the number of distinct attribute combinations, not with the number of
+decisions, and counts are exact while that table fits in
+``max_transactions`` entries. Past that the miner keeps a concise sample
+(Gibbons and Matias): every time the table fills, the sampling rate halves
+and each stored decision survives with probability one half, so memory
+stays bounded and counts become unbiased estimates (``sample_rate``
+reports the final rate).
+
+Mining works on that table as a NumPy bitmap with a column of
+transactions per item, and a depth-first search (Eclat) that narrows the
+list of matching transactions one item at a time, counting the permits and
+deny decisions of every extension of an itemset with one matrix product. An itemset becomes a candidate when enough decisions
+support it (``min_support``, a fraction of all decisions) and it predicts
+its effect with at least ``min_confidence``; only minimal itemsets are
+kept. Since deny rules take precedence, deny rules are mined first, then
+permit rules only over the decisions no chosen deny rule matches. Within
+each effect candidates are picked greedily, most confident first, while
+each still covers enough decisions not covered yet, and picks that differ
+in one attribute's value are merged into a single ``in`` condition. The
+result is a short rule list (deny rules above permit rules, default deny)
+and how often it agrees with the logged decisions.
+
+    python -m app.authorization.mining --log-dir ./decision-logs --output mined.json
+    python -m app.authorization.mining --input export.ndjson.gz --min-support 0.005
+"""
+
+import argparse
+import gzip
+import json
+import math
+import random
+import sys
+import numpy as np
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from app.authorization.conditions import AttributeRef, Condition, OPERATORS
+from app.authorization.rules import AuthorizationRule
+
+DEFAULT_MIN_SUPPORT = 0.01
+DEFAULT_MIN_CONFIDENCE = 0.95
+DEFAULT_MAX_LENGTH = 3
+DEFAULT_MAX_RULES = 20
+# Distinct values after which an attribute is treated as an identifier
+DEFAULT_MAX_VALUES = 32
+DEFAULT_MAX_TRANSACTIONS = 200_000
+# Transactions whose bitmap columns are multiplied at a time while searching
+SEARCH_CHUNK = 16384
+
+# Leaves identifying an entity or a single request
+EXCLUDED_KEYS = frozenset({'id', 'name', 'owner_id', 'timestamp', 'ip_address'})
+
+# Attribute pairs mined as one item: does ``left op right`` hold?
+DEFAULT_RELATIONS: Tuple[Tuple[str, str, str], ...] = (
+    ('user.id', 'eq', 'resource.attributes.owner_id'),
+    ('user.attributes.location.primary', 'eq', 'resource.attributes.location'),
+    ('environment.location', 'eq', 'resource.attributes.location'),
+    ('user.attributes.clearance_level', 'ge', 'resource.attributes.sensitivity_level'),
+)
+
+NEGATIONS = {'eq': 'ne', 'ne': 'eq', 'lt': 'ge', 'ge': 'lt', 'gt': 'le', 'le': 'gt'}
+
+EFFECTS = ('permit', 'deny')
+
+# (attribute path, operator, literal or AttributeRef)
+Item = Tuple[str, str, Any]
+
+
+class MinedRule:
+    """A proposed rule with the decisions that support it."""
+
+    def __init__(self, rule: AuthorizationRule, count: int, matches: int, records: int):
+        self.rule = rule
+        # Decisions the rule decides that had its effect, and all it decides
+        self.count = count
+        self.matches = matches
+        self.support = count / records if records else 0.0
+        self.confidence = count / matches if matches else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rule': self.rule.to_dict(),
+            'support': self.support,
+            'confidence': self.confidence,
+            'count': self.count,
+            'matches': self.matches
+        }
+
+
+class MiningReport:
+    """Mined rules and how well they reproduce the logged decisions."""
+
+    def __init__(
+        self,
+        records: int,
+        skipped: int,
+        sample_rate: float,
+        transactions: int,
+        dropped_attributes: List[str],
+        candidates: int,
+        rules: List[MinedRule],
+        agreement: float,
+        baseline: float
+    ):
+        self.records = records
+        self.skipped = skipped
+        self.sample_rate = sample_rate
+        self.transactions = transactions
+        self.dropped_attributes = dropped_attributes
+        self.candidates = candidates
+        self.rules = rules
+        self.agreement = agreement
+        self.baseline = baseline
+
+    def authorization_rules(self) -> List[AuthorizationRule]:
+        return [mined.rule for mined in self.rules]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'records': self.records,
+            'skipped': self.skipped,
+            'sample_rate': self.sample_rate,
+            'transactions': self.transactions,
+            'dropped_attributes': self.dropped_attributes,
+            'candidates': self.candidates,
+            'rules': [mined.to_dict() for mined in self.rules],
+            # Share of decisions the mined rules reproduce, against denying everything
+            'agreement': self.agreement,
+            'baseline': self.baseline
+        }
+
+
+class _Candidate:
+    __slots__ = ('items', 'effect', 'count', 'matches')
+
+    def __init__(self, items: Tuple[int, ...], effect: str, count: int, matches: int):
+        self.items = items
+        self.effect = effect
+        self.count = count
+        self.matches = matches
+
+
+class PolicyMiner:
+    """
+    Streams decision records (``AuthorizationDecision.to_dict`` form) into
+    weighted transactions; ``mine`` proposes rules from what was added.
+    """
+
+    def __init__(
+        self,
+        attributes: Optional[Iterable[str]] = None,
+        relations: Sequence[Tuple[str, str, str]] = DEFAULT_RELATIONS,
+        max_values: int = DEFAULT_MAX_VALUES,
+        max_transactions: int = DEFAULT_MAX_TRANSACTIONS,
+        seed: int = 0
+    ):
+        for _, op, _ in relations:
+            if op not in NEGATIONS:
+                raise ValueError(f"Invalid relation operator: {op}")
+        if max_transactions < 2:
+            raise ValueError("max_transactions must be at least 2")
+        # Request leaves to mine; by default every one not in EXCLUDED_KEYS
+        self.attributes = frozenset(attributes) if attributes is not None else None
+        self.relations = tuple(relations)
+        self.max_values = max_values
+        self.max_transactions = max_transactions
+        self.records = 0
+        self.skipped = 0
+        self.dropped: Set[str] = set()
+        # Decisions each stored one stands for (the inverse sampling rate)
+        self._scale = 1
+        self._random = random.Random(seed).random
+        self._binomial = np.random.default_rng(seed).binomial
+        self._wanted: Dict[str, bool] = {}
+        self._values: Dict[str, Set[Any]] = {}
+        self._codes: Dict[Item, int] = {}
+        self._items: List[Item] = []
+        # Packed sorted item codes -> [permits, denies]
+        self._table: Dict[bytes, List[int]] = {}
+
+    @property
+    def sample_rate(self) -> float:
+        return 1 / self._scale
+
+    def add(self, record: Dict[str, Any]):
+        """Count one logged decision."""
+        request = record.get('request')
+        decision = record.get('decision')
+        if not request or decision not in EFFECTS:
+            self.skipped += 1
+            return
+        self.records += 1
+
+        leaves: Dict[str, Any] = {}
+        _flatten(request, '', leaves)
+        codes = []
+        for path, value in leaves.items():
+            if path in self.dropped or not self._is_wanted(path) or isinstance(value, (list, dict)):
+                continue
+            seen = self._values.get(path)
+            if seen is None:
+                seen = self._values[path] = set()
+            if value not in seen:
+                if len(seen) >= self.max_values:
+                    self._drop(path)
+                    continue
+                seen.add(value)
+            codes.append(self._code((path, 'eq', value)))
+        for left, op, right in self.relations:
+            if leaves.get(left) is None or leaves.get(right) is None:
+                continue
+            try:
+                holds = OPERATORS[op](leaves[left], leaves[right])
+            except TypeError:
+                continue
+            codes.append(self._code((left, op if holds else NEGATIONS[op], AttributeRef(right))))
+
+        if self._scale > 1 and self._random() * self._scale >= 1:
+            return
+        codes.sort()
+        key = array('I', codes).tobytes()
+        counts = self._table.get(key)
+        if counts is None:
+            if len(self._table) >= self.max_transactions:
+                self._subsample()
+                # Sampled at the old rate; keep it with the probability the new one implies
+                if self._random() >= 0.5:
+                    return
+            counts = self._table[key] = [0, 0]
+        counts[0 if decision == 'permit' else 1] += 1
+
+    def add_all(self, records: Iterable[Dict[str, Any]]) -> 'PolicyMiner':
+        for record in records:
+            self.add(record)
+        return self
+
+    def mine(
+        self,
+        min_support: float = DEFAULT_MIN_SUPPORT,
+        min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        max_rules: int = DEFAULT_MAX_RULES
+    ) -> MiningReport:
+        """Propose rules from the decisions added so far; raises ValueError for bad thresholds."""
+        if not 0 < min_support <= 1:
+            raise ValueError("min_support must be in (0, 1]")
+        if not 0 < min_confidence <= 1:
+            raise ValueError("min_confidence must be in (0, 1]")
+        if max_length < 1 or max_rules < 1:
+            raise ValueError("max_length and max_rules must be positive")
+
+        keys = list(self._table)
+        counts = np.array(list(self._table.values()), dtype=np.int64).reshape(-1, 2) * self._scale
+        permits, denies = counts[:, 0], counts[:, 1]
+        min_count = max(1, math.ceil(min_support * self.records))
+        items, bitmaps = self._bitmaps(keys, permits, denies, min_count)
+
+        # Deny rules first; permit rules then only decide what no deny rule matches
+        found = self._search(items, bitmaps, 'deny', denies, permits, min_count, min_confidence, max_length)
+        groups = self._merge(self._select(found, bitmaps, denies, permits, min_count, max_rules), items)
+        denied = _union(bitmaps, groups, len(keys))
+        remaining_permits = np.where(denied, 0, permits)
+        remaining_denies = np.where(denied, 0, denies)
+        candidates = len(found)
+        if len(groups) < max_rules:
+            found = self._search(
+                items, bitmaps, 'permit', remaining_permits, remaining_denies, min_count, min_confidence, max_length
+            )
+            candidates += len(found)
+            selected = self._select(
+                found, bitmaps, remaining_permits, remaining_denies, min_count, max_rules - len(groups)
+            )
+            groups += self._merge(selected, items)
+        permitted = _union(bitmaps, [group for group in groups if group[0].effect == 'permit'], len(keys))
+        permitted &= ~denied
+
+        rules = [
+            MinedRule(
+                self._build_rule(group, items, position, len(groups)),
+                count=sum(candidate.count for candidate in group),
+                matches=sum(candidate.matches for candidate in group),
+                records=self.records
+            )
+            for position, group in enumerate(groups)
+        ]
+        total = int(counts.sum())
+        agreed = int(permits[permitted].sum() + denies[~permitted].sum())
+        return MiningReport(
+            records=self.records,
+            skipped=self.skipped,
+            sample_rate=self.sample_rate,
+            transactions=len(keys),
+            dropped_attributes=sorted(self.dropped),
+            candidates=candidates,
+            rules=rules,
+            agreement=agreed / total if total else 0.0,
+            baseline=int(denies.sum()) / total if total else 0.0
+        )
+
+    def _is_wanted(self, path: str) -> bool:
+        wanted = self._wanted.get(path)
+        if wanted is None:
+            if self.attributes is not None:
+                wanted = path in self.attributes
+            else:
+                wanted = path.rsplit('.', 1)[-1] not in EXCLUDED_KEYS
+            self._wanted[path] = wanted
+        return wanted
+
+    def _code(self, item: Item) -> int:
+        code = self._codes.get(item)
+        if code is None:
+            code = self._codes[item] = len(self._items)
+            self._items.append(item)
+        return code
+
+    def _drop(self, path: str):
+        """Stop mining an attribute with too many values and forget its items."""
+        self.dropped.add(path)
+        del self._values[path]
+        removed = {code for (item_path, op, _), code in self._codes.items() if item_path == path and op == 'eq'}
+        table: Dict[bytes, List[int]] = {}
+        for key, (permit_count, deny_count) in self._table.items():
+            key = array('I', [code for code in array('I', key) if code not in removed]).tobytes()
+            counts = table.get(key)
+            if counts is None:
+                table[key] = [permit_count, deny_count]
+            else:
+                counts[0] += permit_count
+                counts[1] += deny_count
+        self._table = table
+
+    def _subsample(self):
+        """Halve the sampling rate, keeping each stored decision with probability one half."""
+        while len(self._table) >= self.max_transactions:
+            self._scale *= 2
+            keys = list(self._table)
+            kept = self._binomial(np.array(list(self._table.values()), dtype=np.int64), 0.5)
+            self._table = {
+                key: [int(permit_count), int(deny_count)]
+                for key, (permit_count, deny_count) in zip(keys, kept)
+                if permit_count or deny_count
+            }
+
+    def _bitmaps(
+        self,
+        keys: List[bytes],
+        permits: np.ndarray,
+        denies: np.ndarray,
+        min_count: int
+    ) -> Tuple[List[Item], np.ndarray]:
+        """Items frequent for either effect, most frequent first, and a transactions x items bitmap."""
+        columns = np.frombuffer(b''.join(keys), dtype=np.uint32).astype(np.int64)
+        lengths = np.fromiter((len(key) // 4 for key in keys), dtype=np.int64, count=len(keys))
+        rows = np.repeat(np.arange(len(keys)), lengths)
+        size = len(self._items)
+        permit_counts = np.bincount(columns, weights=np.repeat(permits, lengths), minlength=size)
+        deny_counts = np.bincount(columns, weights=np.repeat(denies, lengths), minlength=size)
+
+        codes = np.flatnonzero(np.maximum(permit_counts, deny_counts) >= min_count)
+        codes = codes[np.argsort(-(permit_counts[codes] + deny_counts[codes]), kind='stable')]
+        positions = np.full(size, -1, dtype=np.int64)
+        positions[codes] = np.arange(len(codes))
+        bitmaps = np.zeros((len(keys), len(codes)), dtype=bool)
+        wanted = positions[columns] >= 0
+        bitmaps[rows[wanted], positions[columns[wanted]]] = True
+        return [self._items[code] for code in codes], bitmaps
+
+    @staticmethod
+    def _search(
+        items: List[Item],
+        bitmaps: np.ndarray,
+        effect: str,
+        wanted: np.ndarray,
+        other: np.ndarray,
+        min_count: int,
+        min_confidence: float,
+        max_length: int
+    ) -> List[_Candidate]:
+        """Minimal itemsets predicting ``effect``: ``wanted`` counts it per transaction, ``other`` the rest."""
+        # Two tests of the same attribute (or attribute pair) never go in one rule
+        attributes = [path if not isinstance(value, AttributeRef) else (path, value.path) for path, _, value in items]
+        # Counts are only compared with thresholds here; _select recounts exactly
+        weights = np.stack([wanted, other]).astype(np.float32)
+        found: List[_Candidate] = []
+
+        def search(prefix: Tuple[int, ...], used: Set[Any], rows: np.ndarray):
+            first = prefix[-1] + 1 if prefix else 0
+            # (effect count, other count) of every extension at once
+            counts = np.zeros((2, len(items) - first))
+            for start in range(0, len(rows), SEARCH_CHUNK):
+                chunk = rows[start:start + SEARCH_CHUNK]
+                counts += weights[:, chunk] @ bitmaps[chunk, first:].astype(np.float32)
+            for offset, (count, other_count) in enumerate(zip(*counts.tolist())):
+                position = first + offset
+                if count < min_count or attributes[position] in used:
+                    continue
+                matches = count + other_count
+                itemset = prefix + (position,)
+                if count >= min_confidence * matches:
+                    found.append(_Candidate(itemset, effect, round(count), round(matches)))
+                elif len(itemset) < max_length:
+                    search(itemset, used | {attributes[position]}, rows[bitmaps[rows, position]])
+
+        search((), set(), np.flatnonzero(wanted + other))
+
+        # Keep only itemsets with no smaller candidate inside
+        minimal: List[frozenset] = []
+        result = []
+        for candidate in sorted(found, key=lambda c: len(c.items)):
+            itemset = frozenset(candidate.items)
+            if not any(subset <= itemset for subset in minimal):
+                minimal.append(itemset)
+                result.append(candidate)
+        return result
+
+    @staticmethod
+    def _select(
+        candidates: List[_Candidate],
+        bitmaps: np.ndarray,
+        weights: np.ndarray,
+        other: np.ndarray,
+        min_count: int,
+        limit: int
+    ) -> List[_Candidate]:
+        """Greedy cover: most confident first, each adding ``min_count`` uncovered decisions."""
+        covered = np.zeros(bitmaps.shape[0], dtype=bool)
+        selected = []
+        for candidate in sorted(candidates, key=lambda c: (-c.count / c.matches, len(c.items), -c.count)):
+            if len(selected) >= limit:
+                break
+            mask = _intersect(bitmaps, candidate.items)
+            if int(weights[mask & ~covered].sum()) < min_count:
+                continue
+            covered |= mask
+            candidate.count = int(weights[mask].sum())
+            candidate.matches = candidate.count + int(other[mask].sum())
+            selected.append(candidate)
+        return selected
+
+    @staticmethod
+    def _merge(selected: List[_Candidate], items: List[Item]) -> List[List[_Candidate]]:
+        """Group picks that differ only in the value of one literal attribute."""
+        groups: Dict[Tuple, List[_Candidate]] = {}
+        for candidate in selected:
+            for position in candidate.items:
+                path, op, value = items[position]
+                if isinstance(value, AttributeRef):
+                    continue
+                rest = frozenset(other for other in candidate.items if other != position)
+                groups.setdefault((path, rest), []).append(candidate)
+
+        merged: List[List[_Candidate]] = []
+        used: Set[int] = set()
+        for group in sorted(groups.values(), key=len, reverse=True):
+            group = [candidate for candidate in group if id(candidate) not in used]
+            if len(group) < 2:
+                continue
+            used.update(id(candidate) for candidate in group)
+            merged.append(group)
+        merged.extend([candidate] for candidate in selected if id(candidate) not in used)
+        # In the order of each group's first pick
+        rank = {id(candidate): position for position, candidate in enumerate(selected)}
+        merged.sort(key=lambda group: min(rank[id(candidate)] for candidate in group))
+        return merged
+
+    @staticmethod
+    def _build_rule(group: List[_Candidate], items: List[Item], position: int, count: int) -> AuthorizationRule:
+        effect = group[0].effect
+        shared = set.intersection(*(set(candidate.items) for candidate in group))
+        conditions = [Condition(*items[code]) for code in sorted(shared)]
+        if len(group) > 1:
+            # The one attribute whose value differs across the group
+            varying = [items[code] for candidate in group for code in candidate.items if code not in shared]
+            conditions.append(Condition(varying[0][0], 'in', {value for _, _, value in varying}))
+        return AuthorizationRule(
+            id=f'mined_{effect}_{position + 1}',
+            name=f"Mined {effect}: {', '.join(_describe(condition) for condition in conditions)}",
+            conditions=conditions,
+            # Rules keep their mined order, deny rules above permit rules
+            priority=(count - position) * 10,
+            effect=effect
+        )
+
+
+def _flatten(value: Dict[str, Any], prefix: str, leaves: Dict[str, Any]):
+    for key, item in value.items():
+        if isinstance(item, dict):
+            _flatten(item, f'{prefix}{key}.', leaves)
+        else:
+            leaves[prefix + key] = item
+
+
+def _intersect(bitmaps: np.ndarray, positions: Tuple[int, ...]) -> np.ndarray:
+    mask = bitmaps[:, positions[0]].copy()
+    for position in positions[1:]:
+        mask &= bitmaps[:, position]
+    return mask
+
+
+def _union(bitmaps: np.ndarray, groups: List[List[_Candidate]], size: int) -> np.ndarray:
+    mask = np.zeros(size, dtype=bool)
+    for group in groups:
+        for candidate in group:
+            mask |= _intersect(bitmaps, candidate.items)
+    return mask
+
+
+def _describe(condition: Condition) -> str:
+    value = condition.value
+    if isinstance(value, AttributeRef):
+        value = value.path
+    elif isinstance(value, frozenset):
+        value = '{' + ', '.join(sorted(map(str, value))) + '}'
+    return f'{condition.attribute} {condition.operator} {value}'
+
+
+def mine(records: Iterable[Dict[str, Any]], **options) -> MiningReport:
+    """Mine decision records in one pass; ``options`` go to ``PolicyMiner`` and ``mine``."""
+    miner_options = {
+        name: options.pop(name)
+        for name in ('attributes', 'relations', 'max_values', 'max_transactions', 'seed')
+        if name in options
+    }
+    return PolicyMiner(**miner_options).add_all(records).mine(**options)
+
+
+def logger_records(
+    logger,
+    since: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Decisions of a ``DecisionLogger`` or ``RemoteDecisionLogger`` as dicts,
+    oldest first: the first ``limit`` logged at or after ``since``. A remote
+    logger reads them from the aggregator one page at a time.
+    """
+    records, _ = logger.export_records(since=since, limit=limit)
+    return records
+
+
+def read_ndjson(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of an NDJSON export; ``.gz`` files are decompressed."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--log-dir', help='decision log segment directory')
+    source.add_argument('--input', help='NDJSON export, optionally gzipped')
+    parser.add_argument('--min-support', type=float, default=DEFAULT_MIN_SUPPORT)
+    parser.add_argument('--min-confidence', type=float, default=DEFAULT_MIN_CONFIDENCE)
+    parser.add_argument('--max-length', type=int, default=DEFAULT_MAX_LENGTH, help='conditions per rule')
+    parser.add_argument('--max-rules', type=int, default=DEFAULT_MAX_RULES)
+    parser.add_argument('--max-transactions', type=int, default=DEFAULT_MAX_TRANSACTIONS)
+    parser.add_argument('--output', help='write the mined rules here as a policy bundle')
+    args = parser.parse_args()
+
+    if args.log_dir:
+        from app.authorization.log_store import SegmentedLogStore
+        records = SegmentedLogStore(args.log_dir).iter_records()
+    else:
+        records = read_ndjson(args.input)
+    try:
+        report = mine(
+            records,
+            max_transactions=args.max_transactions,
+            min_support=args.min_support,
+            min_confidence=args.min_confidence,
+            max_length=args.max_length,
+            max_rules=args.max_rules
+        )
+    except ValueError as e:
+        sys.exit(f"Mining failed: {e}")
+
+    print(json.dumps(report.to_dict(), indent=2))
+    if args.output:
+        from app.authorization.policy_bundle import write_bundle
+        write_bundle(args.output, report.authorization_rules(), 'mined')
+
+
+if __name__ == '__main__':
+    main()
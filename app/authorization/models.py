@@ -23,6 +23,15 @@ class Environment:
             'business_hours': self.business_hours
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Environment':
+        return cls(
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            ip_address=data.get('ip_address'),
+            location=data.get('location'),
+            business_hours=data.get('business_hours', True)
+        )
+
 
 @dataclass
 class ActionAttributes:
@@ -36,6 +45,10 @@ class ActionAttributes:
             'type': self.type
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ActionAttributes':
+        return cls(amount=data.get('amount'), type=data.get('type', ''))
+
 
 @dataclass
 class AuthorizationRequest:
@@ -55,6 +68,16 @@ class AuthorizationRequest:
             'action_attributes': self.action_attributes.to_dict()
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AuthorizationRequest':
+        return cls(
+            user=User.from_dict(data['user']),
+            action=data['action'],
+            resource=Account.from_dict(data['resource']),
+            environment=Environment.from_dict(data['environment']),
+            action_attributes=ActionAttributes.from_dict(data['action_attributes'])
+        )
+
 
 @dataclass
 class AuthorizationDecision:
@@ -75,3 +98,14 @@ class AuthorizationDecision:
         if self.request:
             result['request'] = self.request.to_dict()
         return result
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AuthorizationDecision':
+        request = data.get('request')
+        return cls(
+            decision=data['decision'],
+            reason=data['reason'],
+            evaluated_rules=list(data.get('evaluated_rules', [])),
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            request=AuthorizationRequest.from_dict(request) if request else None
+        )
@@ -0,0 +1,200 @@
+"""
+Versioned policy bundles: rule sets loaded from JSON or YAML files.
+
+A bundle is an object with a ``version`` label and a list of declarative
+rules in the form ``AuthorizationRule.to_dict`` produces:
+
+    {
+      "version": "2024-06-01.1",
+      "rules": [
+        {"id": "basic_access", "name": "Basic Access Rule", "priority": 100, "effect": "permit",
+         "conditions": [{"attribute": "user.attributes.role", "operator": "in", "value": ["editor"]}]}
+      ]
+    }
+
+Loading parses, validates and compiles the whole bundle into a
+``PolicySnapshot`` before anything is swapped in, so a bad bundle leaves
+the rules in force untouched. YAML bundles (``.yaml``/``.yml``) need
+PyYAML. To write the built-in rules out as a starting bundle:
+
+    python -m app.authorization.policy_bundle policy.json --version 1
+"""
+
+import argparse
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from app.authorization.engine import PolicySnapshot
+from app.authorization.rules import AuthorizationRule
+
+YAML_SUFFIXES = ('.yaml', '.yml')
+
+
+def parse_bundle(data: Any, source: Optional[str] = None) -> PolicySnapshot:
+    """Validate a decoded bundle and compile it; raises ValueError if it is invalid."""
+    if not isinstance(data, dict):
+        raise ValueError("Policy bundle must be an object")
+    version = data.get('version')
+    if not isinstance(version, (str, int)) or isinstance(version, bool) or version == '':
+        raise ValueError("Policy bundle requires a 'version' string")
+    rules_data = data.get('rules')
+    if not isinstance(rules_data, list):
+        raise ValueError("Policy bundle requires a 'rules' list")
+
+    rules = []
+    seen = set()
+    for position, rule_data in enumerate(rules_data):
+        try:
+            rule = AuthorizationRule.from_dict(rule_data)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid rule at position {position}: {e}")
+        if rule.effect not in ('permit', 'deny'):
+            raise ValueError(f"Rule {rule.id} has invalid effect: {rule.effect}")
+        if rule.id in seen:
+            raise ValueError(f"Duplicate rule ID: {rule.id}")
+        seen.add(rule.id)
+        rules.append(rule)
+
+    return PolicySnapshot(rules, version=str(version), source=source)
+
+
+def load_bundle(path: str) -> PolicySnapshot:
+    """Read and compile the bundle at ``path``."""
+    return parse_bundle(read_bundle(path), source=path)
+
+
+def read_bundle(path: str) -> Any:
+    """The decoded, not yet validated, content of a bundle file."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    if path.endswith(YAML_SUFFIXES):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML policy bundles require PyYAML")
+        try:
+            data = yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {path}: {e}")
+    else:
+        try:
+            data = json.loads(content)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}")
+    return data
+
+
+def write_bundle(path: str, rules: Sequence[AuthorizationRule], version: str):
+    """Write ``rules`` as a JSON bundle, replacing ``path`` atomically."""
+    data = {'version': str(version), 'rules': [rule.to_dict() for rule in rules]}
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class BundleLoader:
+    """
+    Loads a bundle file and hands each compiled snapshot to ``apply``.
+
+    ``load`` only reads the bundle, for setting up the first rules;
+    ``reload`` also applies it. ``check`` reloads when the file's
+    modification time or size changed since the last load;
+    ``watch`` calls it from a background thread. A bundle that fails to
+    load is reported in ``last_error`` and the previous rules stay in force.
+    """
+
+    def __init__(self, path: str, apply: Optional[Callable[[PolicySnapshot], Any]] = None):
+        self.path = path
+        self.apply = apply
+        self.snapshot: Optional[PolicySnapshot] = None
+        self.last_error: Optional[str] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> PolicySnapshot:
+        """Load the bundle without applying it; raises ValueError or OSError on failure."""
+        with self._lock:
+            return self._load(apply=False)
+
+    def reload(self) -> PolicySnapshot:
+        """Load the bundle now and apply it; raises ValueError or OSError on failure."""
+        with self._lock:
+            return self._load(apply=True)
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last load; returns whether it did."""
+        try:
+            if self._read_signature() == self._signature:
+                return False
+            self.reload()
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+            return False
+        except Exception as e:
+            # Nothing a bad bundle or ``apply`` raises may end the watch thread
+            self.last_error = f"{type(e).__name__}: {e}"
+            return False
+        return True
+
+    def watch(self, interval: float = 1.0):
+        """Check the file every ``interval`` seconds from a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='policy-bundle-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'watching': self._thread is not None,
+            'last_error': self.last_error
+        }
+
+    def _load(self, apply: bool) -> PolicySnapshot:
+        try:
+            signature = self._read_signature()
+            snapshot = load_bundle(self.path)
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+            raise
+        if apply:
+            self.apply(snapshot)
+        self.snapshot = snapshot
+        self._signature = signature
+        self.last_error = None
+        return snapshot
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            self.check()
+
+    def _read_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write the built-in rules as a policy bundle.')
+    parser.add_argument('path')
+    parser.add_argument('--version', default='1')
+    args = parser.parse_args()
+
+    from app.authorization.banking_rules import create_all_rules
+    write_bundle(args.path, create_all_rules(), args.version)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+What-if replay: which logged decisions a candidate rule set would flip.
+
+Recorded requests are re-evaluated against a candidate policy bundle and
+compared with the decision that was logged. Work is split into tasks that
+a process pool evaluates independently:
+
+- a ``SegmentedLogStore`` directory is replayed one segment per task, each
+  worker reading its segment straight from disk;
+- an NDJSON export (optionally gzipped) is read in chunks of raw lines
+  that workers parse;
+- an in-memory ``DecisionLogger`` is replayed in chunks of records.
+
+Only per-task summaries travel back, and at most ``workers * 2`` tasks are
+in flight, so memory stays flat however long the log is.
+
+    python -m app.authorization.replay candidate.json --log-dir ./decision-logs --workers 8
+    python -m app.authorization.replay candidate.json --input export.ndjson.gz --output report.json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from app.authorization.engine import AuthorizationEngine
+from app.authorization.log_store import SegmentedLogStore, read_segment
+from app.authorization.policy_bundle import parse_bundle, read_bundle
+
+# Rows evaluated together so requests with equal cache keys share one evaluation
+EVALUATION_BATCH = 10000
+
+DEFAULT_CHUNK_SIZE = 50000
+DEFAULT_SAMPLE_SIZE = 20
+
+# Label for decisions no rule made (the engine's default deny)
+DEFAULT_RULE = '(no rule)'
+
+Task = Tuple[str, Any]
+
+
+class ReplayReport:
+    """Flip counts of a replay, merged across tasks."""
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.replayed = 0
+        self.skipped = 0
+        self.flipped = 0
+        # Same decision, made by a different rule
+        self.rule_changed = 0
+        self.by_direction: Dict[str, int] = {}
+        self.by_rule: Dict[str, int] = {}
+        self.by_previous_rule: Dict[str, int] = {}
+        self.by_action: Dict[str, int] = {}
+        self.by_role: Dict[str, int] = {}
+        self.samples: List[Dict[str, Any]] = []
+
+    def add_flip(self, record: Dict[str, Any], request: Dict[str, Any], decision: str, rule: str):
+        previous_rule = _deciding_rule(record.get('evaluated_rules'))
+        self.flipped += 1
+        _count(self.by_direction, f"{record['decision']}->{decision}")
+        _count(self.by_rule, rule)
+        _count(self.by_previous_rule, previous_rule)
+        _count(self.by_action, request.get('action'))
+        _count(self.by_role, (request.get('user') or {}).get('attributes', {}).get('role'))
+        if len(self.samples) < self.sample_size:
+            self.samples.append({
+                'seq': record.get('seq'),
+                'timestamp': record.get('timestamp'),
+                'user_id': (request.get('user') or {}).get('id'),
+                'resource_id': (request.get('resource') or {}).get('id'),
+                'action': request.get('action'),
+                'previous': {'decision': record['decision'], 'rule': previous_rule},
+                'candidate': {'decision': decision, 'rule': rule}
+            })
+
+    def merge(self, other: 'ReplayReport'):
+        self.replayed += other.replayed
+        self.skipped += other.skipped
+        self.flipped += other.flipped
+        self.rule_changed += other.rule_changed
+        for name in ('by_direction', 'by_rule', 'by_previous_rule', 'by_action', 'by_role'):
+            counts = getattr(self, name)
+            for key, count in getattr(other, name).items():
+                counts[key] = counts.get(key, 0) + count
+        room = self.sample_size - len(self.samples)
+        if room > 0:
+            self.samples.extend(other.samples[:room])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'replayed': self.replayed,
+            'skipped': self.skipped,
+            'flipped': self.flipped,
+            'flip_rate': self.flipped / self.replayed if self.replayed else 0.0,
+            'rule_changed': self.rule_changed,
+            'by_direction': self.by_direction,
+            'by_rule': self.by_rule,
+            'by_previous_rule': self.by_previous_rule,
+            'by_action': self.by_action,
+            'by_role': self.by_role,
+            'samples': self.samples
+        }
+
+
+def _count(counts: Dict[Any, int], key: Any):
+    key = str(key) if key is not None else 'unknown'
+    counts[key] = counts.get(key, 0) + 1
+
+
+def _deciding_rule(evaluated_rules: Optional[List[str]]) -> str:
+    return evaluated_rules[-1] if evaluated_rules else DEFAULT_RULE
+
+
+def _as_attributes(value: Any) -> Any:
+    """Nested dicts as objects, so the rules' attribute paths resolve on them."""
+    if value.__class__ is dict:
+        return SimpleNamespace(**{key: _as_attributes(item) for key, item in value.items()})
+    return value
+
+
+def as_request(request: Dict[str, Any]) -> SimpleNamespace:
+    """A logged request dict as an object the engine can evaluate."""
+    result = _as_attributes(request)
+    environment = getattr(result, 'environment', None)
+    timestamp = getattr(environment, 'timestamp', None)
+    if isinstance(timestamp, str):
+        try:
+            environment.timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            pass
+    return result
+
+
+def replay_records(
+    engine: AuthorizationEngine,
+    records: Iterable[Dict[str, Any]],
+    sample_size: int = DEFAULT_SAMPLE_SIZE
+) -> ReplayReport:
+    """Replay records in this process (what each worker runs on its task)."""
+    report = ReplayReport(sample_size)
+    batch: List[Tuple[Dict[str, Any], Dict[str, Any], SimpleNamespace]] = []
+
+    def evaluate():
+        decisions = engine.evaluate_batch([request for _, _, request in batch])
+        for (record, request_dict, _), decision in zip(batch, decisions):
+            rule = _deciding_rule(decision.evaluated_rules)
+            if decision.decision != record['decision']:
+                report.add_flip(record, request_dict, decision.decision, rule)
+            elif rule != _deciding_rule(record.get('evaluated_rules')):
+                report.rule_changed += 1
+        report.replayed += len(batch)
+        batch.clear()
+
+    for record in records:
+        request = record.get('request')
+        if not request or 'decision' not in record:
+            report.skipped += 1
+            continue
+        batch.append((record, request, as_request(request)))
+        if len(batch) >= EVALUATION_BATCH:
+            evaluate()
+    if batch:
+        evaluate()
+    return report
+
+
+# Per-process state of pool workers
+_worker_engine: Optional[AuthorizationEngine] = None
+_worker_sample_size = DEFAULT_SAMPLE_SIZE
+
+
+def _init_worker(bundle: Dict[str, Any], sample_size: int):
+    global _worker_engine, _worker_sample_size
+    _worker_engine = make_engine(bundle)
+    _worker_sample_size = sample_size
+
+
+def _run_pool_task(task: Task) -> ReplayReport:
+    return run_task(task, _worker_engine, _worker_sample_size)
+
+
+def run_task(task: Task, engine: AuthorizationEngine, sample_size: int = DEFAULT_SAMPLE_SIZE) -> ReplayReport:
+    """Replay the records of one task."""
+    kind, payload = task
+    if kind == 'segment':
+        records = read_segment(payload)
+    elif kind == 'lines':
+        records = (json.loads(line) for line in payload if line.strip())
+    else:
+        records = payload
+    return replay_records(engine, records, sample_size)
+
+
+def make_engine(bundle: Dict[str, Any]) -> AuthorizationEngine:
+    """An engine running the candidate bundle, without cache or metrics."""
+    engine = AuthorizationEngine()
+    engine.swap_policy(parse_bundle(bundle))
+    return engine
+
+
+def segment_tasks(store: Union[SegmentedLogStore, str]) -> Iterator[Task]:
+    """One task per segment of a store (or store directory)."""
+    if isinstance(store, str):
+        store = SegmentedLogStore(store)
+    else:
+        store.flush()
+    for _, path in store.segments():
+        yield 'segment', path
+
+
+def line_tasks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Task]:
+    """Chunks of raw lines of an NDJSON export; ``.gz`` files are decompressed."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield 'lines', chunk
+                chunk = []
+        if chunk:
+            yield 'lines', chunk
+
+
+def record_tasks(records: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Task]:
+    """Chunks of record dicts."""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield 'records', chunk
+            chunk = []
+    if chunk:
+        yield 'records', chunk
+
+
+def logger_tasks(logger, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Task]:
+    """Tasks covering every decision of a ``DecisionLogger`` or ``RemoteDecisionLogger``.
+
+    A logger writing to segments is replayed from them (after flushing
+    queued decisions); any other from its export, which a remote logger
+    reads from the aggregator one page at a time.
+    """
+    logger.flush()
+    if logger.store is not None:
+        return segment_tasks(logger.store)
+    records, _ = logger.export_records()
+    return record_tasks(records, chunk_size)
+
+
+def replay(
+    bundle: Dict[str, Any],
+    tasks: Iterable[Task],
+    workers: Optional[int] = None,
+    sample_size: int = DEFAULT_SAMPLE_SIZE
+) -> ReplayReport:
+    """
+    Replay ``tasks`` against the rules of ``bundle`` (a decoded policy bundle).
+
+    ``workers`` processes share the tasks (all CPUs by default); with 0 the
+    replay runs in this process. Samples are the first flips in task order.
+    """
+    # Fail on an invalid bundle before starting any process
+    engine = make_engine(bundle)
+    report = ReplayReport(sample_size)
+    if workers == 0:
+        for task in tasks:
+            report.merge(run_task(task, engine, sample_size))
+        return report
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(bundle, sample_size)) as executor:
+        for partial in _ordered_map(executor, tasks, workers * 2):
+            report.merge(partial)
+    return report
+
+
+def _ordered_map(executor: Executor, tasks: Iterable[Task], in_flight: int) -> Iterator[ReplayReport]:
+    """Results in task order, submitting at most ``in_flight`` tasks ahead."""
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(_run_pool_task, task))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('bundle', help='candidate policy bundle (JSON or YAML)')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--log-dir', help='decision log segment directory')
+    source.add_argument('--input', help='NDJSON export, optionally gzipped')
+    parser.add_argument('--workers', type=int, help='worker processes (default: all CPUs, 0: none)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='lines per task for --input')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLE_SIZE, help='flipped decisions to include')
+    parser.add_argument('--output', help='write the report here instead of stdout')
+    args = parser.parse_args()
+
+    tasks = segment_tasks(args.log_dir) if args.log_dir else line_tasks(args.input, args.chunk_size)
+    try:
+        bundle = read_bundle(args.bundle)
+        report = replay(bundle, tasks, workers=args.workers, sample_size=args.samples)
+    except ValueError as e:
+        sys.exit(f"Replay failed: {e}")
+
+    output = json.dumps(report.to_dict(), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""Partial evaluation of rules into residual predicates over one request entity."""
+
+from dataclasses import dataclass, field, replace
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from app.authorization.conditions import AttributeRef, Condition, OPERATORS
+from app.authorization.rules import AuthorizationRule
+
+# Request sides that can be left unknown
+UNKNOWN_SIDES = ('resource', 'user')
+
+NEGATED_OPERATORS = {
+    'eq': 'ne', 'ne': 'eq',
+    'lt': 'ge', 'ge': 'lt',
+    'le': 'gt', 'gt': 'le',
+    'in': 'not_in', 'not_in': 'in'
+}
+
+# Operator to use when the unknown attribute moves to the left side
+FLIPPED_OPERATORS = {'eq': 'eq', 'ne': 'ne', 'lt': 'gt', 'le': 'ge', 'gt': 'lt', 'ge': 'le'}
+
+SQL_OPERATORS = {
+    'eq': '=', 'ne': '!=',
+    'lt': '<', 'le': '<=',
+    'gt': '>', 'ge': '>=',
+    'in': 'IN', 'not_in': 'NOT IN'
+}
+
+_SYMBOLS = {
+    'eq': '==', 'ne': '!=',
+    'lt': '<', 'le': '<=',
+    'gt': '>', 'ge': '>=',
+    'in': 'in', 'not_in': 'not in'
+}
+
+# (where clause, parameters, whether the clause is the whole predicate)
+SQLFilter = Tuple[str, List[Any], bool]
+
+
+class Residual:
+    """
+    Predicate over a single user or resource, left after partial evaluation.
+
+    ``sql`` and ``lookup`` narrow a store to the entities that may match;
+    ``evaluate`` is the exact test. Paths are relative to the entity, e.g.
+    ``attributes.status``.
+    """
+
+    def evaluate(self, entity) -> bool:
+        raise NotImplementedError
+
+    def negate(self) -> 'Residual':
+        raise NotImplementedError
+
+    def sql(self, columns: Dict[str, str]) -> Optional[SQLFilter]:
+        """A WHERE clause using ``columns`` (path -> column), or None if it cannot narrow."""
+        return None
+
+    def lookup(self, find: Callable[['Compare'], Optional[Set[str]]]) -> Optional[Set[str]]:
+        """A superset of the matching IDs from per-comparison index lookups, or None."""
+        return None
+
+    def to_dict(self) -> Any:
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class Constant(Residual):
+    """Predicate that no longer depends on the entity."""
+    value: bool
+
+    def evaluate(self, entity) -> bool:
+        return self.value
+
+    def negate(self) -> Residual:
+        return FALSE if self.value else TRUE
+
+    def sql(self, columns: Dict[str, str]) -> Optional[SQLFilter]:
+        return ('1' if self.value else '0', [], True)
+
+    def lookup(self, find) -> Optional[Set[str]]:
+        return None if self.value else set()
+
+    def to_dict(self) -> Any:
+        return self.value
+
+    def __str__(self) -> str:
+        return 'TRUE' if self.value else 'FALSE'
+
+
+TRUE = Constant(True)
+FALSE = Constant(False)
+
+
+@dataclass(frozen=True)
+class Compare(Residual):
+    """``path <operator> value``, where value is a literal or an AttributeRef to the same entity."""
+    path: str
+    operator: str
+    value: Any
+
+    def evaluate(self, entity) -> bool:
+        try:
+            value = self.value
+            if isinstance(value, AttributeRef):
+                value = attrgetter(value.path)(entity)
+            return bool(OPERATORS[self.operator](attrgetter(self.path)(entity), value))
+        except Exception:
+            return False
+
+    def accepts(self, attribute: Any) -> bool:
+        """Whether an attribute value satisfies a comparison with a literal."""
+        try:
+            return bool(OPERATORS[self.operator](attribute, self.value))
+        except Exception:
+            return False
+
+    def negate(self) -> Residual:
+        return Compare(self.path, NEGATED_OPERATORS[self.operator], self.value)
+
+    def sql(self, columns: Dict[str, str]) -> Optional[SQLFilter]:
+        column = columns.get(self.path)
+        if column is None:
+            return None
+        operator = SQL_OPERATORS[self.operator]
+        value = self.value
+        if isinstance(value, AttributeRef):
+            other = columns.get(value.path)
+            if other is None:
+                return None
+            return (f"{column} {operator} {other}", [], True)
+        if self.operator in ('in', 'not_in'):
+            if not isinstance(value, (frozenset, set, list, tuple)):
+                return None
+            if not value:
+                return ('0' if self.operator == 'in' else '1', [], True)
+            values = sorted(value, key=repr)
+            return (f"{column} {operator} ({', '.join('?' for _ in values)})", values, True)
+        if not isinstance(value, (str, int, float)):
+            return None
+        return (f"{column} {operator} ?", [value], True)
+
+    def lookup(self, find) -> Optional[Set[str]]:
+        if isinstance(self.value, AttributeRef):
+            return None
+        return find(self)
+
+    def to_dict(self) -> Any:
+        value = self.value
+        if isinstance(value, AttributeRef):
+            value = {'ref': value.path}
+        elif isinstance(value, (frozenset, set)):
+            value = sorted(value, key=repr)
+        return {'attribute': self.path, 'operator': self.operator, 'value': value}
+
+    def __str__(self) -> str:
+        value = self.value
+        if isinstance(value, AttributeRef):
+            value = value.path
+        elif isinstance(value, (frozenset, set)):
+            value = '(' + ', '.join(repr(item) for item in sorted(value, key=repr)) + ')'
+        else:
+            value = repr(value)
+        return f"{self.path} {_SYMBOLS[self.operator]} {value}"
+
+
+@dataclass(frozen=True)
+class Opaque(Residual):
+    """A test that can only be run in Python, such as a rule with a ``condition`` callable."""
+    label: str
+    test: Callable[[Any], bool] = field(compare=False)
+
+    def evaluate(self, entity) -> bool:
+        try:
+            return bool(self.test(entity))
+        except Exception:
+            return False
+
+    def negate(self) -> Residual:
+        return Not(self)
+
+    def to_dict(self) -> Any:
+        return {'opaque': self.label}
+
+    def __str__(self) -> str:
+        return f"<{self.label}>"
+
+
+@dataclass(frozen=True)
+class Not(Residual):
+    """Negation of an opaque test (comparisons are negated in place)."""
+    term: Residual
+
+    def evaluate(self, entity) -> bool:
+        return not self.term.evaluate(entity)
+
+    def negate(self) -> Residual:
+        return self.term
+
+    def to_dict(self) -> Any:
+        return {'not': self.term.to_dict()}
+
+    def __str__(self) -> str:
+        return f"NOT {self.term}"
+
+
+@dataclass(frozen=True)
+class And(Residual):
+    """All terms hold."""
+    terms: Tuple[Residual, ...]
+
+    def evaluate(self, entity) -> bool:
+        for term in self.terms:
+            if not term.evaluate(entity):
+                return False
+        return True
+
+    def negate(self) -> Residual:
+        return any_of(term.negate() for term in self.terms)
+
+    def sql(self, columns: Dict[str, str]) -> Optional[SQLFilter]:
+        # Terms that cannot be expressed are left to evaluate()
+        clauses = []
+        params: List[Any] = []
+        exact = True
+        for term in self.terms:
+            translated = term.sql(columns)
+            if translated is None:
+                exact = False
+                continue
+            clauses.append(f"({translated[0]})")
+            params.extend(translated[1])
+            exact = exact and translated[2]
+        if not clauses:
+            return None
+        return (' AND '.join(clauses), params, exact)
+
+    def lookup(self, find) -> Optional[Set[str]]:
+        matched = None
+        for term in self.terms:
+            ids = term.lookup(find)
+            if ids is not None:
+                matched = ids if matched is None else matched & ids
+                if not matched:
+                    break
+        return matched
+
+    def to_dict(self) -> Any:
+        return {'and': [term.to_dict() for term in self.terms]}
+
+    def __str__(self) -> str:
+        return ' AND '.join(f"({term})" if isinstance(term, Or) else str(term) for term in self.terms)
+
+
+@dataclass(frozen=True)
+class Or(Residual):
+    """At least one term holds."""
+    terms: Tuple[Residual, ...]
+
+    def evaluate(self, entity) -> bool:
+        for term in self.terms:
+            if term.evaluate(entity):
+                return True
+        return False
+
+    def negate(self) -> Residual:
+        return all_of(term.negate() for term in self.terms)
+
+    def sql(self, columns: Dict[str, str]) -> Optional[SQLFilter]:
+        clauses = []
+        params: List[Any] = []
+        exact = True
+        for term in self.terms:
+            translated = term.sql(columns)
+            if translated is None:
+                return None
+            clauses.append(f"({translated[0]})")
+            params.extend(translated[1])
+            exact = exact and translated[2]
+        return (' OR '.join(clauses), params, exact)
+
+    def lookup(self, find) -> Optional[Set[str]]:
+        matched: Set[str] = set()
+        for term in self.terms:
+            ids = term.lookup(find)
+            if ids is None:
+                return None
+            matched |= ids
+        return matched
+
+    def to_dict(self) -> Any:
+        return {'or': [term.to_dict() for term in self.terms]}
+
+    def __str__(self) -> str:
+        return ' OR '.join(f"({term})" if isinstance(term, And) else str(term) for term in self.terms)
+
+
+def all_of(terms) -> Residual:
+    """Conjunction of terms, simplified."""
+    flat: List[Residual] = []
+    for term in terms:
+        if term == FALSE:
+            return FALSE
+        if term == TRUE:
+            continue
+        for part in (term.terms if isinstance(term, And) else (term,)):
+            if part not in flat:
+                flat.append(part)
+    if not flat:
+        return TRUE
+    return flat[0] if len(flat) == 1 else And(tuple(flat))
+
+
+def any_of(terms) -> Residual:
+    """Disjunction of terms, simplified."""
+    flat: List[Residual] = []
+    for term in terms:
+        if term == TRUE:
+            return TRUE
+        if term == FALSE:
+            continue
+        for part in (term.terms if isinstance(term, Or) else (term,)):
+            if part not in flat:
+                flat.append(part)
+    if not flat:
+        return FALSE
+    return flat[0] if len(flat) == 1 else Or(tuple(flat))
+
+
+def partial_evaluate(rules: Sequence[AuthorizationRule], request, unknown: str = 'resource') -> Residual:
+    """
+    Specialize prioritized rules to a request whose ``unknown`` side is None.
+
+    The result holds for an entity exactly when the engine would permit the
+    request with that entity filled in: the first matching rule (in the
+    given order) decides, and no match is a deny. Comparisons are negated
+    in place (``not status == 'inactive'`` becomes ``status != 'inactive'``),
+    which assumes attribute values are comparable, as model validation
+    ensures.
+    """
+    if unknown not in UNKNOWN_SIDES:
+        raise ValueError(f"Invalid unknown side: {unknown}. Must be one of: {', '.join(UNKNOWN_SIDES)}")
+
+    # Decide from the lowest priority rule up: a permit rule adds its match,
+    # a deny rule removes its match from everything below it
+    result: Residual = FALSE
+    for rule in reversed(rules):
+        if rule.effect == 'permit':
+            result = any_of((_specialize_rule(rule, request, unknown), result))
+        elif rule.effect == 'deny':
+            result = all_of((_specialize_rule(rule, request, unknown).negate(), result))
+    return result
+
+
+def _specialize_rule(rule: AuthorizationRule, request, unknown: str) -> Residual:
+    if not rule.is_declarative:
+        return Opaque(f"rule {rule.id}", lambda entity: rule.evaluate(replace(request, **{unknown: entity})))
+    terms = []
+    for condition in rule.conditions:
+        term = _specialize_condition(condition, request, unknown)
+        if term == FALSE:
+            return FALSE
+        terms.append(term)
+    return all_of(terms)
+
+
+def _specialize_condition(condition: Condition, request, unknown: str) -> Residual:
+    root = unknown + '.'
+    value = condition.value
+    left_unknown = condition.attribute.startswith(root)
+    right_unknown = isinstance(value, AttributeRef) and value.path.startswith(root)
+    try:
+        if not left_unknown and not right_unknown:
+            return TRUE if condition.evaluate(request) else FALSE
+        if left_unknown:
+            path = condition.attribute[len(root):]
+            if right_unknown:
+                return Compare(path, condition.operator, AttributeRef(value.path[len(root):]))
+            if isinstance(value, AttributeRef):
+                value = attrgetter(value.path)(request)
+            return Compare(path, condition.operator, value)
+        known = attrgetter(condition.attribute)(request)
+    except Exception:
+        # A condition that fails to evaluate does not match
+        return FALSE
+
+    operator = FLIPPED_OPERATORS.get(condition.operator)
+    if operator is None:
+        return Opaque(
+            f"{condition.attribute} {condition.operator} {value.path}",
+            lambda entity: condition.evaluate(replace(request, **{unknown: entity}))
+        )
+    return Compare(value.path[len(root):], operator, known)
@@ -0,0 +1,105 @@
+"""Versioned rule sets shared by worker processes through SQLite."""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import List, Optional, Sequence, Tuple
+from app.authorization.engine import AuthorizationEngine
+from app.authorization.rules import AuthorizationRule
+
+
+class RuleStore:
+    """
+    Rule sets published as numbered versions in a SQLite database.
+
+    Each ``publish`` stores the whole rule set as JSON under the next
+    version, so every process that loads a version sees the same rules.
+    Only declarative rules can be published.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rule_sets ("
+                "version INTEGER PRIMARY KEY, rules TEXT NOT NULL, published REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        connection.execute('PRAGMA journal_mode=WAL')
+        return connection
+
+    def publish(self, rules: Sequence[AuthorizationRule], only_if_empty: bool = False) -> int:
+        """
+        Store ``rules`` as a new version and return it.
+
+        With ``only_if_empty`` nothing is written when a version already
+        exists (the latest version is returned), so that concurrently
+        starting workers seed the store exactly once.
+        """
+        data = json.dumps([rule.to_dict() for rule in rules], separators=(',', ':'))
+        with closing(self._connect()) as connection, connection:
+            connection.execute('BEGIN IMMEDIATE')
+            latest = connection.execute("SELECT MAX(version) FROM rule_sets").fetchone()[0] or 0
+            if only_if_empty and latest:
+                return latest
+            connection.execute(
+                "INSERT INTO rule_sets (version, rules, published) VALUES (?, ?, ?)",
+                (latest + 1, data, time.time())
+            )
+            return latest + 1
+
+    def latest_version(self) -> int:
+        """The newest published version, or 0 if there is none."""
+        with closing(self._connect()) as connection:
+            return connection.execute("SELECT MAX(version) FROM rule_sets").fetchone()[0] or 0
+
+    def load(self, version: Optional[int] = None) -> Tuple[int, List[AuthorizationRule]]:
+        """A published version (the latest by default) and its rules."""
+        with closing(self._connect()) as connection:
+            if version is None:
+                row = connection.execute(
+                    "SELECT version, rules FROM rule_sets ORDER BY version DESC LIMIT 1"
+                ).fetchone()
+            else:
+                row = connection.execute(
+                    "SELECT version, rules FROM rule_sets WHERE version = ?", (version,)
+                ).fetchone()
+        if row is None:
+            raise ValueError(f"Rule set version {version} does not exist" if version else "No rule set published")
+        return row[0], [AuthorizationRule.from_dict(rule) for rule in json.loads(row[1])]
+
+
+class RuleSync:
+    """Keeps an engine on the latest version in a ``RuleStore``, polling at most every ``interval`` seconds."""
+
+    def __init__(self, store: RuleStore, engine: AuthorizationEngine, interval: float = 1.0):
+        self.store = store
+        self.engine = engine
+        self.interval = interval
+        self.version = 0
+        self._checked = float('-inf')
+        self._lock = threading.Lock()
+
+    def check(self, force: bool = False) -> bool:
+        """Load a newer rule set if one was published; returns whether rules changed.
+
+        ``force`` looks at the store even if it was polled less than
+        ``interval`` seconds ago.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.interval:
+            return False
+        with self._lock:
+            if not force and now - self._checked < self.interval:
+                return False
+            self._checked = now
+            if self.store.latest_version() == self.version:
+                return False
+            self.version, rules = self.store.load()
+            self.engine.set_rules(rules, version=str(self.version))
+            return True
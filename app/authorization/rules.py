@@ -1,18 +1,60 @@
 """Authorization rules for ABAC evaluation."""
 
-from typing import Callable
+from typing import Any, Callable, Dict, List, Optional
 from dataclasses import dataclass
 from app.authorization.models import AuthorizationRequest
+from app.authorization.conditions import Condition, compile_conditions
 
 
 @dataclass
 class AuthorizationRule:
-    """Authorization rule with condition and priority."""
+    """Authorization rule with condition and priority.
+
+    A rule is given either an opaque ``condition`` callable or a list of
+    declarative ``conditions`` that must all hold. Declarative rules can be
+    indexed by the engine's decision table; opaque rules are always tried.
+    """
     id: str
     name: str
-    condition: Callable[[AuthorizationRequest], bool]
-    priority: int
+    condition: Optional[Callable[[AuthorizationRequest], bool]] = None
+    priority: int = 0
     effect: str = 'permit'  # 'permit' or 'deny'
+    conditions: Optional[List[Condition]] = None
+
+    def __post_init__(self):
+        if self.conditions is not None:
+            if self.condition is not None:
+                raise ValueError(f"Rule {self.id} cannot have both condition and conditions")
+            self.condition = compile_conditions(self.conditions)
+        elif self.condition is None:
+            raise ValueError(f"Rule {self.id} requires a condition or conditions")
+
+    @property
+    def is_declarative(self) -> bool:
+        """Whether the rule is built from declarative conditions."""
+        return self.conditions is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form of a declarative rule; opaque rules cannot be serialized."""
+        if not self.is_declarative:
+            raise ValueError(f"Rule {self.id} has an opaque condition and cannot be serialized")
+        return {
+            'id': self.id,
+            'name': self.name,
+            'priority': self.priority,
+            'effect': self.effect,
+            'conditions': [condition.to_dict() for condition in self.conditions]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AuthorizationRule':
+        return cls(
+            id=data['id'],
+            name=data['name'],
+            priority=data.get('priority', 0),
+            effect=data.get('effect', 'permit'),
+            conditions=[Condition.from_dict(condition) for condition in data['conditions']]
+        )
 
     def evaluate(self, request: AuthorizationRequest) -> bool:
         """Evaluate the rule condition."""
@@ -0,0 +1,235 @@
+"""Vectorized NumPy evaluation of declarative authorization rules."""
+
+from typing import Any, Dict, List, Sequence
+from datetime import datetime
+from operator import attrgetter
+import numpy as np
+from app.authorization.models import AuthorizationRequest, AuthorizationDecision
+from app.authorization.rules import AuthorizationRule
+from app.authorization.conditions import Condition, SET_OPERATORS
+
+NO_MATCH = -1
+
+_NUMPY_OPERATORS = {
+    'eq': np.equal,
+    'ne': np.not_equal,
+    'lt': np.less,
+    'le': np.less_equal,
+    'gt': np.greater,
+    'ge': np.greater_equal
+}
+
+
+class _Unsupported(Exception):
+    """Raised when a condition cannot be evaluated on the encoded columns."""
+
+
+class _Column:
+    """One request attribute, integer-coded and (when possible) numeric."""
+
+    def __init__(self, values: List[Any], valid: np.ndarray, vocabulary: Dict[Any, int]):
+        self.valid = valid
+        self.codes = None
+        self.numeric = None
+
+        try:
+            distinct = dict.fromkeys(values)
+        except TypeError:
+            # Unhashable values: equality tests fall back to scalar evaluation
+            distinct = None
+
+        if distinct is not None:
+            for value in distinct:
+                if value not in vocabulary:
+                    vocabulary[value] = len(vocabulary)
+            self.codes = np.fromiter(map(vocabulary.__getitem__, values), dtype=np.int32, count=len(values))
+            self.codes[~valid] = NO_MATCH
+            kinds = distinct
+        else:
+            kinds = values
+
+        if all(value is None or isinstance(value, (bool, int, float)) for value in kinds):
+            if None in kinds:
+                values = [np.nan if value is None else value for value in values]
+            self.numeric = np.fromiter(values, dtype=np.float64, count=len(values))
+            self.numeric[~valid] = np.nan
+
+
+class RequestColumns:
+    """Authorization requests encoded as one NumPy column per attribute.
+
+    All categorical columns share one vocabulary, so attributes of
+    different entities (such as a user's location and an article's
+    location) can be compared code-to-code. Columns not encoded up front
+    are encoded on first use, so one encoding can serve several rule sets.
+    """
+
+    def __init__(self, requests: Sequence[AuthorizationRequest], paths: Sequence[str] = ()):
+        self.requests = requests
+        self.size = len(requests)
+        self.vocabulary: Dict[Any, int] = {}
+        self.columns: Dict[str, _Column] = {}
+        for path in paths:
+            self.column(path)
+
+    def column(self, path: str) -> _Column:
+        """Column for an attribute path, encoding it if needed."""
+        column = self.columns.get(path)
+        if column is None:
+            column = self.columns[path] = self._encode(path)
+        return column
+
+    def _encode(self, path: str) -> _Column:
+        getter = attrgetter(path)
+        valid = np.ones(self.size, dtype=bool)
+        try:
+            values = [getter(request) for request in self.requests]
+        except Exception:
+            values = []
+            for index, request in enumerate(self.requests):
+                try:
+                    values.append(getter(request))
+                except Exception:
+                    values.append(None)
+                    valid[index] = False
+        return _Column(values, valid, self.vocabulary)
+
+    def code(self, value: Any) -> int:
+        """Code of a literal, or NO_MATCH if no request has that value."""
+        try:
+            return self.vocabulary.get(value, NO_MATCH)
+        except TypeError:
+            raise _Unsupported(f"Unhashable literal: {value!r}")
+
+
+def condition_paths(rules: Sequence[AuthorizationRule]) -> List[str]:
+    """Attribute paths read by the declarative rules."""
+    paths: List[str] = []
+    for rule in rules:
+        for condition in rule.conditions or ():
+            for path in (condition.attribute, getattr(condition.value, 'path', None)):
+                if path is not None and path not in paths:
+                    paths.append(path)
+    return paths
+
+
+def condition_mask(condition: Condition, columns: RequestColumns) -> np.ndarray:
+    """Boolean mask of the rows satisfying a condition."""
+    left = columns.column(condition.attribute)
+    operator = condition.operator
+
+    if condition.compares_attributes:
+        right = columns.column(condition.value.path)
+        valid = left.valid & right.valid
+        if operator in ('eq', 'ne') and left.codes is not None and right.codes is not None:
+            return _NUMPY_OPERATORS[operator](left.codes, right.codes) & valid
+        if operator in _NUMPY_OPERATORS and left.numeric is not None and right.numeric is not None:
+            return _NUMPY_OPERATORS[operator](left.numeric, right.numeric) & valid
+        raise _Unsupported(f"Cannot vectorize {condition}")
+
+    if operator in SET_OPERATORS:
+        if left.codes is None:
+            raise _Unsupported(f"Cannot vectorize {condition}")
+        codes = [columns.code(value) for value in condition.value]
+        mask = np.isin(left.codes, [code for code in codes if code != NO_MATCH])
+        if operator == 'not_in':
+            mask = ~mask
+        return mask & left.valid
+
+    if operator in ('eq', 'ne') and left.codes is not None:
+        return _NUMPY_OPERATORS[operator](left.codes, columns.code(condition.value)) & left.valid
+
+    if left.numeric is not None and isinstance(condition.value, (bool, int, float)):
+        return _NUMPY_OPERATORS[operator](left.numeric, float(condition.value)) & left.valid
+
+    raise _Unsupported(f"Cannot vectorize {condition}")
+
+
+class VectorizedEvaluator:
+    """Evaluates a priority-ordered rule list over whole batches at once.
+
+    Each declarative rule becomes a boolean column (the AND of its
+    condition masks); the first matching rule per row is the argmax over
+    those columns. Opaque rules, and conditions that cannot be expressed
+    on the encoded columns, are evaluated row by row with
+    ``AuthorizationRule.evaluate``, so decisions match the scalar engine.
+    """
+
+    def __init__(self, rules: Sequence[AuthorizationRule]):
+        self.rules = tuple(rules)
+        self.paths = condition_paths(self.rules)
+        self._permits = np.array([rule.effect == 'permit' for rule in self.rules] + [False], dtype=bool)
+        # Rules with an unknown effect are recorded when matched but never decide
+        self._decisive = np.array([rule.effect in ('permit', 'deny') for rule in self.rules], dtype=bool)
+
+    def encode(self, requests: Sequence[AuthorizationRequest]) -> RequestColumns:
+        """Encode requests once; the columns can be reused across rule sets."""
+        return RequestColumns(requests, self.paths)
+
+    def match_matrix(self, columns: RequestColumns) -> np.ndarray:
+        """(rows x rules) boolean matrix of which rules match which rows."""
+        matrix = np.zeros((columns.size, len(self.rules)), dtype=bool)
+        for position, rule in enumerate(self.rules):
+            matrix[:, position] = self._rule_mask(rule, columns)
+        return matrix
+
+    def first_matches(self, columns: RequestColumns) -> np.ndarray:
+        """Index of the first matching decisive rule per row, or NO_MATCH."""
+        return self._first_matches(self.match_matrix(columns))
+
+    def _first_matches(self, matrix: np.ndarray) -> np.ndarray:
+        matrix = matrix & self._decisive
+        if not self.rules:
+            return np.full(matrix.shape[0], NO_MATCH, dtype=np.int64)
+        first = matrix.argmax(axis=1)
+        return np.where(matrix.any(axis=1), first, NO_MATCH)
+
+    def permitted(self, columns: RequestColumns) -> np.ndarray:
+        """Boolean permit mask; rows with no matching rule are denied."""
+        return self._permits[self.first_matches(columns)]
+
+    def evaluate(self, requests: Sequence[AuthorizationRequest]) -> List[AuthorizationDecision]:
+        """Evaluate requests into decisions identical to the scalar engine's."""
+        timestamp = datetime.now()
+        matrix = self.match_matrix(self.encode(requests))
+        first_matches = self._first_matches(matrix).tolist()
+        recorded_only = np.flatnonzero(~self._decisive).tolist()
+
+        decisions = []
+        for row, (request, index) in enumerate(zip(requests, first_matches)):
+            evaluated_rules = [
+                self.rules[position].name for position in recorded_only
+                if matrix[row, position] and (index == NO_MATCH or position < index)
+            ] if recorded_only else []
+            if index == NO_MATCH:
+                decision, reason = 'deny', 'No applicable rules found'
+            else:
+                rule = self.rules[index]
+                evaluated_rules.append(rule.name)
+                if rule.effect == 'permit':
+                    decision, reason = 'permit', f'Permitted by rule: {rule.name}'
+                else:
+                    decision, reason = 'deny', f'Denied by rule: {rule.name}'
+            decisions.append(AuthorizationDecision(
+                decision=decision,
+                reason=reason,
+                evaluated_rules=evaluated_rules,
+                timestamp=timestamp,
+                request=request
+            ))
+        return decisions
+
+    def _rule_mask(self, rule: AuthorizationRule, columns: RequestColumns) -> np.ndarray:
+        if rule.is_declarative:
+            try:
+                mask = np.ones(columns.size, dtype=bool)
+                for condition in rule.conditions:
+                    mask &= condition_mask(condition, columns)
+                return mask
+            except _Unsupported:
+                pass
+        return np.fromiter(
+            (rule.evaluate(request) for request in columns.requests),
+            dtype=bool,
+            count=columns.size
+        )
@@ -0,0 +1,70 @@
+"""Reverse authorization queries: which resources a user may access, and who may access a resource."""
+
+from typing import Any, Dict, List, Optional
+from app.models.datastore import DataStore
+from app.models.user import User
+from app.models.account import Account
+from app.authorization.engine import AuthorizationEngine
+from app.authorization.models import AuthorizationRequest, Environment, ActionAttributes
+from app.authorization.residual import Residual
+
+
+class ReverseQueryResult:
+    """IDs permitted for an action, with the residual filter that selected them."""
+
+    def __init__(self, action: str, residual: Residual):
+        self.action = action
+        self.residual = residual
+        self.ids: List[str] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'action': self.action,
+            'ids': self.ids,
+            'count': len(self.ids),
+            'filter': str(self.residual)
+        }
+
+
+class AccessFinder:
+    """
+    Answers "what may user U access" and "who may access resource R".
+
+    Instead of evaluating every (user, resource) pair, the rules are
+    partially evaluated against the known side into a residual predicate
+    over the other side, which the DataStore answers from its attribute
+    indexes (or as a single SQL query). Results are exactly those of
+    ``evaluate`` on every pair.
+    """
+
+    def __init__(self, datastore: DataStore, auth_engine: AuthorizationEngine):
+        self.datastore = datastore
+        self.auth_engine = auth_engine
+
+    def resources_for(
+        self,
+        user: User,
+        action: str,
+        environment: Environment,
+        action_attributes: Optional[ActionAttributes] = None
+    ) -> ReverseQueryResult:
+        """IDs of the accounts ``user`` may perform ``action`` on."""
+        attributes = action_attributes or ActionAttributes(type=action)
+        probe = AuthorizationRequest(user, action, None, environment, attributes)
+        result = ReverseQueryResult(action, self.auth_engine.partial_evaluate(probe, 'resource'))
+        result.ids = sorted(self.datastore.filter_accounts(result.residual))
+        return result
+
+    def users_for(
+        self,
+        account: Account,
+        action: str,
+        environment: Environment,
+        action_attributes: Optional[ActionAttributes] = None
+    ) -> ReverseQueryResult:
+        """IDs of the users that may perform ``action`` on ``account``."""
+        attributes = action_attributes or ActionAttributes(type=action)
+        probe = AuthorizationRequest(None, action, account, environment, attributes)
+        result = ReverseQueryResult(action, self.auth_engine.partial_evaluate(probe, 'user'))
+        result.ids = sorted(self.datastore.filter_users(result.residual))
+        return result
@@ -48,3 +48,8 @@ class Article:
     def from_dict(cls, data: Dict[str, Any]) -> 'Article':
         attributes = ArticleAttributes(**data['attributes'])
         return cls(id=data['id'], attributes=attributes)
+
+
+# The API, data store and authorization models refer to resources as accounts
+Account = Article
+AccountAttributes = ArticleAttributes
@@ -0,0 +1,55 @@
+"""Asyncio interface to the DataStore."""
+
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, Optional
+from app.models.datastore import DataStore
+from app.models.user import User
+from app.models.account import Account
+
+
+class AsyncDataStore:
+    """
+    Awaitable DataStore operations for code running on an event loop.
+
+    Calls into a backend that waits on I/O (``StorageBackend.blocking``,
+    e.g. SQLite) run on ``executor`` so the loop keeps serving other
+    requests; in-memory lookups are answered directly.
+    """
+
+    def __init__(self, datastore: DataStore, executor: Optional[Executor] = None):
+        self.datastore = datastore
+        self.executor = executor
+
+    async def run(self, function: Callable[..., Any], *args) -> Any:
+        """Run ``function(*args)`` on the executor, e.g. a read-modify-write under ``lock_account``."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+    async def _call(self, function: Callable[..., Any], *args) -> Any:
+        if self.datastore.backend.blocking:
+            return await self.run(function, *args)
+        return function(*args)
+
+    async def get_user(self, user_id: str) -> Optional[User]:
+        return await self._call(self.datastore.get_user, user_id)
+
+    async def get_users(self, user_ids: Iterable[str]) -> Dict[str, User]:
+        return await self._call(self.datastore.get_users, list(user_ids))
+
+    async def get_account(self, account_id: str) -> Optional[Account]:
+        return await self._call(self.datastore.get_account, account_id)
+
+    async def get_accounts(self, account_ids: Iterable[str]) -> Dict[str, Account]:
+        return await self._call(self.datastore.get_accounts, list(account_ids))
+
+    async def create_user(self, user: User) -> User:
+        return await self._call(self.datastore.create_user, user)
+
+    async def create_account(self, account: Account) -> Account:
+        return await self._call(self.datastore.create_account, account)
+
+    async def update_account(self, account: Account) -> Account:
+        """Update an account; for read-modify-write use ``run`` with ``lock_account``."""
+        return await self._call(self.datastore.update_account, account)
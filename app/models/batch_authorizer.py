@@ -0,0 +1,171 @@
+"""Batch authorization checks against stored users and accounts."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from app.models.datastore import DataStore
+from app.authorization.engine import AuthorizationEngine
+from app.authorization.models import AuthorizationRequest, Environment, ActionAttributes
+from app.authorization.decision_logger import DecisionLogger
+
+ENVIRONMENT_FIELDS = ('business_hours', 'ip_address', 'location', 'amount')
+
+
+class BatchResult:
+    """Columnar result of a batch authorization call.
+
+    ``permitted`` and ``rule`` hold one entry per input row. ``rule`` is an
+    index into ``rules`` (the matched rule names) or None when no rule
+    matched. Rows that could not be evaluated are None in both columns
+    and listed in ``errors`` by row index.
+    """
+
+    def __init__(self, count: int):
+        self.count = count
+        self.permitted: List[Optional[bool]] = [None] * count
+        self.rule: List[Optional[int]] = [None] * count
+        self.rules: List[str] = []
+        self.errors: Dict[int, str] = {}
+        self._rule_codes: Dict[str, int] = {}
+
+    def set_decision(self, index: int, permitted: bool, rule_name: Optional[str]):
+        self.permitted[index] = permitted
+        if rule_name is not None:
+            code = self._rule_codes.get(rule_name)
+            if code is None:
+                code = self._rule_codes[rule_name] = len(self.rules)
+                self.rules.append(rule_name)
+            self.rule[index] = code
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'permitted': self.permitted,
+            'rule': self.rule,
+            'rules': self.rules,
+            'errors': {str(index): message for index, message in sorted(self.errors.items())}
+        }
+
+
+class BatchAuthorizer:
+    """Evaluates many (user_id, resource_id, action, env) checks per call."""
+
+    def __init__(
+        self,
+        datastore: DataStore,
+        auth_engine: AuthorizationEngine,
+        decision_logger: DecisionLogger
+    ):
+        self.datastore = datastore
+        self.auth_engine = auth_engine
+        self.decision_logger = decision_logger
+
+    def authorize(
+        self,
+        rows: Sequence[Sequence[Any]],
+        default_environment: Optional[Dict[str, Any]] = None,
+        log: bool = True,
+        vectorized: bool = False
+    ) -> BatchResult:
+        """
+        Authorize a batch of (user_id, resource_id, action[, env]) rows.
+
+        Users and resources are resolved once per distinct ID, and rows with
+        the same environment share Environment and ActionAttributes objects.
+        Invalid rows are reported per index without failing the batch.
+        With ``vectorized`` the engine evaluates the batch as NumPy masks.
+        Decisions are logged for audit like single checks unless ``log`` is
+        False.
+        """
+        result = BatchResult(len(rows))
+        defaults = default_environment or {}
+        timestamp = datetime.now()
+
+        parsed = []
+        for index, row in enumerate(rows):
+            try:
+                parsed.append((index,) + self._parse_row(row, defaults))
+            except ValueError as e:
+                result.errors[index] = str(e)
+
+        users = self.datastore.get_users(row[1] for row in parsed)
+        accounts = self.datastore.get_accounts(row[2] for row in parsed)
+
+        environments: Dict[Any, Environment] = {}
+        action_attributes: Dict[Any, ActionAttributes] = {}
+        indexes = []
+        requests = []
+        for index, user_id, resource_id, action, env in parsed:
+            user = users.get(user_id)
+            if user is None:
+                result.errors[index] = f"User with ID {user_id} not found"
+                continue
+            account = accounts.get(resource_id)
+            if account is None:
+                result.errors[index] = f"Account with ID {resource_id} not found"
+                continue
+
+            env_key = (env['business_hours'], env['ip_address'], env['location'])
+            environment = environments.get(env_key)
+            if environment is None:
+                environment = environments[env_key] = Environment(
+                    timestamp=timestamp,
+                    business_hours=env['business_hours'],
+                    ip_address=env['ip_address'],
+                    location=env['location']
+                )
+            action_key = (env['amount'], action)
+            attributes = action_attributes.get(action_key)
+            if attributes is None:
+                attributes = action_attributes[action_key] = ActionAttributes(amount=env['amount'], type=action)
+
+            indexes.append(index)
+            requests.append(AuthorizationRequest(
+                user=user,
+                action=action,
+                resource=account,
+                environment=environment,
+                action_attributes=attributes
+            ))
+
+        decisions = self.auth_engine.evaluate_batch(requests, vectorized=vectorized)
+        for index, decision in zip(indexes, decisions):
+            rule_name = decision.evaluated_rules[-1] if decision.evaluated_rules else None
+            result.set_decision(index, decision.decision == 'permit', rule_name)
+            if log:
+                self.decision_logger.log(decision)
+
+        return result
+
+    def _parse_row(self, row: Sequence[Any], defaults: Dict[str, Any]) -> tuple:
+        """Validate a row, returning (user_id, resource_id, action, env)."""
+        if not isinstance(row, (list, tuple)) or len(row) not in (3, 4):
+            raise ValueError("Row must be [user_id, resource_id, action] or [user_id, resource_id, action, env]")
+
+        user_id, resource_id, action = row[0], row[1], row[2]
+        for name, value in (('user_id', user_id), ('resource_id', resource_id), ('action', action)):
+            if not isinstance(value, str) or not value:
+                raise ValueError(f"Field '{name}' must be a non-empty string")
+
+        overrides = row[3] if len(row) == 4 and row[3] is not None else {}
+        if not isinstance(overrides, dict):
+            raise ValueError("Field 'env' must be an object")
+
+        env = {
+            'business_hours': True,
+            'ip_address': None,
+            'location': None,
+            'amount': None
+        }
+        for field_name in ENVIRONMENT_FIELDS:
+            if field_name in overrides:
+                env[field_name] = overrides[field_name]
+            elif field_name in defaults:
+                env[field_name] = defaults[field_name]
+        env['business_hours'] = bool(env['business_hours'])
+
+        try:
+            hash((env['business_hours'], env['ip_address'], env['location'], env['amount']))
+        except TypeError:
+            raise ValueError("Environment values must be scalars")
+
+        return user_id, resource_id, action, env
@@ -0,0 +1,116 @@
+"""Bulk NDJSON import of users and accounts."""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from app.models.datastore import DataStore
+from app.models.user import User, UserAttributes, Location
+from app.models.account import Account, AccountAttributes
+
+
+class ImportResult:
+    """Outcome of a bulk import.
+
+    ``ids`` lists the IDs written, in input order; rows that could not be
+    imported are listed in ``errors`` by line number (1-based).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.ids: List[str] = []
+        self.errors: Dict[int, str] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'written': len(self.ids),
+            'ids': self.ids,
+            'errors': {str(line): message for line, message in sorted(self.errors.items())}
+        }
+
+
+class BulkImporter:
+    """Validates NDJSON rows in one pass and writes them in one batch."""
+
+    def __init__(self, datastore: DataStore):
+        self.datastore = datastore
+
+    def import_users(self, lines: Iterable[Union[str, bytes]], max_rows: Optional[int] = None) -> ImportResult:
+        """Create users from NDJSON lines; existing IDs are reported as errors."""
+        result, users, numbers = self._parse(lines, parse_user, max_rows)
+        errors = self.datastore.bulk_create_users(users)
+        for user, line, error in zip(users, numbers, errors):
+            if error is None:
+                result.ids.append(user.id)
+            else:
+                result.errors[line] = error
+        return result
+
+    def upsert_accounts(self, lines: Iterable[Union[str, bytes]], max_rows: Optional[int] = None) -> ImportResult:
+        """Create or replace accounts from NDJSON lines."""
+        result, accounts, _ = self._parse(lines, parse_account, max_rows)
+        result.ids.extend(account.id for account in self.datastore.bulk_upsert_resources(accounts))
+        return result
+
+    def _parse(
+        self,
+        lines: Iterable[Union[str, bytes]],
+        parse,
+        max_rows: Optional[int]
+    ) -> Tuple[ImportResult, list, List[int]]:
+        """Validate every row once; more than ``max_rows`` rows is a ValueError."""
+        result = ImportResult()
+        entities = []
+        numbers = []
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            result.count += 1
+            if max_rows is not None and result.count > max_rows:
+                raise ValueError(f"At most {max_rows} rows are allowed per import")
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError("Row must be a JSON object")
+                entities.append(parse(data))
+                numbers.append(number)
+            except (KeyError, TypeError) as e:
+                result.errors[number] = f"Missing or invalid field: {str(e)}"
+            except ValueError as e:
+                result.errors[number] = str(e)
+        return result, entities, numbers
+
+
+def parse_user(data: Dict[str, Any]) -> User:
+    """Build a validated User from its JSON form (``id`` is optional)."""
+    if 'name' not in data:
+        raise ValueError("Field 'name' is required")
+    if 'attributes' not in data:
+        raise ValueError("Field 'attributes' is required")
+    attrs = data['attributes']
+    return User(
+        id=_optional_id(data),
+        name=data['name'],
+        attributes=UserAttributes(
+            role=attrs['role'],
+            level=attrs['level'],
+            location=Location(**attrs['location']),
+            clearance_level=attrs['clearance_level']
+        )
+    )
+
+
+def parse_account(data: Dict[str, Any]) -> Account:
+    """Build a validated Account from its JSON form (``id`` is optional)."""
+    if 'attributes' not in data:
+        raise ValueError("Field 'attributes' is required")
+    return Account(
+        id=_optional_id(data),
+        attributes=AccountAttributes(**data['attributes'])
+    )
+
+
+def _optional_id(data: Dict[str, Any]) -> str:
+    entity_id = data.get('id', '')
+    if not isinstance(entity_id, str):
+        raise ValueError("Field 'id' must be a string")
+    return entity_id
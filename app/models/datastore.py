@@ -1,13 +1,26 @@
-"""In-memory data store for users and accounts."""
+"""Data store for users and accounts."""
 
+import threading
 import uuid
-from typing import Dict, Optional
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from app.models.user import User
 from app.models.account import Account
+from app.models.storage import StorageBackend, InMemoryBackend
+from app.models.locks import LockStripes
 
 
 class DataStore:
-    """In-memory storage for users and accounts (Singleton pattern)."""
+    """Storage for users and accounts (Singleton pattern).
+
+    Entities live in a pluggable ``StorageBackend``; the default keeps them
+    in memory. Backends keep secondary indexes on a few attributes of each
+    kind ('user' or 'account'), used by reverse authorization queries.
+
+    Backends are safe to call from many threads. Read-modify-write
+    sequences on one account should hold ``lock_account(account_id)``,
+    which also makes them atomic across processes sharing the backend.
+    """
     
     _instance = None
     _initialized = False
@@ -21,53 +34,111 @@ class DataStore:
     def __init__(self):
         """Initialize storage only once."""
         if not DataStore._initialized:
-            self.users: Dict[str, User] = {}
-            self.accounts: Dict[str, Account] = {}
+            self.backend: StorageBackend = InMemoryBackend()
+            self.account_locks = LockStripes(lock_factory=threading.RLock)
             DataStore._initialized = True
 
+    def configure_backend(self, backend: StorageBackend):
+        """Replace the storage backend (existing entities are not copied)."""
+        if backend is not self.backend:
+            self.backend.close()
+        self.backend = backend
+
     def create_user(self, user: User) -> User:
         """Create a new user with unique ID."""
         if not user.id:
             user.id = self._generate_unique_id('user')
         
-        if user.id in self.users:
-            raise ValueError(f"User with ID {user.id} already exists")
-        
-        self.users[user.id] = user
+        self.backend.insert_user(user)
         return user
 
+    def bulk_create_users(self, users: Sequence[User]) -> List[Optional[str]]:
+        """
+        Create many users in one backend transaction.
+
+        Returns an error message (or None) per user; users whose ID already
+        exists, in the store or earlier in the batch, are skipped.
+        """
+        for user in users:
+            if not user.id:
+                user.id = self._generate_unique_id('user')
+        return self.backend.insert_users(users)
+
     def get_user(self, user_id: str) -> Optional[User]:
         """Get user by ID."""
-        return self.users.get(user_id)
+        return self.backend.get_user(user_id)
+
+    def get_users(self, user_ids: Iterable[str]) -> Dict[str, User]:
+        """Get users by ID in bulk; unknown IDs are omitted."""
+        return self.backend.get_users(user_ids)
 
     def create_account(self, account: Account) -> Account:
         """Create a new account with unique ID."""
         if not account.id:
             account.id = self._generate_unique_id('account')
         
-        if account.id in self.accounts:
-            raise ValueError(f"Account with ID {account.id} already exists")
-        
-        self.accounts[account.id] = account
+        self.backend.insert_account(account)
         return account
 
     def get_account(self, account_id: str) -> Optional[Account]:
         """Get account by ID."""
-        return self.accounts.get(account_id)
+        return self.backend.get_account(account_id)
+
+    def get_accounts(self, account_ids: Iterable[str]) -> Dict[str, Account]:
+        """Get accounts by ID in bulk; unknown IDs are omitted."""
+        return self.backend.get_accounts(account_ids)
 
     def update_account(self, account: Account) -> Account:
         """Update an existing account."""
-        if account.id not in self.accounts:
-            raise ValueError(f"Account with ID {account.id} does not exist")
-        
-        self.accounts[account.id] = account
+        self.backend.update_account(account)
         return account
 
+    @contextmanager
+    def lock_account(self, account_id: str):
+        """
+        Serialize changes to one account: a re-entrant lock within this
+        process, inside which the backend's transaction excludes writers in
+        other processes.
+        """
+        with self.account_locks(account_id), self.backend.transaction():
+            yield
+
+    def bulk_upsert_resources(self, accounts: Sequence[Account]) -> List[Account]:
+        """Create or replace many accounts in one backend transaction."""
+        for account in accounts:
+            if not account.id:
+                account.id = self._generate_unique_id('account')
+        self.backend.upsert_accounts(accounts)
+        return list(accounts)
+
+    def indexed_paths(self, kind: str) -> Tuple[str, ...]:
+        """Attribute paths indexed for an entity kind."""
+        return self.backend.indexed_paths(kind)
+
+    def index_values(self, kind: str, path: str) -> List[Any]:
+        """Distinct values of an indexed attribute."""
+        return self.backend.index_values(kind, path)
+
+    def find_ids(self, kind: str, path: str, values: Iterable[Any]) -> Set[str]:
+        """IDs of the users or accounts whose indexed attribute is one of values."""
+        return self.backend.find_ids(kind, path, values)
+
+    def all_ids(self, kind: str) -> Set[str]:
+        """IDs of every user or account."""
+        return self.backend.all_ids(kind)
+
+    def filter_users(self, predicate) -> Dict[str, User]:
+        """Users satisfying a residual predicate (see AuthorizationEngine.partial_evaluate)."""
+        return self.backend.select('user', predicate)
+
+    def filter_accounts(self, predicate) -> Dict[str, Account]:
+        """Accounts satisfying a residual predicate (see AuthorizationEngine.partial_evaluate)."""
+        return self.backend.select('account', predicate)
+
     def _generate_unique_id(self, prefix: str) -> str:
         """Generate a unique ID with prefix."""
         return f"{prefix}_{uuid.uuid4().hex[:12]}"
 
     def clear(self):
         """Clear all data (useful for testing)."""
-        self.users.clear()
-        self.accounts.clear()
+        self.backend.clear()
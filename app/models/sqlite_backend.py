@@ -0,0 +1,324 @@
+"""SQLite storage backend (WAL mode) for the DataStore."""
+
+import json
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from app.models.user import User
+from app.models.account import Account
+from app.models.storage import StorageBackend
+
+# Indexed column -> attribute path; the full entity is also stored as JSON
+USER_COLUMNS = {
+    'role': 'attributes.role',
+    'level': 'attributes.level',
+    'location_primary': 'attributes.location.primary',
+    'location_secondary': 'attributes.location.secondary',
+    'location_region': 'attributes.location.region',
+    'clearance_level': 'attributes.clearance_level'
+}
+ACCOUNT_COLUMNS = {
+    'resource_type': 'attributes.resource_type',
+    'owner_id': 'attributes.owner_id',
+    'status': 'attributes.status',
+    'sensitivity_level': 'attributes.sensitivity_level',
+    'location': 'attributes.location'
+}
+
+# Maximum number of IDs bound in one "IN (...)" lookup
+MAX_IN_PARAMS = 512
+
+
+class _Table:
+    """Statements for one entity table, built once and reused on every call."""
+
+    def __init__(self, name: str, columns: Dict[str, str]):
+        self.name = name
+        self.columns = columns
+        self.paths = {path: column for column, path in columns.items()}
+        self.getter = attrgetter(*columns.values())
+        names = ', '.join(columns)
+        placeholders = ', '.join('?' for _ in columns)
+        self.create = (
+            f"CREATE TABLE IF NOT EXISTS {name} ("
+            f"id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+            + ', '.join(columns) + ')'
+        )
+        self.indexes = [
+            f"CREATE INDEX IF NOT EXISTS idx_{name}_{column} ON {name} ({column})"
+            for column in columns
+        ]
+        self.insert = f"INSERT INTO {name} (id, data, {names}) VALUES (?, ?, {placeholders})"
+        self.update = (
+            f"UPDATE {name} SET data = ?, "
+            + ', '.join(f"{column} = ?" for column in columns)
+            + " WHERE id = ?"
+        )
+        self.upsert = self.insert + " ON CONFLICT (id) DO UPDATE SET data = excluded.data, " + ', '.join(
+            f"{column} = excluded.{column}" for column in columns
+        )
+        self.select = f"SELECT data FROM {name} WHERE id = ?"
+        # One statement per batch size, so batches reuse cached statements
+        self._select_many: Dict[tuple, str] = {}
+
+    def select_many(self, count: int, columns: str = 'id, data', key: str = 'id') -> str:
+        statement = self._select_many.get((count, columns, key))
+        if statement is None:
+            statement = self._select_many[(count, columns, key)] = (
+                f"SELECT {columns} FROM {self.name} WHERE {key} IN ({', '.join('?' for _ in range(count))})"
+            )
+        return statement
+
+    def column(self, path: str) -> str:
+        column = self.paths.get(path)
+        if column is None:
+            raise ValueError(f"Attribute {path} is not indexed")
+        return column
+
+    def row(self, entity) -> tuple:
+        values = self.getter(entity)
+        if len(self.columns) == 1:
+            values = (values,)
+        return (entity.id, json.dumps(entity.to_dict(), separators=(',', ':'))) + tuple(values)
+
+
+class _ThreadConnection:
+    """A thread's connection, held only by that thread's locals."""
+
+    __slots__ = ('connection', '__weakref__')
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+
+def _release(connections: Set[sqlite3.Connection], lock: threading.Lock, connection: sqlite3.Connection):
+    with lock:
+        connections.discard(connection)
+    connection.close()
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Users and accounts in a SQLite database shared by several processes.
+
+    Each thread gets its own connection (SQLite connections must not be
+    shared across threads), opened lazily and closed when the thread ends
+    and its thread-local state is released. The database runs in WAL mode so readers never block the
+    writer. Statements are fixed strings, so sqlite3's per-connection
+    statement cache prepares each of them once. Entities are stored as
+    JSON next to indexed columns for their attributes.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, cached_statements: int = 256):
+        self.path = path
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.users = _Table('users', USER_COLUMNS)
+        self.accounts = _Table('accounts', ACCOUNT_COLUMNS)
+        self._local = threading.local()
+        self._connections: Set[sqlite3.Connection] = set()
+        self._lock = threading.Lock()
+
+        connection = self._connection()
+        with connection:
+            for table in (self.users, self.accounts):
+                connection.execute(table.create)
+                for statement in table.indexes:
+                    connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        owner = getattr(self._local, 'owner', None)
+        if owner is not None:
+            return owner.connection
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        owner = self._local.owner = _ThreadConnection(connection)
+        with self._lock:
+            self._connections.add(connection)
+        # Dropped with the thread's locals when the thread ends
+        weakref.finalize(owner, _release, self._connections, self._lock, connection)
+        return connection
+
+    def insert_user(self, user: User):
+        self._insert(self.users, user, 'User')
+
+    def insert_users(self, users: Sequence[User]) -> List[Optional[str]]:
+        table = self.users
+        # Take the write lock up front so the existence check stays valid
+        with self._writing(immediate=True) as connection:
+            existing = self._existing_ids(connection, table, [user.id for user in users])
+            errors: List[Optional[str]] = []
+            rows = []
+            for user in users:
+                if user.id in existing:
+                    errors.append(f"User with ID {user.id} already exists")
+                else:
+                    existing.add(user.id)
+                    rows.append(table.row(user))
+                    errors.append(None)
+            connection.executemany(table.insert, rows)
+        return errors
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        return self._get(self.users, user_id, User)
+
+    def get_users(self, user_ids: Iterable[str]) -> Dict[str, User]:
+        return self._get_many(self.users, user_ids, User)
+
+    def insert_account(self, account: Account):
+        self._insert(self.accounts, account, 'Account')
+
+    def get_account(self, account_id: str) -> Optional[Account]:
+        return self._get(self.accounts, account_id, Account)
+
+    def get_accounts(self, account_ids: Iterable[str]) -> Dict[str, Account]:
+        return self._get_many(self.accounts, account_ids, Account)
+
+    def update_account(self, account: Account):
+        table = self.accounts
+        row = table.row(account)
+        with self._writing() as connection:
+            cursor = connection.execute(table.update, row[1:] + row[:1])
+        if cursor.rowcount == 0:
+            raise ValueError(f"Account with ID {account.id} does not exist")
+
+    def upsert_accounts(self, accounts: Sequence[Account]):
+        table = self.accounts
+        with self._writing() as connection:
+            connection.executemany(table.upsert, [table.row(account) for account in accounts])
+
+    def indexed_paths(self, kind: str) -> Tuple[str, ...]:
+        return tuple(self._table(kind).paths)
+
+    def index_values(self, kind: str, path: str) -> List[Any]:
+        table = self._table(kind)
+        column = table.column(path)
+        rows = self._connection().execute(f"SELECT DISTINCT {column} FROM {table.name}")
+        return [row[0] for row in rows]
+
+    def find_ids(self, kind: str, path: str, values: Iterable[Any]) -> Set[str]:
+        table = self._table(kind)
+        column = table.column(path)
+        return {row[0] for row in self._select_many(self._connection(), table, values, 'id', column)}
+
+    def all_ids(self, kind: str) -> Set[str]:
+        table = self._table(kind)
+        return {row[0] for row in self._connection().execute(f"SELECT id FROM {table.name}")}
+
+    def select(self, kind: str, predicate) -> Dict[str, Any]:
+        """Entities satisfying a residual predicate, filtered by one indexed query."""
+        table = self._table(kind)
+        model = User if kind == 'user' else Account
+        statement = f"SELECT id, data FROM {table.name}"
+        params: List[Any] = []
+        exact = False
+        where = predicate.sql(dict(table.paths, id='id'))
+        if where is not None:
+            clause, params, exact = where
+            statement += f" WHERE {clause}"
+        entities = {}
+        for entity_id, data in self._connection().execute(statement, params):
+            entity = model.from_dict(json.loads(data))
+            # Terms SQL could not express are checked in Python
+            if exact or predicate.evaluate(entity):
+                entities[entity_id] = entity
+        return entities
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the database write lock (BEGIN IMMEDIATE) until the block
+        exits, so a read-modify-write cannot interleave with writers in
+        other processes; writes inside it commit together, or roll back
+        on an exception. Nested calls join the outer transaction.
+        """
+        if getattr(self._local, 'in_transaction', False):
+            yield
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            self._local.in_transaction = True
+            try:
+                yield
+            finally:
+                self._local.in_transaction = False
+
+    @contextmanager
+    def _writing(self, immediate: bool = False):
+        """The thread's connection in a write transaction, unless ``transaction()`` already holds one."""
+        connection = self._connection()
+        if getattr(self._local, 'in_transaction', False):
+            yield connection
+            return
+        with connection:
+            if immediate:
+                connection.execute('BEGIN IMMEDIATE')
+            yield connection
+
+    def clear(self):
+        with self._writing() as connection:
+            connection.execute(f"DELETE FROM {self.users.name}")
+            connection.execute(f"DELETE FROM {self.accounts.name}")
+
+    def close(self):
+        """Close every thread's connection."""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _table(self, kind: str) -> _Table:
+        if kind == 'user':
+            return self.users
+        if kind == 'account':
+            return self.accounts
+        raise ValueError(f"Invalid entity kind: {kind}")
+
+    def _insert(self, table: _Table, entity, kind: str):
+        try:
+            with self._writing() as connection:
+                connection.execute(table.insert, table.row(entity))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"{kind} with ID {entity.id} already exists")
+
+    def _get(self, table: _Table, entity_id: str, model):
+        row = self._connection().execute(table.select, (entity_id,)).fetchone()
+        return model.from_dict(json.loads(row[0])) if row else None
+
+    def _get_many(self, table: _Table, entity_ids: Iterable[str], model) -> Dict[str, object]:
+        connection = self._connection()
+        return {
+            entity_id: model.from_dict(json.loads(data))
+            for entity_id, data in self._select_many(connection, table, entity_ids, 'id, data')
+        }
+
+    def _existing_ids(self, connection: sqlite3.Connection, table: _Table, entity_ids: Iterable[str]) -> set:
+        return {row[0] for row in self._select_many(connection, table, entity_ids, 'id')}
+
+    def _select_many(
+        self,
+        connection: sqlite3.Connection,
+        table: _Table,
+        keys: Iterable[Any],
+        columns: str,
+        key: str = 'id'
+    ):
+        keys = list(set(keys))
+        for start in range(0, len(keys), MAX_IN_PARAMS):
+            chunk = keys[start:start + MAX_IN_PARAMS]
+            # Pad to a power of two so only a handful of statements get prepared
+            size = 1 << (len(chunk) - 1).bit_length()
+            chunk += chunk[-1:] * (size - len(chunk))
+            yield from connection.execute(table.select_many(len(chunk), columns, key), chunk)
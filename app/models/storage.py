@@ -0,0 +1,286 @@
+"""Storage backends behind the DataStore."""
+
+from contextlib import nullcontext
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from app.models.user import User
+from app.models.account import Account
+from app.models.locks import LockStripes
+
+# Attribute paths indexed for reverse ("who can access what") queries
+USER_INDEXES = (
+    'attributes.role',
+    'attributes.level',
+    'attributes.clearance_level',
+    'attributes.location.primary'
+)
+ACCOUNT_INDEXES = (
+    'attributes.owner_id',
+    'attributes.location',
+    'attributes.status',
+    'attributes.sensitivity_level'
+)
+
+
+class StorageBackend:
+    """
+    Interface for persisting users and accounts.
+
+    ``insert_*`` raise ValueError when the ID already exists and
+    ``update_account`` when it does not; lookups return None (or omit the
+    ID in bulk lookups) for unknown IDs.
+
+    The index methods take an entity ``kind`` ('user' or 'account') and an
+    attribute path from ``indexed_paths(kind)``.
+    """
+
+    # Whether calls wait on I/O; async callers run those on a worker thread
+    blocking = True
+
+    def insert_user(self, user: User):
+        raise NotImplementedError
+
+    def insert_users(self, users: Sequence[User]) -> List[Optional[str]]:
+        """Insert users in one transaction; returns an error (or None) per user."""
+        raise NotImplementedError
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        raise NotImplementedError
+
+    def get_users(self, user_ids: Iterable[str]) -> Dict[str, User]:
+        raise NotImplementedError
+
+    def insert_account(self, account: Account):
+        raise NotImplementedError
+
+    def get_account(self, account_id: str) -> Optional[Account]:
+        raise NotImplementedError
+
+    def get_accounts(self, account_ids: Iterable[str]) -> Dict[str, Account]:
+        raise NotImplementedError
+
+    def update_account(self, account: Account):
+        raise NotImplementedError
+
+    def upsert_accounts(self, accounts: Sequence[Account]):
+        """Insert or replace accounts in one transaction."""
+        raise NotImplementedError
+
+    def indexed_paths(self, kind: str) -> Tuple[str, ...]:
+        """Attribute paths that ``index_values``/``find_ids`` accept."""
+        raise NotImplementedError
+
+    def index_values(self, kind: str, path: str) -> List[Any]:
+        """Distinct values of an indexed attribute."""
+        raise NotImplementedError
+
+    def find_ids(self, kind: str, path: str, values: Iterable[Any]) -> Set[str]:
+        """IDs of the entities whose indexed attribute is one of ``values``."""
+        raise NotImplementedError
+
+    def all_ids(self, kind: str) -> Set[str]:
+        raise NotImplementedError
+
+    def select(self, kind: str, predicate) -> Dict[str, Any]:
+        """
+        Entities satisfying a residual predicate, by ID.
+
+        Comparisons on indexed paths narrow the candidates through the
+        indexes; the predicate is then evaluated on each candidate.
+        """
+        indexed = set(self.indexed_paths(kind))
+
+        def find(compare) -> Optional[Set[str]]:
+            if compare.operator == 'eq':
+                values = [compare.value]
+            elif compare.operator == 'in' and isinstance(compare.value, (frozenset, set, list, tuple)):
+                values = compare.value
+            else:
+                values = None
+            if compare.path == 'id' and values is not None:
+                return set(values)
+            if compare.path not in indexed:
+                return None
+            if values is None:
+                values = [value for value in self.index_values(kind, compare.path) if compare.accepts(value)]
+            return self.find_ids(kind, compare.path, values)
+
+        ids = predicate.lookup(find)
+        if ids is None:
+            ids = self.all_ids(kind)
+        entities = self.get_users(ids) if kind == 'user' else self.get_accounts(ids)
+        return {entity_id: entity for entity_id, entity in entities.items() if predicate.evaluate(entity)}
+
+    def transaction(self):
+        """
+        Context making the calls inside it atomic for every process sharing
+        the store; their writes are committed together when it exits.
+        Process-local backends need nothing beyond the caller's locks.
+        """
+        return nullcontext()
+
+    def clear(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class AttributeIndex:
+    """
+    Value -> IDs postings for a few attribute paths of one entity kind.
+
+    The indexed values of every entity are remembered, so an entity that
+    was changed in place is still removed from its old postings. Callers
+    serialize ``add``/``remove`` per entity ID; each posting set is guarded
+    by a lock stripe keyed on (path, value).
+    """
+
+    def __init__(self, paths: Sequence[str]):
+        self.paths = tuple(paths)
+        self.getter = attrgetter(*self.paths)
+        self.postings: Dict[str, Dict[Any, Set[str]]] = {path: {} for path in self.paths}
+        self.entries: Dict[str, tuple] = {}
+        self.locks = LockStripes()
+
+    def add(self, entity):
+        self.remove(entity.id)
+        values = self.getter(entity)
+        if len(self.paths) == 1:
+            values = (values,)
+        self.entries[entity.id] = values
+        for path, value in zip(self.paths, values):
+            with self.locks((path, value)):
+                self.postings[path].setdefault(value, set()).add(entity.id)
+
+    def remove(self, entity_id: str):
+        values = self.entries.pop(entity_id, None)
+        if values is None:
+            return
+        for path, value in zip(self.paths, values):
+            with self.locks((path, value)):
+                postings = self.postings[path]
+                ids = postings[value]
+                ids.discard(entity_id)
+                if not ids:
+                    del postings[value]
+
+    def values(self, path: str) -> List[Any]:
+        # Copying the keys is a single C-level operation, safe against concurrent adds
+        return list(self._postings(path))
+
+    def find(self, path: str, values: Iterable[Any]) -> Set[str]:
+        postings = self._postings(path)
+        ids: Set[str] = set()
+        for value in values:
+            with self.locks((path, value)):
+                ids.update(postings.get(value, ()))
+        return ids
+
+    def clear(self):
+        for postings in self.postings.values():
+            postings.clear()
+        self.entries.clear()
+
+    def _postings(self, path: str) -> Dict[Any, Set[str]]:
+        postings = self.postings.get(path)
+        if postings is None:
+            raise ValueError(f"Attribute {path} is not indexed")
+        return postings
+
+
+class InMemoryBackend(StorageBackend):
+    """
+    Process-local dicts; lookups return the stored objects themselves.
+
+    Writes are serialized per entity ID by lock stripes, so concurrent
+    requests on different entities do not wait for each other.
+    """
+
+    blocking = False
+
+    def __init__(self):
+        self.users: Dict[str, User] = {}
+        self.accounts: Dict[str, Account] = {}
+        self.indexes = {
+            'user': AttributeIndex(USER_INDEXES),
+            'account': AttributeIndex(ACCOUNT_INDEXES)
+        }
+        self.locks = LockStripes()
+
+    def insert_user(self, user: User):
+        with self.locks(('user', user.id)):
+            if user.id in self.users:
+                raise ValueError(f"User with ID {user.id} already exists")
+            self.users[user.id] = user
+            self.indexes['user'].add(user)
+
+    def insert_users(self, users: Sequence[User]) -> List[Optional[str]]:
+        errors = []
+        for user in users:
+            try:
+                self.insert_user(user)
+                errors.append(None)
+            except ValueError as e:
+                errors.append(str(e))
+        return errors
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        return self.users.get(user_id)
+
+    def get_users(self, user_ids: Iterable[str]) -> Dict[str, User]:
+        users = self.users
+        return {user_id: users[user_id] for user_id in set(user_ids) if user_id in users}
+
+    def insert_account(self, account: Account):
+        with self.locks(('account', account.id)):
+            if account.id in self.accounts:
+                raise ValueError(f"Account with ID {account.id} already exists")
+            self.accounts[account.id] = account
+            self.indexes['account'].add(account)
+
+    def get_account(self, account_id: str) -> Optional[Account]:
+        return self.accounts.get(account_id)
+
+    def get_accounts(self, account_ids: Iterable[str]) -> Dict[str, Account]:
+        accounts = self.accounts
+        return {account_id: accounts[account_id] for account_id in set(account_ids) if account_id in accounts}
+
+    def update_account(self, account: Account):
+        with self.locks(('account', account.id)):
+            if account.id not in self.accounts:
+                raise ValueError(f"Account with ID {account.id} does not exist")
+            self.accounts[account.id] = account
+            self.indexes['account'].add(account)
+
+    def upsert_accounts(self, accounts: Sequence[Account]):
+        index = self.indexes['account']
+        for account in accounts:
+            with self.locks(('account', account.id)):
+                self.accounts[account.id] = account
+                index.add(account)
+
+    def indexed_paths(self, kind: str) -> Tuple[str, ...]:
+        return self._index(kind).paths
+
+    def index_values(self, kind: str, path: str) -> List[Any]:
+        return self._index(kind).values(path)
+
+    def find_ids(self, kind: str, path: str, values: Iterable[Any]) -> Set[str]:
+        return self._index(kind).find(path, values)
+
+    def all_ids(self, kind: str) -> Set[str]:
+        self._index(kind)
+        return set(self.users if kind == 'user' else self.accounts)
+
+    def clear(self):
+        self.users.clear()
+        self.accounts.clear()
+        for index in self.indexes.values():
+            index.clear()
+
+    def _index(self, kind: str) -> AttributeIndex:
+        index = self.indexes.get(kind)
+        if index is None:
+            raise ValueError(f"Invalid entity kind: {kind}")
+        return index
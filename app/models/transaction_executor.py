@@ -1,13 +1,16 @@
 """Transaction executor with authorization integration."""
 
+from dataclasses import replace
 from datetime import datetime
 from app.models.datastore import DataStore
 from app.models.transaction import Transaction, TransactionAttributes
 from app.models.user import User
 from app.models.account import Account
 from app.authorization.engine import AuthorizationEngine
-from app.authorization.models import AuthorizationRequest, Environment, ActionAttributes
+from app.authorization.models import AuthorizationRequest, AuthorizationDecision, Environment, ActionAttributes
 from app.authorization.decision_logger import DecisionLogger
+from app.authorization.async_logger import AsyncDecisionLogger
+from app.models.async_datastore import AsyncDataStore
 
 
 class TransactionExecutor:
@@ -38,6 +41,25 @@ class TransactionExecutor:
         Returns:
             (success, message, transaction)
         """
+        decision, transaction = self.authorize(user, account, action, amount, environment, transaction_id)
+        self.decision_logger.log(decision)
+
+        # If denied, return early
+        if decision.decision == 'deny':
+            return False, decision.reason, transaction
+
+        return self.commit(decision, transaction)
+
+    def authorize(
+        self,
+        user: User,
+        account: Account,
+        action: str,
+        amount: float = None,
+        environment: Environment = None,
+        transaction_id: str = None
+    ) -> tuple[AuthorizationDecision, Transaction]:
+        """Evaluate a transaction and build its record, without logging or applying it."""
         # Create environment if not provided
         if environment is None:
             environment = Environment(
@@ -57,7 +79,6 @@ class TransactionExecutor:
 
         # Evaluate authorization
         decision = self.auth_engine.evaluate(auth_request)
-        self.decision_logger.log(decision)
 
         # Create transaction record
         transaction = Transaction(
@@ -69,62 +90,123 @@ class TransactionExecutor:
                 source_account=account.id
             )
         )
+        return decision, transaction
 
-        # If denied, return early
-        if decision.decision == 'deny':
-            return False, decision.reason, transaction
+    def commit(self, decision: AuthorizationDecision, transaction: Transaction) -> tuple[bool, str, Transaction]:
+        """
+        Apply a permitted transaction to the account.
 
-        # Execute the transaction based on action type
+        The account may have changed since ``decision`` was made, so the
+        request is authorized again, under the account lock, against the
+        version that is about to be changed; a denial then is logged.
+        """
+        request = decision.request
+        account = request.resource
         try:
-            if action == 'deposit':
-                account.attributes.balance += amount
-                self.datastore.update_account(account)
-                return True, f"Deposited ${amount}", transaction
-
-            elif action == 'withdrawal':
-                if account.attributes.balance < amount:
-                    return False, "Insufficient funds", transaction
-                account.attributes.balance -= amount
-                self.datastore.update_account(account)
-                return True, f"Withdrew ${amount}", transaction
-
-            elif action == 'transfer':
-                # For simplicity, just deduct from source
-                if account.attributes.balance < amount:
-                    return False, "Insufficient funds", transaction
-                account.attributes.balance -= amount
-                self.datastore.update_account(account)
-                return True, f"Transferred ${amount}", transaction
-
-            elif action == 'view_balance':
-                return True, f"Balance: ${account.attributes.balance}", transaction
-
-            elif action == 'view_history':
-                return True, "Transaction history retrieved", transaction
-
-            elif action == 'freeze_account':
-                account.attributes.status = 'frozen'
-                self.datastore.update_account(account)
-                return True, "Account frozen", transaction
-
-            elif action == 'close_account':
-                account.attributes.status = 'closed'
-                self.datastore.update_account(account)
-                return True, "Account closed", transaction
-
-            elif action == 'approve_loan':
-                # For simplicity, just mark as approved
-                return True, f"Loan of ${amount} approved", transaction
-
-            else:
-                return False, f"Unknown action: {action}", transaction
+            # Read-modify-write on the latest stored version, one request per account at a time
+            with self.datastore.lock_account(account.id):
+                current = self.datastore.get_account(account.id) or account
+                recheck = self.auth_engine.evaluate(replace(request, resource=current))
+                if recheck.decision == 'deny':
+                    self.decision_logger.log(recheck)
+                    return False, recheck.reason, transaction
+                return self._apply(current, request.action, request.action_attributes.amount, transaction)
 
         except Exception as e:
             return False, f"Transaction failed: {str(e)}", transaction
 
+    def _apply(
+        self,
+        account: Account,
+        action: str,
+        amount: float,
+        transaction: Transaction
+    ) -> tuple[bool, str, Transaction]:
+        """Apply an authorized action to an account; called holding its lock."""
+        if action == 'deposit':
+            account.attributes.balance += amount
+            self.datastore.update_account(account)
+            return True, f"Deposited ${amount}", transaction
+
+        elif action == 'withdrawal':
+            if account.attributes.balance < amount:
+                return False, "Insufficient funds", transaction
+            account.attributes.balance -= amount
+            self.datastore.update_account(account)
+            return True, f"Withdrew ${amount}", transaction
+
+        elif action == 'transfer':
+            # For simplicity, just deduct from source
+            if account.attributes.balance < amount:
+                return False, "Insufficient funds", transaction
+            account.attributes.balance -= amount
+            self.datastore.update_account(account)
+            return True, f"Transferred ${amount}", transaction
+
+        elif action == 'view_balance':
+            return True, f"Balance: ${account.attributes.balance}", transaction
+
+        elif action == 'view_history':
+            return True, "Transaction history retrieved", transaction
+
+        elif action == 'freeze_account':
+            account.attributes.status = 'frozen'
+            self.datastore.update_account(account)
+            return True, "Account frozen", transaction
+
+        elif action == 'close_account':
+            account.attributes.status = 'closed'
+            self.datastore.update_account(account)
+            return True, "Account closed", transaction
+
+        elif action == 'approve_loan':
+            # For simplicity, just mark as approved
+            return True, f"Loan of ${amount} approved", transaction
+
+        else:
+            return False, f"Unknown action: {action}", transaction
+
     def _is_business_hours(self, timestamp: datetime) -> bool:
         """Check if timestamp is during business hours (9 AM - 5 PM, Mon-Fri)."""
         if timestamp.weekday() >= 5:  # Saturday or Sunday
             return False
         hour = timestamp.hour
         return 9 <= hour < 17
+
+
+class AsyncTransactionExecutor:
+    """
+    Runs ``TransactionExecutor`` transactions from asyncio code.
+
+    Authorization is evaluated on the event loop by the same engine;
+    lookups and logging go through the async store and logger, and the
+    locked read-modify-write runs on a worker thread.
+    """
+
+    def __init__(
+        self,
+        executor: TransactionExecutor,
+        datastore: AsyncDataStore,
+        decision_logger: AsyncDecisionLogger
+    ):
+        self.executor = executor
+        self.datastore = datastore
+        self.decision_logger = decision_logger
+
+    async def execute_transaction(
+        self,
+        user: User,
+        account: Account,
+        action: str,
+        amount: float = None,
+        environment: Environment = None,
+        transaction_id: str = None
+    ) -> tuple[bool, str, Transaction]:
+        """Same as ``TransactionExecutor.execute_transaction``."""
+        decision, transaction = self.executor.authorize(user, account, action, amount, environment, transaction_id)
+        await self.decision_logger.log(decision)
+
+        if decision.decision == 'deny':
+            return False, decision.reason, transaction
+
+        return await self.datastore.run(self.executor.commit, decision, transaction)
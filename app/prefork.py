@@ -0,0 +1,167 @@
+"""
+Multi-process server: prefork workers plus a decision log aggregator.
+
+Every worker is a separate process with its own copy of the application,
+serving from one shared listening socket. They share users and accounts
+through a SQLite database, the rule set through a ``RuleStore`` in the
+same database, and ship their decisions to one aggregator process.
+
+    python -m app.prefork --workers 4 --port 5060 --data-dir ./abac-data
+
+The same environment variables work with other servers, e.g. gunicorn
+with ``DATASTORE_BACKEND=sqlite``, ``RULE_STORE_PATH`` and
+``DECISION_LOG_AGGREGATOR`` pointing at a separately started
+``python -m app.authorization.log_aggregator``.
+"""
+
+import argparse
+import multiprocessing
+import os
+import secrets
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/..'))
+
+
+def configure_environment(data_dir: str, address: str, authkey: str) -> Dict[str, str]:
+    """Environment shared by the workers; values already set are kept."""
+    database = os.path.join(data_dir, 'abac.db')
+    defaults = {
+        'DATASTORE_BACKEND': 'sqlite',
+        'DATASTORE_PATH': database,
+        'RULE_STORE_PATH': database,
+        'DECISION_LOG_AGGREGATOR': address,
+        'DECISION_LOG_AGGREGATOR_KEY': authkey,
+        'DECISION_LOG_ASYNC': 'true'
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+    return {name: os.environ[name] for name in defaults}
+
+
+def run_aggregator(address: str, authkey: str, log_dir: Optional[str], ready):
+    from app.authorization.log_aggregator import create_aggregator
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    max_segments = os.environ.get('DECISION_LOG_MAX_SEGMENTS')
+    aggregator = create_aggregator(
+        address, authkey.encode('utf-8'), log_dir, max_segments=int(max_segments) if max_segments else None
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: aggregator.close())
+    ready.set()
+    aggregator.serve_forever()
+
+
+def run_worker(fd: int, host: str, port: int):
+    from werkzeug.serving import make_server
+    from app.api.app import create_app
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    app = create_app()
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server.serve_forever()
+
+
+class PreforkServer:
+    """Starts the aggregator and the workers, restarting workers that die."""
+
+    def __init__(self, workers: int, host: str, port: int, data_dir: str, log_dir: Optional[str] = None):
+        if workers <= 0:
+            raise ValueError(f"Invalid worker count: {workers}")
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.data_dir = data_dir
+        self.log_dir = log_dir
+        self.context = multiprocessing.get_context('fork')
+        self.aggregator = None
+        self.processes: List = []
+        self.socket: Optional[socket.socket] = None
+        self._stopping = False
+
+    def start(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        address = os.path.join(self.data_dir, 'decision-log.sock')
+        environment = configure_environment(self.data_dir, address, secrets.token_hex(16))
+
+        ready = self.context.Event()
+        self.aggregator = self.context.Process(
+            target=run_aggregator,
+            args=(environment['DECISION_LOG_AGGREGATOR'], environment['DECISION_LOG_AGGREGATOR_KEY'], self.log_dir, ready),
+            name='decision-log-aggregator'
+        )
+        self.aggregator.start()
+        if not ready.wait(30):
+            raise RuntimeError('Decision log aggregator did not start')
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(1024)
+        self.socket.set_inheritable(True)
+        self.port = self.socket.getsockname()[1]
+        self.processes = [self._spawn() for _ in range(self.workers)]
+
+    def _spawn(self):
+        process = self.context.Process(
+            target=run_worker,
+            args=(self.socket.fileno(), self.host, self.port),
+            name='abac-worker'
+        )
+        process.start()
+        return process
+
+    def supervise(self, interval: float = 0.5):
+        """Restart dead workers until ``stop()``."""
+        while not self._stopping:
+            for position, process in enumerate(self.processes):
+                if not process.is_alive() and not self._stopping:
+                    self.processes[position] = self._spawn()
+            time.sleep(interval)
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping = True
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout)
+        # Workers drain their queued decisions on exit, then the aggregator flushes
+        if self.aggregator is not None:
+            self.aggregator.terminate()
+            self.aggregator.join(timeout)
+        if self.socket is not None:
+            self.socket.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the application with several worker processes.')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5060)))
+    parser.add_argument('--data-dir', default=os.environ.get('DATA_DIR', 'abac-data'))
+    parser.add_argument('--log-dir', default=os.environ.get('DECISION_LOG_DIR'))
+    args = parser.parse_args()
+
+    server = PreforkServer(args.workers, args.host, args.port, args.data_dir, args.log_dir)
+
+    def shutdown(signum, frame):
+        server._stopping = True
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    server.start()
+    print(f"Serving on {args.host}:{server.port} with {args.workers} workers", flush=True)
+    try:
+        server.supervise()
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Concurrency stress benchmark for the shared DataStore and DecisionLogger.
+
+Runs a mixed request workload (authorize and log, read-modify-write of an
+account, user creation, log queries, statistics) from 1..N threads and
+reports throughput per thread count, then checks that no update or
+decision was lost.
+
+    python -m benchmarks.concurrency --threads 1,2,4,8 --duration 2
+    python -m benchmarks.concurrency --backend sqlite
+"""
+
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from app.models.datastore import DataStore
+from app.models.storage import InMemoryBackend
+from app.models.sqlite_backend import SQLiteBackend
+from app.authorization.engine import AuthorizationEngine
+from app.authorization.banking_rules import create_all_rules
+from app.authorization.models import AuthorizationRequest, Environment, ActionAttributes
+from app.authorization.decision_logger import DecisionLogger, LogQueryFilters
+from benchmarks.generators import ACTIONS, make_user, make_account
+
+
+class Workload:
+    """Shared components plus per-run counters used to check for lost updates."""
+
+    def __init__(self, backend: str, users: int, accounts: int, seed: int):
+        self.datastore = DataStore()
+        if backend == 'sqlite':
+            self.path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+            self.datastore.configure_backend(SQLiteBackend(self.path))
+        else:
+            self.datastore.configure_backend(InMemoryBackend())
+        self.engine = AuthorizationEngine()
+        for rule in create_all_rules():
+            self.engine.add_rule(rule)
+        self.logger = DecisionLogger()
+        self.logger.clear()
+
+        rnd = random.Random(seed)
+        self.user_ids = [f'user_{i}' for i in range(users)]
+        self.account_ids = [f'account_{i}' for i in range(accounts)]
+        self.datastore.bulk_create_users([make_user(rnd, user_id) for user_id in self.user_ids])
+        self.datastore.bulk_upsert_resources([
+            make_account(rnd, account_id, rnd.choice(self.user_ids)) for account_id in self.account_ids
+        ])
+        self.new_ids = itertools.count()
+
+    def step(self, rnd: random.Random, counts: dict):
+        """One request from the mix."""
+        choice = rnd.random()
+        if choice < 0.5:
+            user = self.datastore.get_user(rnd.choice(self.user_ids))
+            account = self.datastore.get_account(rnd.choice(self.account_ids))
+            action = rnd.choice(ACTIONS)
+            request = AuthorizationRequest(
+                user=user,
+                action=action,
+                resource=account,
+                environment=Environment(timestamp=datetime.now()),
+                action_attributes=ActionAttributes(type=action)
+            )
+            self.logger.log(self.engine.evaluate(request))
+            counts['logged'] += 1
+        elif choice < 0.7:
+            account_id = rnd.choice(self.account_ids)
+            with self.datastore.lock_account(account_id):
+                account = self.datastore.get_account(account_id)
+                account.attributes.sensitivity_level += 1
+                self.datastore.update_account(account)
+            counts['increments'] += 1
+        elif choice < 0.8:
+            self.datastore.create_user(make_user(rnd, f'new_{next(self.new_ids)}'))
+            counts['created'] += 1
+        elif choice < 0.9:
+            self.logger.query(LogQueryFilters(user_id=rnd.choice(self.user_ids)))
+        else:
+            self.logger.get_statistics()
+
+    def totals(self) -> dict:
+        accounts = self.datastore.get_accounts(self.account_ids)
+        return {
+            'increments': sum(account.attributes.sensitivity_level for account in accounts.values()),
+            'users': len(self.datastore.all_ids('user')) - len(self.user_ids),
+            'logged': self.logger.get_statistics().total_decisions
+        }
+
+
+def run(workload: Workload, threads: int, duration: float, seed: int) -> dict:
+    """Run the mix from ``threads`` threads for ``duration`` seconds."""
+    # Start every run from an empty log so queries cost the same at each thread count
+    workload.logger.clear()
+    before = workload.totals()
+    start = threading.Barrier(threads + 1)
+    stop = threading.Event()
+    results = []
+
+    def worker(index: int):
+        rnd = random.Random(seed * 1000 + index)
+        counts = {'ops': 0, 'logged': 0, 'increments': 0, 'created': 0}
+        start.wait()
+        while not stop.is_set():
+            workload.step(rnd, counts)
+            counts['ops'] += 1
+        results.append(counts)
+
+    pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    after = workload.totals()
+    expected = {name: sum(counts[name] for counts in results) for name in ('increments', 'logged')}
+    expected['users'] = sum(counts['created'] for counts in results)
+    lost = {name: expected[name] - (after[name] - before[name]) for name in expected}
+    return {
+        'threads': threads,
+        'ops': sum(counts['ops'] for counts in results),
+        'ops_per_second': sum(counts['ops'] for counts in results) / elapsed,
+        'lost': lost
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', default='1,2,4,8', help='comma-separated thread counts')
+    parser.add_argument('--duration', type=float, default=2.0, help='seconds per thread count')
+    parser.add_argument('--backend', choices=('memory', 'sqlite'), default='memory')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--accounts', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workload = Workload(args.backend, args.users, args.accounts, args.seed)
+    baseline = None
+    print(f"{'threads':>7} {'ops':>9} {'ops/s':>10} {'scaling':>8}  lost updates")
+    for threads in (int(value) for value in args.threads.split(',')):
+        result = run(workload, threads, args.duration, args.seed)
+        baseline = baseline or result['ops_per_second']
+        lost = ', '.join(f"{name}={count}" for name, count in result['lost'].items())
+        print(
+            f"{result['threads']:>7} {result['ops']:>9} {result['ops_per_second']:>10.0f} "
+            f"{result['ops_per_second'] / baseline:>7.2f}x  {lost}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Synthetic users, accounts and authorization requests for benchmarks.
+
+Attribute values are drawn from the enums on ``UserAttributes`` and
+``AccountAttributes``, so generated entities always validate. Everything
+is seeded and reproducible; requests are produced in chunks so that very
+large runs (10^7 requests) never hold more than one chunk in memory.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+from app.models.user import User, UserAttributes, Location
+from app.models.account import Account, AccountAttributes
+from app.authorization.models import AuthorizationRequest, Environment, ActionAttributes
+
+ROLES = sorted(UserAttributes.VALID_ROLES)
+LEVELS = sorted(UserAttributes.VALID_LEVELS)
+STATUSES = sorted(AccountAttributes.VALID_STATUSES)
+TYPES = sorted(AccountAttributes.VALID_TYPES)
+CLEARANCE_LEVELS = range(1, 6)
+SENSITIVITY_LEVELS = range(0, 6)
+LOCATIONS = ['NYC', 'LA', 'SF', 'CHI', 'LON']
+ACTIONS = ['create_article', 'edit_article', 'publish', 'unpublish', 'read']
+
+
+def make_user(rnd: random.Random, user_id: str) -> User:
+    return User(
+        id=user_id,
+        name=user_id,
+        attributes=UserAttributes(
+            role=rnd.choice(ROLES),
+            level=rnd.choice(LEVELS),
+            location=Location(rnd.choice(LOCATIONS), rnd.choice(LOCATIONS), 'region'),
+            clearance_level=rnd.choice(CLEARANCE_LEVELS)
+        )
+    )
+
+
+def make_account(rnd: random.Random, account_id: str, owner_id: str) -> Account:
+    return Account(
+        id=account_id,
+        attributes=AccountAttributes(
+            resource_type=rnd.choice(TYPES),
+            owner_id=owner_id,
+            status=rnd.choice(STATUSES),
+            sensitivity_level=rnd.choice(SENSITIVITY_LEVELS),
+            location=rnd.choice(LOCATIONS)
+        )
+    )
+
+
+def make_environment(rnd: random.Random, start: datetime) -> Environment:
+    """A request time within a week of ``start``, a third of them after hours."""
+    return Environment(
+        timestamp=start + timedelta(seconds=rnd.randrange(7 * 24 * 3600)),
+        ip_address=f"10.0.{rnd.randrange(256)}.{rnd.randrange(256)}",
+        location=rnd.choice(LOCATIONS),
+        business_hours=rnd.random() >= 1 / 3
+    )
+
+
+class Population:
+    """A fixed set of users and accounts that requests are drawn from."""
+
+    def __init__(self, users: int, accounts: int, seed: int = 42):
+        rnd = random.Random(seed)
+        self.users: List[User] = [make_user(rnd, f"user_{i}") for i in range(users)]
+        self.accounts: List[Account] = [
+            make_account(rnd, f"account_{i}", rnd.choice(self.users).id) for i in range(accounts)
+        ]
+
+    def requests(
+        self,
+        count: int,
+        seed: int = 0,
+        start: Optional[datetime] = None,
+        skew: float = 0.0
+    ) -> List[AuthorizationRequest]:
+        """
+        ``count`` random requests.
+
+        With ``skew`` > 0, users and accounts are drawn from a Zipf-like
+        distribution (a few hot entities get most requests) instead of
+        uniformly.
+        """
+        rnd = random.Random(seed)
+        start = start or datetime(2024, 1, 1)
+        pick_user = self._picker(rnd, self.users, skew)
+        pick_account = self._picker(rnd, self.accounts, skew)
+        requests = []
+        for _ in range(count):
+            action = rnd.choice(ACTIONS)
+            amount = rnd.uniform(0, 5000) if rnd.random() < 0.5 else None
+            requests.append(AuthorizationRequest(
+                user=pick_user(),
+                action=action,
+                resource=pick_account(),
+                environment=make_environment(rnd, start),
+                action_attributes=ActionAttributes(amount=amount, type=action)
+            ))
+        return requests
+
+    def request_chunks(
+        self,
+        total: int,
+        chunk_size: int = 10000,
+        seed: int = 0,
+        skew: float = 0.0
+    ) -> Iterator[List[AuthorizationRequest]]:
+        """``total`` requests in lists of at most ``chunk_size``."""
+        for index, offset in enumerate(range(0, total, chunk_size)):
+            yield self.requests(min(chunk_size, total - offset), seed=seed * 1000003 + index, skew=skew)
+
+    @staticmethod
+    def _picker(rnd: random.Random, items: List, skew: float):
+        if skew <= 0:
+            return lambda: rnd.choice(items)
+        weights = [1.0 / (rank + 1) ** skew for rank in range(len(items))]
+        cumulative = []
+        total = 0.0
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return lambda: rnd.choices(items, cum_weights=cumulative)[0]
@@ -0,0 +1,171 @@
+"""
+Throughput of the multi-process deployment against its worker count.
+
+For every worker count, starts ``python -m app.prefork`` on a fresh data
+directory, seeds users and accounts through the bulk endpoints, then
+drives ``POST /api/authorize/batch`` (one logged row per request) from
+several client processes and reports requests per second. Afterwards it
+checks that the aggregated decision log saw every request.
+
+    python -m benchmarks.multiprocess --workers 1,2,4 --clients 8 --duration 5
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+from benchmarks.generators import ACTIONS, make_user, make_account
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def request(connection: http.client.HTTPConnection, method: str, path: str, body=None, content_type='application/json'):
+    headers = {'Content-Type': content_type} if body is not None else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    data = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path} returned {response.status}: {data[:200]!r}")
+    return json.loads(data)
+
+
+def wait_until_healthy(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            request(connection, 'GET', '/api/health')
+            connection.close()
+            return
+        except (OSError, RuntimeError):
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not become healthy")
+
+
+def seed(port: int, users: int, accounts: int, rnd: random.Random) -> Tuple[List[str], List[str]]:
+    user_ids = [f"u{i}" for i in range(users)]
+    account_ids = [f"a{i}" for i in range(accounts)]
+    user_lines = [json.dumps(make_user(rnd, user_id).to_dict()) for user_id in user_ids]
+    account_lines = [
+        json.dumps(make_account(rnd, account_id, rnd.choice(user_ids)).to_dict()) for account_id in account_ids
+    ]
+
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    request(connection, 'POST', '/api/users/bulk', '\n'.join(user_lines), 'application/x-ndjson')
+    request(connection, 'POST', '/api/accounts/bulk', '\n'.join(account_lines), 'application/x-ndjson')
+    connection.close()
+    return user_ids, account_ids
+
+
+def client(port: int, user_ids: List[str], account_ids: List[str], duration: float, seed_value: int, results):
+    rnd = random.Random(seed_value)
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    count = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        body = json.dumps({
+            'requests': [[rnd.choice(user_ids), rnd.choice(account_ids), rnd.choice(ACTIONS)]],
+            'log': True
+        })
+        request(connection, 'POST', '/api/authorize/batch', body)
+        count += 1
+    connection.close()
+    results.put(count)
+
+
+def run(workers: int, clients: int, duration: float, users: int, accounts: int, seed_value: int) -> dict:
+    data_dir = tempfile.mkdtemp(prefix='abac-mp-')
+    port = free_port()
+    environment = {
+        name: value for name, value in os.environ.items()
+        if not name.startswith(('DATASTORE_', 'RULE_STORE_', 'DECISION_LOG_'))
+    }
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'app.prefork', '--workers', str(workers), '--host', '127.0.0.1',
+         '--port', str(port), '--data-dir', data_dir],
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_healthy(port)
+        rnd = random.Random(seed_value)
+        user_ids, account_ids = seed(port, users, accounts, rnd)
+
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=client,
+                args=(port, user_ids, account_ids, duration, seed_value + index, results)
+            )
+            for index in range(clients)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        sent = sum(results.get() for _ in processes)
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+
+        # Every worker's pipeline must drain into the aggregator
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        logged = 0
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            logged = request(connection, 'GET', '/api/decisions/statistics')['total_decisions']
+            if logged >= sent:
+                break
+            time.sleep(0.2)
+        connection.close()
+        return {
+            'workers': workers,
+            'requests': sent,
+            'elapsed': elapsed,
+            'rps': sent / elapsed,
+            'logged': logged
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--accounts', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()} clients={args.clients} duration={args.duration}s")
+    print(f"{'workers':>8} {'requests':>10} {'req/s':>10} {'logged':>10}")
+    for workers in (int(value) for value in args.workers.split(',')):
+        result = run(workers, args.clients, args.duration, args.users, args.accounts, args.seed)
+        print(f"{result['workers']:>8} {result['requests']:>10} {result['rps']:>10.0f} {result['logged']:>10}")
+        if result['logged'] != result['requests']:
+            print(f"  decision log has {result['logged']} of {result['requests']} decisions")
+
+
+if __name__ == '__main__':
+    main()
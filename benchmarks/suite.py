@@ -0,0 +1,289 @@
+"""
+Benchmark suite for the authorization hot path.
+
+Measures, at each scale (number of requests or logged decisions):
+
+- ``engine.evaluate``: single-request evaluation, with and without the
+  decision cache
+- ``logger.log``: logging evaluated decisions
+- ``logger.query``: indexed queries by user, action and decision over
+  the filled log
+- ``logger.get_statistics``: reading the running statistics
+- ``logger.export_logs``: a full JSON export (up to 10^6 decisions; larger
+  logs are measured with the streaming NDJSON export instead)
+
+and, once, end-to-end throughput of ``POST /api/authorize/batch`` through
+the Flask test client. Requests come from ``benchmarks.generators``.
+
+    python -m benchmarks.suite --scales 1e3,1e4,1e5 --output results.json
+    python -m benchmarks.suite --baseline results.json --tolerance 0.15
+
+Results are written as JSON. With ``--baseline``, every (name, scale)
+also found in the baseline is compared by operations per second, and the
+command exits with status 1 if any got slower by more than the tolerance.
+Logs beyond 10^5 decisions go to on-disk segments in a temporary
+directory so memory stays bounded at 10^6-10^7.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+from app.authorization.engine import AuthorizationEngine
+from app.authorization.banking_rules import create_all_rules
+from app.authorization.decision_logger import DecisionLogger, LogQueryFilters
+from app.authorization.log_export import encode_records
+from app.authorization.log_store import SegmentedLogStore
+from benchmarks.generators import ACTIONS, Population
+
+# Larger logs are kept in on-disk segments rather than in memory
+IN_MEMORY_LOG_LIMIT = 10 ** 5
+
+# Larger logs are exported with the streaming NDJSON export
+EXPORT_LOGS_LIMIT = 10 ** 6
+
+QUERY_COUNT = 100
+STATISTICS_COUNT = 1000
+
+
+class Result:
+    """Timing of ``ops`` operations of one benchmark at one scale."""
+
+    def __init__(self, name: str, scale: int, ops: int, seconds: float, **extra):
+        self.name = name
+        self.scale = scale
+        self.ops = ops
+        self.seconds = seconds
+        self.extra = extra
+
+    @property
+    def ops_per_second(self) -> float:
+        return self.ops / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            name=self.name,
+            scale=self.scale,
+            ops=self.ops,
+            seconds=self.seconds,
+            ops_per_second=self.ops_per_second,
+            ns_per_op=self.seconds / self.ops * 1e9 if self.ops else 0.0,
+            **self.extra
+        )
+
+
+def make_engine(cache: bool = False) -> AuthorizationEngine:
+    engine = AuthorizationEngine()
+    for rule in create_all_rules():
+        engine.add_rule(rule)
+    if cache:
+        engine.enable_cache()
+    return engine
+
+
+def bench_engine(population: Population, scale: int, seed: int) -> Iterator[Result]:
+    for name, cache in (('engine.evaluate', False), ('engine.evaluate[cached]', True)):
+        evaluate = make_engine(cache).evaluate
+        seconds = 0.0
+        for chunk in population.request_chunks(scale, seed=seed):
+            started = time.perf_counter()
+            for request in chunk:
+                evaluate(request)
+            seconds += time.perf_counter() - started
+        yield Result(name, scale, scale, seconds)
+
+
+def bench_logger(population: Population, scale: int, seed: int) -> Iterator[Result]:
+    logger = DecisionLogger()
+    logger.stop_pipeline()
+    # Hold every decision of an in-memory run, so queries and exports see the whole log
+    logger.configure_storage(None, buffer_size=scale)
+    logger.clear()
+    log_dir = None
+    if scale > IN_MEMORY_LOG_LIMIT:
+        log_dir = tempfile.mkdtemp(prefix='abac-bench-')
+        logger.configure_storage(SegmentedLogStore(log_dir))
+    storage = 'segments' if log_dir else 'memory'
+
+    try:
+        evaluate = make_engine().evaluate
+        seconds = 0.0
+        for chunk in population.request_chunks(scale, seed=seed):
+            decisions = [evaluate(request) for request in chunk]
+            started = time.perf_counter()
+            for decision in decisions:
+                logger.log(decision)
+            seconds += time.perf_counter() - started
+        yield Result('logger.log', scale, scale, seconds, storage=storage)
+
+        rnd = random.Random(seed)
+        queries = [
+            LogQueryFilters(
+                user_id=rnd.choice(population.users).id,
+                action_type=rnd.choice((None, rnd.choice(ACTIONS))),
+                decision=rnd.choice((None, 'permit', 'deny'))
+            )
+            for _ in range(QUERY_COUNT)
+        ]
+        rows = 0
+        started = time.perf_counter()
+        for filters in queries:
+            rows += len(logger.query(filters))
+        yield Result('logger.query', scale, QUERY_COUNT, time.perf_counter() - started,
+                     storage=storage, rows=rows)
+
+        started = time.perf_counter()
+        for _ in range(STATISTICS_COUNT):
+            logger.get_statistics()
+        yield Result('logger.get_statistics', scale, STATISTICS_COUNT, time.perf_counter() - started,
+                     storage=storage)
+
+        if scale <= EXPORT_LOGS_LIMIT:
+            started = time.perf_counter()
+            size = len(logger.export_logs())
+            yield Result('logger.export_logs', scale, scale, time.perf_counter() - started,
+                         storage=storage, bytes=size)
+        else:
+            started = time.perf_counter()
+            records, _ = logger.export_records()
+            size = sum(len(chunk) for chunk in encode_records(records, 'ndjson'))
+            yield Result('logger.export_records', scale, scale, time.perf_counter() - started,
+                         storage=storage, bytes=size)
+    finally:
+        logger.configure_storage(None)
+        logger.clear()
+        if log_dir:
+            shutil.rmtree(log_dir, ignore_errors=True)
+
+
+def bench_end_to_end(population: Population, requests: int, seed: int) -> Iterator[Result]:
+    """``POST /api/authorize/batch`` through the Flask test client, one row and 100 rows per call."""
+    from app.api.app import create_app
+
+    app = create_app()
+    app.datastore.bulk_create_users([user for user in population.users if not app.datastore.get_user(user.id)])
+    app.datastore.bulk_upsert_resources(population.accounts)
+    client = app.test_client()
+    rnd = random.Random(seed)
+
+    def row():
+        return [rnd.choice(population.users).id, rnd.choice(population.accounts).id, rnd.choice(ACTIONS)]
+
+    for name, rows_per_call in (('e2e.authorize_batch[1]', 1), ('e2e.authorize_batch[100]', 100)):
+        calls = max(1, requests // rows_per_call)
+        bodies = [{'requests': [row() for _ in range(rows_per_call)], 'log': True} for _ in range(calls)]
+        started = time.perf_counter()
+        for body in bodies:
+            response = client.post('/api/authorize/batch', json=body)
+            if response.status_code != 200:
+                raise RuntimeError(f"{name} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        seconds = time.perf_counter() - started
+        yield Result(name, requests, calls * rows_per_call, seconds, calls=calls)
+    app.decision_logger.clear()
+
+
+def best_of(results: List[Result]) -> Dict[tuple, Result]:
+    """Fastest run of each (name, scale)."""
+    best: Dict[tuple, Result] = {}
+    for result in results:
+        key = (result.name, result.scale)
+        if key not in best or result.ops_per_second > best[key].ops_per_second:
+            best[key] = result
+    return best
+
+
+def compare(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[Dict[str, Any]]:
+    """Relative change in ops/s of each (name, scale) found in both runs."""
+    previous = {(entry['name'], entry['scale']): entry for entry in baseline}
+    rows = []
+    for entry in current:
+        base = previous.get((entry['name'], entry['scale']))
+        if base is None or not base['ops_per_second']:
+            continue
+        ratio = entry['ops_per_second'] / base['ops_per_second']
+        rows.append({
+            'name': entry['name'],
+            'scale': entry['scale'],
+            'baseline': base['ops_per_second'],
+            'current': entry['ops_per_second'],
+            'ratio': ratio,
+            'regression': ratio < 1.0 - tolerance
+        })
+    return rows
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def parse_scales(value: str) -> List[int]:
+    return [int(float(scale)) for scale in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=parse_scales, default=parse_scales('1e3,1e4,1e5'),
+                        help='comma-separated request/decision counts, e.g. 1e3,1e5,1e7')
+    parser.add_argument('--only', default='engine,logger,e2e', help='comma-separated groups to run')
+    parser.add_argument('--e2e-requests', type=int, default=2000, help='rows sent by each end-to-end run')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--accounts', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=1, help='runs per benchmark; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved with --output')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed slowdown before failing')
+    args = parser.parse_args()
+
+    groups = set(args.only.split(','))
+    population = Population(args.users, args.accounts, args.seed)
+    runs: List[Result] = []
+
+    print(f"{'benchmark':<28} {'scale':>10} {'ops':>10} {'ops/s':>12} {'ns/op':>12}")
+    for _ in range(args.repeat):
+        for scale in args.scales:
+            if 'engine' in groups:
+                runs.extend(bench_engine(population, scale, args.seed))
+            if 'logger' in groups:
+                runs.extend(bench_logger(population, scale, args.seed))
+        if 'e2e' in groups:
+            runs.extend(bench_end_to_end(population, args.e2e_requests, args.seed))
+
+    results = [result.to_dict() for result in best_of(runs).values()]
+    for entry in results:
+        print(f"{entry['name']:<28} {entry['scale']:>10} {entry['ops']:>10} "
+              f"{entry['ops_per_second']:>12.0f} {entry['ns_per_op']:>12.0f}")
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline['results'], args.tolerance)
+        print(f"\n{'benchmark':<28} {'scale':>10} {'baseline':>12} {'current':>12} {'change':>8}")
+        for row in rows:
+            flag = '  REGRESSION' if row['regression'] else ''
+            print(f"{row['name']:<28} {row['scale']:>10} {row['baseline']:>12.0f} "
+                  f"{row['current']:>12.0f} {row['ratio'] - 1:>+8.1%}{flag}")
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
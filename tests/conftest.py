@@ -0,0 +1,27 @@
+"""Shared fixtures: the built-in rules and seeded synthetic requests."""
+
+import pytest
+from app.authorization.engine import AuthorizationEngine
+from app.authorization.banking_rules import create_all_rules
+from benchmarks.generators import Population
+
+
+def make_engine(rules=None) -> AuthorizationEngine:
+    engine = AuthorizationEngine()
+    engine.set_rules(create_all_rules() if rules is None else rules)
+    return engine
+
+
+@pytest.fixture(scope='session')
+def population() -> Population:
+    return Population(200, 500, seed=7)
+
+
+@pytest.fixture(scope='session')
+def requests(population):
+    return population.requests(5000, seed=1, skew=1.2)
+
+
+@pytest.fixture
+def engine() -> AuthorizationEngine:
+    return make_engine()
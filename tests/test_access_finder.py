@@ -0,0 +1,77 @@
+"""Reverse queries return exactly what evaluating every pair permits."""
+
+from datetime import datetime
+import pytest
+from app.authorization.models import AuthorizationRequest, Environment, ActionAttributes
+from app.models.access_finder import AccessFinder
+from app.models.datastore import DataStore
+from app.models.storage import InMemoryBackend
+from app.models.sqlite_backend import SQLiteBackend
+from benchmarks.generators import ACTIONS
+from tests.conftest import make_engine
+from tests.test_banking_rules import baseline_rules
+
+CONTEXTS = [(business_hours, amount) for business_hours in (True, False) for amount in (None, 5000)]
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def datastore(request, tmp_path, population):
+    datastore = DataStore()
+    if request.param == 'memory':
+        datastore.configure_backend(InMemoryBackend())
+    else:
+        datastore.configure_backend(SQLiteBackend(str(tmp_path / 'store.db')))
+    datastore.bulk_create_users(population.users)
+    datastore.bulk_upsert_resources(population.accounts)
+    yield datastore
+    datastore.configure_backend(InMemoryBackend())
+
+
+@pytest.fixture(params=['declarative', 'opaque'])
+def engine(request):
+    return make_engine(None if request.param == 'declarative' else baseline_rules())
+
+
+def permitted(engine, user, action, account, business_hours, amount) -> bool:
+    request = AuthorizationRequest(
+        user=user,
+        action=action,
+        resource=account,
+        environment=Environment(timestamp=datetime(2024, 1, 1), business_hours=business_hours),
+        action_attributes=ActionAttributes(amount=amount, type=action)
+    )
+    return engine.evaluate(request).decision == 'permit'
+
+
+def test_resources_for_matches_brute_force(datastore, engine, population):
+    finder = AccessFinder(datastore, engine)
+    for user in population.users[:3]:
+        for action in ACTIONS:
+            for business_hours, amount in CONTEXTS:
+                result = finder.resources_for(
+                    user, action,
+                    Environment(timestamp=datetime(2024, 1, 1), business_hours=business_hours),
+                    ActionAttributes(amount=amount, type=action)
+                )
+                expected = sorted(
+                    account.id for account in population.accounts
+                    if permitted(engine, user, action, account, business_hours, amount)
+                )
+                assert result.ids == expected, (user.id, action, business_hours, amount, str(result.residual))
+
+
+def test_users_for_matches_brute_force(datastore, engine, population):
+    finder = AccessFinder(datastore, engine)
+    for account in population.accounts[:3]:
+        for action in ACTIONS:
+            for business_hours, amount in CONTEXTS:
+                result = finder.users_for(
+                    account, action,
+                    Environment(timestamp=datetime(2024, 1, 1), business_hours=business_hours),
+                    ActionAttributes(amount=amount, type=action)
+                )
+                expected = sorted(
+                    user.id for user in population.users
+                    if permitted(engine, user, action, account, business_hours, amount)
+                )
+                assert result.ids == expected, (account.id, action, business_hours, amount, str(result.residual))
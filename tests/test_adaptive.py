@@ -0,0 +1,80 @@
+"""Adaptive rule ordering never changes a decision."""
+
+import random
+import pytest
+from app.authorization.adaptive import equivalence_groups, verify_reordering
+from app.authorization.engine import PolicySnapshot
+from tests.conftest import make_engine
+
+
+def decisions(engine, requests):
+    return [decision.decision for decision in engine.evaluate_batch(requests)]
+
+
+def test_groups_are_runs_of_equal_effect(engine):
+    groups = equivalence_groups(engine.rules)
+    assert [rule for group in groups for rule in group] == list(engine.rules)
+    for group in groups:
+        assert len({rule.effect for rule in group}) == 1
+    for previous, following in zip(groups, groups[1:]):
+        assert previous[0].effect != following[0].effect
+
+
+def test_verify_rejects_moves_across_runs(engine):
+    rules = list(engine.rules)
+    groups = equivalence_groups(rules)
+    boundary = len(groups[0])
+    swapped = rules[:boundary - 1] + [rules[boundary], rules[boundary - 1]] + rules[boundary + 1:]
+    with pytest.raises(ValueError):
+        verify_reordering(rules, swapped)
+    with pytest.raises(ValueError):
+        verify_reordering(rules, rules[:-1])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_permutations_within_runs_decide_alike(engine, requests, seed):
+    rnd = random.Random(seed)
+    reordered = []
+    for group in equivalence_groups(engine.rules):
+        group = list(group)
+        rnd.shuffle(group)
+        reordered.extend(group)
+    verify_reordering(engine.rules, reordered)
+
+    shuffled = make_engine()
+    shuffled.swap_policy(PolicySnapshot(reordered, ordered=True))
+    assert decisions(shuffled, requests) == decisions(engine, requests)
+
+
+def test_adaptive_engine_decides_like_static(engine, requests):
+    adaptive = make_engine()
+    ordering = adaptive.enable_adaptive_ordering(interval=500, sample_every=2, min_calls=5)
+    observed = [adaptive.evaluate(request).decision for request in requests]
+
+    assert ordering.reorders > 0
+    assert ordering.last_error is None
+    assert observed == decisions(engine, requests)
+    # Sorting by priority again restores the canonical order
+    verify_reordering(PolicySnapshot(adaptive.rules).rules, adaptive.rules)
+
+
+def test_reload_replaces_adapted_order(engine, requests):
+    adaptive = make_engine()
+    adaptive.enable_adaptive_ordering(interval=500, sample_every=2, min_calls=5)
+    for request in requests[:2000]:
+        adaptive.evaluate(request)
+
+    reduced = [rule for rule in engine.rules if rule.id != 'basic_access']
+    adaptive.set_rules(reduced)
+    for request in requests[2000:]:
+        adaptive.evaluate(request)
+
+    assert {rule.id for rule in adaptive.rules} == {rule.id for rule in reduced}
+    assert decisions(adaptive, requests) == decisions(make_engine(reduced), requests)
+
+
+def test_swap_with_stale_expected_snapshot_is_refused(engine):
+    stale = engine.policy
+    engine.set_rules(list(engine.rules)[1:])
+    assert engine.swap_policy(PolicySnapshot(stale.rules), expected=stale) is None
+    assert len(engine.rules) == len(stale.rules) - 1
@@ -0,0 +1,113 @@
+"""Grouped analysis agrees with evaluating the full grid of attribute values."""
+
+import random
+from collections import Counter
+import pytest
+from app.authorization import analyzer
+from app.authorization.analyzer import _Grid, analyze, build_domains, match_classes
+from app.authorization.banking_rules import create_all_rules
+from app.authorization.conditions import AttributeRef, Condition
+from app.authorization.engine import PolicySnapshot
+from app.authorization.rules import AuthorizationRule
+
+PATHS = {
+    'user.attributes.role': ['writer', 'editor', 'publisher', 'subscriber'],
+    'user.attributes.clearance_level': [1, 2, 3, 4, 5],
+    'resource.attributes.sensitivity_level': [1, 2, 3, 4, 5],
+    'resource.attributes.status': ['active', 'inactive', 'pending'],
+    'action': ['create_article', 'edit_article', 'publish'],
+    'environment.business_hours': [True, False],
+}
+RELATIONS = [('user.attributes.clearance_level', 'ge', 'resource.attributes.sensitivity_level')]
+
+
+def random_rules(seed, count=8):
+    rnd = random.Random(seed)
+    rules = []
+    for index in range(count):
+        conditions = []
+        for path in rnd.sample(sorted(PATHS), rnd.randint(0, 2)):
+            values = PATHS[path]
+            if rnd.random() < 0.5:
+                conditions.append(Condition(path, 'in', set(rnd.sample(values, rnd.randint(1, len(values))))))
+            else:
+                conditions.append(Condition(path, 'eq', rnd.choice(values)))
+        if rnd.random() < 0.3:
+            left, op, right = RELATIONS[0]
+            conditions.append(Condition(left, op, AttributeRef(right)))
+        rules.append(AuthorizationRule(
+            id=f'r{index}', name=f'r{index}', conditions=conditions,
+            priority=rnd.randint(1, 100), effect=rnd.choice(['permit', 'deny'])
+        ))
+    return rules
+
+
+def classes(masks, weights):
+    counts = Counter()
+    for column, weight in zip(masks.T, weights):
+        counts[tuple(column)] += int(weight)
+    return counts
+
+
+def full_grid_classes(rules, domains):
+    return _Grid(domains).match_classes(rules)
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_grouped_classes_match_the_full_grid(seed):
+    rules = sorted(random_rules(seed), key=lambda rule: rule.priority, reverse=True)
+    domains = build_domains(rules)
+    assert classes(*match_classes(rules, domains)) == classes(*full_grid_classes(rules, domains))
+
+
+@pytest.mark.parametrize('seed', [None] + list(range(6)))
+def test_grouped_report_matches_the_full_grid(seed, monkeypatch):
+    rules = create_all_rules() if seed is None else random_rules(seed)
+    report = analyze(rules).to_dict()
+    monkeypatch.setattr(analyzer, 'match_classes', full_grid_classes)
+    assert report == analyze(rules).to_dict()
+
+
+def test_builtin_rules_are_analyzed_group_by_group(monkeypatch):
+    sizes = []
+    points = _Grid.__init__
+
+    def recording(self, domains):
+        points(self, domains)
+        sizes.append(self.points)
+
+    monkeypatch.setattr(_Grid, '__init__', recording)
+    report = analyze(create_all_rules())
+    assert report.points > 10_000_000
+    assert max(sizes) < 1000
+
+
+def test_related_attributes_beyond_the_limit_are_rejected(monkeypatch):
+    monkeypatch.setattr(analyzer, 'MAX_POINTS', 100)
+    rules = [AuthorizationRule(
+        id='wide', name='wide', priority=1, effect='permit',
+        conditions=[Condition(path, 'eq', values[0]) for path, values in PATHS.items()]
+    )]
+    with pytest.raises(ValueError):
+        analyze(rules)
+
+
+def test_analysis_is_computed_once_per_snapshot(monkeypatch):
+    snapshot = PolicySnapshot(create_all_rules())
+    calls = []
+    monkeypatch.setattr(analyzer, 'analyze', lambda rules: calls.append(rules) or object())
+    first = snapshot.get_analysis()
+    assert snapshot.get_analysis() is first
+    assert PolicySnapshot(create_all_rules()).get_analysis() is not first
+    assert len(calls) == 2
+
+
+def test_analysis_route_serves_the_cached_report():
+    from app.api.app import create_app
+    application = create_app()
+    client = application.test_client()
+    first = client.get('/api/policy/analysis')
+    assert first.status_code == 200
+    assert first.get_json()['points'] == analyze(create_all_rules()).points
+    assert application.auth_engine.policy._analysis is not None
+    assert client.get('/api/policy/analysis').get_json() == first.get_json()
@@ -0,0 +1,96 @@
+"""The declarative built-in rules decide like the original closures."""
+
+import random
+import pytest
+from app.authorization.rules import AuthorizationRule
+from app.models.user import User, UserAttributes, Location
+from app.models.account import Account, AccountAttributes
+from tests.conftest import make_engine
+
+EDIT_ACTIONS = {'create_article', 'edit_article', 'publish', 'unpublish'}
+
+
+def baseline_rules():
+    """The rules as first written, with opaque conditions the decision table cannot index."""
+    def after_hours(req):
+        amount = req.action_attributes.amount
+        return not req.environment.business_hours and amount and amount > 1000
+
+    closures = [
+        ('basic_access', 'permit', 100,
+         lambda req: req.user.attributes.role in {'writer', 'editor', 'publisher'}),
+        ('senior_access', 'permit', 90,
+         lambda req: req.user.attributes.level in {'senior', 'executive'} and req.action in EDIT_ACTIONS),
+        ('owner_access', 'permit', 95,
+         lambda req: req.user.id == req.resource.attributes.owner_id),
+        ('location_access', 'permit', 85,
+         lambda req: req.user.attributes.location.primary == req.resource.attributes.location),
+        ('clearance_access', 'permit', 80,
+         lambda req: req.user.attributes.clearance_level >= req.resource.attributes.sensitivity_level),
+        ('after_hours_deny', 'deny', 200, after_hours),
+        ('cross_location_deny', 'deny', 150,
+         lambda req: req.user.attributes.role == 'writer'
+         and req.user.attributes.location.primary != req.resource.attributes.location),
+        ('inactive_resource_deny', 'deny', 180,
+         lambda req: req.resource.attributes.status == 'inactive'),
+        ('junior_restriction', 'deny', 120,
+         lambda req: req.user.attributes.level == 'junior' and req.action in {'publish', 'unpublish'}),
+        ('high_sensitivity_deny', 'deny', 190,
+         lambda req: req.resource.attributes.sensitivity_level >= 4
+         and req.user.attributes.clearance_level < 4),
+    ]
+    return [
+        AuthorizationRule(id=rule_id, name=rule_id, condition=condition, priority=priority, effect=effect)
+        for rule_id, effect, priority, condition in closures
+    ]
+
+
+def test_table_matches_baseline_closures(population):
+    baseline = make_engine(baseline_rules())
+    table = make_engine()
+    rnd = random.Random(3)
+    for request in population.requests(3000, seed=11):
+        # Requests parsed without coercion may carry any JSON value here
+        request.environment.business_hours = rnd.choice([True, False, None, '', 0, 1])
+        request.action_attributes.amount = rnd.choice([None, 0, 500, 5000])
+        assert table.evaluate(request).decision == baseline.evaluate(request).decision, request
+
+
+@pytest.mark.parametrize('business_hours', [False, None, '', 0])
+def test_after_hours_denies_any_falsy_business_hours(population, business_hours):
+    engine = make_engine()
+    request = population.requests(1, seed=12)[0]
+    request.environment.business_hours = business_hours
+    request.action_attributes.amount = 5000
+    decision = engine.evaluate(request)
+    assert decision.decision == 'deny'
+    assert decision.reason == 'Denied by rule: After Hours High-Value Restriction'
+
+
+@pytest.mark.parametrize('business_hours', [None, False, True])
+def test_transaction_route_coerces_business_hours(business_hours):
+    from app.api.app import create_app
+    from app.models.storage import InMemoryBackend
+    application = create_app()
+    # The data store is a process-wide singleton; start from an empty one
+    application.datastore.configure_backend(InMemoryBackend())
+    application.datastore.create_user(User(
+        id='u1', name='u1',
+        attributes=UserAttributes(
+            role='editor', level='senior', location=Location('NYC', 'LA', 'region'), clearance_level=5
+        )
+    ))
+    application.datastore.create_account(Account(
+        id='a1',
+        attributes=AccountAttributes(
+            resource_type='type_a', owner_id='u1', status='active', sensitivity_level=1, location='NYC'
+        )
+    ))
+    response = application.test_client().post('/api/transactions', json={
+        'user_id': 'u1', 'account_id': 'a1', 'action': 'withdrawal',
+        'amount': 5000, 'business_hours': business_hours
+    })
+    decision = application.transaction_executor.decision_logger.decisions[-1]
+    assert decision.decision == ('permit' if business_hours else 'deny')
+    if not business_hours:
+        assert response.status_code == 403
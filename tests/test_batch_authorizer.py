@@ -0,0 +1,42 @@
+"""Batch checks are audited by default."""
+
+import pytest
+from app.models.storage import InMemoryBackend
+
+
+@pytest.fixture
+def application(population):
+    from app.api.app import create_app
+    application = create_app()
+    # The data store is a process-wide singleton; start from an empty one
+    application.datastore.configure_backend(InMemoryBackend())
+    for user in population.users[:20]:
+        application.datastore.create_user(user)
+    for account in population.accounts[:20]:
+        application.datastore.create_account(account)
+    return application
+
+
+def rows(population):
+    return [
+        [user.id, account.id, 'publish', {'business_hours': False, 'amount': 5000}]
+        for user in population.users[:5] for account in population.accounts[:4]
+    ]
+
+
+def logged_after(application, body) -> int:
+    logger = application.decision_logger
+    logger.flush()
+    before = logger.next_seq
+    response = application.test_client().post('/api/authorize/batch', json=body)
+    assert response.status_code == 200
+    logger.flush()
+    return logger.next_seq - before
+
+
+def test_batch_decisions_are_logged_by_default(application, population):
+    assert logged_after(application, {'requests': rows(population)}) == 20
+
+
+def test_batch_logging_can_be_turned_off(application, population):
+    assert logged_after(application, {'requests': rows(population), 'log': False}) == 0
@@ -0,0 +1,101 @@
+"""NDJSON bulk imports on the in-memory and SQLite backends."""
+
+import json
+import pytest
+from app.models.bulk_importer import BulkImporter
+from app.models.datastore import DataStore
+from app.models.storage import InMemoryBackend
+from app.models.sqlite_backend import SQLiteBackend
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def datastore(request, tmp_path):
+    datastore = DataStore()
+    if request.param == 'memory':
+        datastore.configure_backend(InMemoryBackend())
+    else:
+        datastore.configure_backend(SQLiteBackend(str(tmp_path / 'store.db')))
+    yield datastore
+    datastore.configure_backend(InMemoryBackend())
+
+
+def ndjson(rows):
+    return [row if isinstance(row, str) else json.dumps(row) for row in rows]
+
+
+def test_import_users_reports_errors_per_line(datastore, population):
+    users = [user.to_dict() for user in population.users[:4]]
+    datastore.create_user(population.users[3])
+    anonymous = dict(users[0], id='')
+    lines = ndjson([
+        users[0],
+        '',                                        # blank lines are skipped
+        '{"name": ',                               # 3: invalid JSON
+        '[1, 2]',                                  # 4: not an object
+        {'id': 'x', 'attributes': {}},             # 5: no name
+        dict(users[1], attributes={'role': 'writer'}),   # 6: missing attribute
+        users[2],
+        dict(users[0], name='again'),              # 8: duplicate within the batch
+        users[3],                                  # 9: already stored
+        anonymous,
+    ])
+    result = BulkImporter(datastore).import_users(lines)
+
+    assert result.count == 9
+    assert sorted(result.errors) == [3, 4, 5, 6, 8, 9]
+    assert result.errors[5] == "Field 'name' is required"
+    assert result.errors[8] == f"User with ID {users[0]['id']} already exists"
+    assert result.errors[9] == f"User with ID {users[3]['id']} already exists"
+    assert result.ids[:2] == [users[0]['id'], users[2]['id']]
+    assert len(result.ids) == 3 and result.ids[2]
+    # The first row with a duplicated ID wins
+    assert datastore.get_user(users[0]['id']).name == users[0]['name']
+    assert datastore.get_user(users[1]['id']) is None
+    assert datastore.get_user(result.ids[2]).name == anonymous['name']
+    assert result.to_dict()['errors'].keys() == {'3', '4', '5', '6', '8', '9'}
+
+
+def test_upsert_accounts_creates_and_replaces(datastore, population):
+    accounts = [account.to_dict() for account in population.accounts[:3]]
+    datastore.create_account(population.accounts[0])
+    replaced = dict(accounts[0], attributes=dict(accounts[0]['attributes'], status='inactive'))
+    lines = ndjson([replaced, accounts[1], {'id': 'broken'}, accounts[2], dict(accounts[2], id='')])
+    result = BulkImporter(datastore).upsert_accounts(lines)
+
+    assert result.count == 5
+    assert list(result.errors) == [3]
+    assert result.ids[:3] == [accounts[0]['id'], accounts[1]['id'], accounts[2]['id']]
+    assert datastore.get_account(accounts[0]['id']).attributes.status == 'inactive'
+    assert datastore.get_account(result.ids[3]).attributes.owner_id == accounts[2]['attributes']['owner_id']
+
+
+def test_row_limit_is_enforced(datastore, population):
+    lines = ndjson(user.to_dict() for user in population.users[:3])
+    with pytest.raises(ValueError):
+        BulkImporter(datastore).import_users(lines, max_rows=2)
+    assert all(datastore.get_user(user.id) is None for user in population.users[:3])
+
+
+@pytest.mark.parametrize('kind', ['users', 'accounts'])
+def test_sqlite_import_writes_in_one_transaction(tmp_path, population, kind):
+    datastore = DataStore()
+    backend = SQLiteBackend(str(tmp_path / 'store.db'))
+    datastore.configure_backend(backend)
+    statements = []
+    backend._connection().set_trace_callback(statements.append)
+    try:
+        importer = BulkImporter(datastore)
+        if kind == 'users':
+            result = importer.import_users(ndjson(user.to_dict() for user in population.users[:50]))
+        else:
+            result = importer.upsert_accounts(ndjson(account.to_dict() for account in population.accounts[:50]))
+    finally:
+        backend._connection().set_trace_callback(None)
+        datastore.configure_backend(InMemoryBackend())
+    assert len(result.ids) == 50
+    begins = [index for index, statement in enumerate(statements) if statement.startswith('BEGIN')]
+    commits = [index for index, statement in enumerate(statements) if statement == 'COMMIT']
+    assert len(begins) == 1 and len(commits) == 1
+    writes = [index for index, statement in enumerate(statements) if statement.startswith('INSERT')]
+    assert len(writes) == 50
+    assert begins[0] < writes[0] and writes[-1] < commits[0]
@@ -0,0 +1,80 @@
+"""The decision cache never changes a decision and stays bounded."""
+
+import copy
+import random
+import time
+from app.authorization.decision_cache import DecisionCache
+from app.authorization.rules import AuthorizationRule
+from app.authorization.conditions import Condition
+from tests.conftest import make_engine
+
+
+def test_cached_engine_decides_like_uncached(requests):
+    cached = make_engine()
+    cached.enable_cache(max_size=256)
+    uncached = make_engine()
+    for request in requests:
+        assert cached.evaluate(request).decision == uncached.evaluate(request).decision
+    statistics = cached.cache.get_statistics()
+    assert statistics.hits > 0
+    assert statistics.size <= 256
+
+
+def test_entity_changes_need_no_invalidation(population):
+    cached = make_engine()
+    cached.enable_cache()
+    uncached = make_engine()
+    # Private copies: the changes below must not leak into the shared population
+    requests = copy.deepcopy(population.requests(2000, seed=21, skew=1.2))
+    rnd = random.Random(5)
+    for index, request in enumerate(requests):
+        if index % 10 == 0:
+            # Change attributes the rules read on entities already seen
+            request.resource.attributes.status = rnd.choice(['active', 'inactive'])
+            request.resource.attributes.sensitivity_level = rnd.randrange(6)
+            request.user.attributes.clearance_level = rnd.randrange(1, 6)
+            request.user.attributes.level = rnd.choice(['junior', 'senior'])
+        assert cached.evaluate(request).decision == uncached.evaluate(request).decision, index
+
+
+def test_swap_clears_cache(requests):
+    engine = make_engine()
+    engine.enable_cache()
+    request = requests[0]
+    engine.evaluate(request)
+    assert len(engine.cache) == 1
+    engine.set_rules([AuthorizationRule(
+        id='deny_all', name='Deny all', effect='deny',
+        conditions=[Condition('action', 'ne', '')]
+    )])
+    assert len(engine.cache) == 0
+    assert engine.evaluate(request).decision == 'deny'
+
+
+def test_eviction_keeps_recently_used_entries():
+    cache = DecisionCache(max_size=3)
+    for key in 'abc':
+        cache.put((key,), ('permit', key, ()))
+    assert cache.get(('a',)) is not None
+    cache.put(('d',), ('permit', 'd', ()))
+    assert len(cache) == 3
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) is not None
+    assert cache.evictions == 1
+
+
+def test_expired_entries_are_misses():
+    cache = DecisionCache(max_size=10, ttl=0.01)
+    cache.put(('a',), ('permit', 'a', ()))
+    time.sleep(0.02)
+    assert cache.get(('a',)) is None
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+
+def test_put_from_before_clear_is_dropped():
+    cache = DecisionCache()
+    generation = cache.generation
+    cache.clear()
+    cache.put(('a',), ('permit', 'a', ()), generation)
+    assert len(cache) == 0
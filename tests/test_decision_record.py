@@ -0,0 +1,38 @@
+"""Decision records round-trip and intern only low-cardinality values."""
+
+from app.authorization.decision_record import DecisionRecord, intern_table
+
+
+def test_records_round_trip(engine, requests):
+    for request in requests[:500]:
+        decision = engine.evaluate(request)
+        record = DecisionRecord.from_decision(decision)
+        assert record.to_dict() == decision.to_dict()
+        assert DecisionRecord.from_dict(record.to_dict()).to_dict() == record.to_dict()
+        assert record.get('user.id') == request.user.id
+        assert record.get('action_attributes.amount') == request.action_attributes.amount
+
+
+def test_high_cardinality_values_are_not_interned(engine, population):
+    table = intern_table()
+    # Warm the table with the low-cardinality values
+    for request in population.requests(1000, seed=41):
+        DecisionRecord.from_decision(engine.evaluate(request))
+    before = len(table)
+    records = [DecisionRecord.from_decision(engine.evaluate(request)) for request in population.requests(1000, seed=42)]
+    for record in records:
+        DecisionRecord.from_dict(record.to_dict())
+    assert len(table) - before < 10
+
+
+def test_new_values_are_kept_raw_once_the_table_is_full(engine, requests, monkeypatch):
+    table = intern_table()
+    monkeypatch.setattr(table, 'max_size', len(table))
+    decision = engine.evaluate(requests[0])
+    data = decision.to_dict()
+    data['request']['user']['attributes']['role'] = 'never-seen-role'
+    data['reason'] = 'never-seen reason'
+    record = DecisionRecord.from_dict(data)
+    assert record.to_dict() == data
+    assert record.get('user.attributes.role') == 'never-seen-role'
+    assert len(table) == table.max_size
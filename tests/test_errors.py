@@ -0,0 +1,53 @@
+"""Flask error responses are shaped by error_body."""
+
+import pytest
+from flask import Flask
+from app.api.errors import (
+    AuthorizationError, NotFoundError, ServerError, ValidationError, error_body, register_error_handlers
+)
+
+ERRORS = [
+    ValidationError("bad input", {'field': 'amount'}),
+    AuthorizationError("denied", {'rule': 'r1'}),
+    NotFoundError("missing"),
+    ServerError("broken", {'trace': 'hidden'}),
+    RuntimeError("unexpected"),
+]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    register_error_handlers(app)
+
+    @app.route('/raise/<int:index>')
+    def raise_error(index):
+        raise ERRORS[index]
+
+    return app.test_client()
+
+
+@pytest.mark.parametrize('index', range(len(ERRORS)))
+def test_flask_handlers_return_error_body(client, index):
+    response = client.get(f'/raise/{index}')
+    body, status = error_body(ERRORS[index])
+    assert response.status_code == status
+    assert response.get_json() == body
+
+
+def test_error_body_shapes():
+    assert error_body(ERRORS[0]) == (
+        {'error': {'code': 'validation_error', 'message': 'bad input', 'details': {'field': 'amount'}}}, 400
+    )
+    # Server errors never expose details or unexpected messages
+    assert error_body(ERRORS[3]) == ({'error': {'code': 'server_error', 'message': 'broken'}}, 500)
+    assert error_body(ERRORS[4]) == (
+        {'error': {'code': 'server_error', 'message': 'An unexpected error occurred'}}, 500
+    )
+
+
+def test_subclasses_keep_their_base_code():
+    class AmountError(ValidationError):
+        pass
+
+    assert error_body(AmountError("too large"))[0]['error']['code'] == 'validation_error'
@@ -0,0 +1,33 @@
+"""Every module of the application and the benchmarks imports."""
+
+import importlib
+import pkgutil
+import pytest
+import app
+import benchmarks
+
+MODULES = sorted(
+    module.name
+    for package in (app, benchmarks)
+    for module in pkgutil.walk_packages(package.__path__, package.__name__ + '.')
+)
+
+
+@pytest.mark.parametrize('name', MODULES)
+def test_module_imports(name):
+    importlib.import_module(name)
+
+
+def test_account_names_alias_the_resource_model():
+    from app.models.account import Account, AccountAttributes, Article, ArticleAttributes
+    assert Account is Article
+    assert AccountAttributes is ArticleAttributes
+
+
+def test_app_factory_loads_builtin_rules():
+    from app.api.app import create_app
+    from app.authorization.banking_rules import create_all_rules
+    application = create_app()
+    assert [rule.id for rule in application.auth_engine.rules] == [
+        rule.id for rule in sorted(create_all_rules(), key=lambda r: r.priority, reverse=True)
+    ]
@@ -0,0 +1,144 @@
+"""Workers read the aggregator's log in bounded pages."""
+
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app.authorization.banking_rules import create_all_rules
+from app.authorization.decision_logger import DecisionLogger
+from app.authorization.log_aggregator import AggregatorClient, LogAggregator, RemoteDecisionLogger
+from app.authorization.mining import logger_records
+from app.authorization.replay import logger_tasks, replay
+
+START = datetime(2024, 1, 1)
+COUNT = 50
+PAGE_SIZE = 7
+
+
+@pytest.fixture
+def logger():
+    logger = DecisionLogger()
+    logger.clear()
+    yield logger
+    logger.clear()
+
+
+@pytest.fixture
+def remote(tmp_path, logger, engine, population):
+    aggregator = LogAggregator(str(tmp_path / 'log.sock'), b'key', logger)
+    threading.Thread(target=aggregator.serve_forever, daemon=True).start()
+    remote = RemoteDecisionLogger(AggregatorClient(str(tmp_path / 'log.sock'), b'key'), page_size=PAGE_SIZE)
+    for offset, request in enumerate(population.requests(COUNT, seed=61)):
+        decision = engine.evaluate(request)
+        decision.timestamp = START + timedelta(seconds=offset)
+        remote.log(decision)
+    yield remote
+    remote.close()
+    aggregator.close()
+
+
+@pytest.fixture
+def calls(remote, monkeypatch):
+    calls = []
+    call = remote.client.call
+
+    def recording(operation, *args):
+        result = call(operation, *args)
+        calls.append((operation, args, result))
+        return result
+
+    monkeypatch.setattr(remote.client, 'call', recording)
+    return calls
+
+
+def local_export(logger, **options):
+    records, next_cursor = logger.export_records(**options)
+    return list(records), next_cursor
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'limit': 20},
+    {'cursor': 13},
+    {'cursor': 13, 'limit': 7},
+    {'since': START + timedelta(seconds=30)},
+    {'since': START + timedelta(seconds=30), 'cursor': 40, 'limit': 100},
+    {'cursor': COUNT},
+])
+def test_export_matches_the_aggregator_log(remote, logger, calls, options):
+    records, next_cursor = remote.export_records(**options)
+    assert (list(records), next_cursor) == local_export(logger, **options)
+    pages = [result[0] for operation, _, result in calls if operation == 'export']
+    assert all(0 < len(page) <= PAGE_SIZE for page in pages)
+
+
+def test_export_reads_pages_lazily(remote, calls):
+    records, next_cursor = remote.export_records()
+    assert next_cursor == COUNT
+    assert [operation for operation, _, _ in calls] == ['export_cursor']
+    next(records)
+    assert [operation for operation, _, _ in calls] == ['export_cursor', 'export']
+
+
+def test_export_stops_at_its_end_cursor(remote, engine, population):
+    records, next_cursor = remote.export_records()
+    first = next(records)
+    # Decisions logged while the export is read are left for the next one
+    for request in population.requests(10, seed=62):
+        remote.log(engine.evaluate(request))
+    rest = list(records)
+    assert [first['seq']] + [record['seq'] for record in rest] == list(range(COUNT))
+    records, _ = remote.export_records(cursor=next_cursor)
+    assert [record['seq'] for record in records] == list(range(COUNT, COUNT + 10))
+
+
+def test_invalid_export_parameters_are_rejected(remote):
+    with pytest.raises(ValueError):
+        remote.export_records(cursor=-1)
+    with pytest.raises(ValueError):
+        remote.export_records(limit=0)
+
+
+def test_replay_pages_through_the_aggregator(remote, logger, calls):
+    rules = [rule.to_dict() for rule in create_all_rules()]
+    # Without the highest-priority deny, some decisions flip
+    rules.sort(key=lambda rule: rule['priority'])
+    bundle = {'version': 'candidate', 'rules': rules[:-1]}
+    report = replay(bundle, logger_tasks(remote, chunk_size=10), workers=0)
+    assert report.replayed == COUNT and report.flipped
+    assert report.to_dict() == replay(bundle, logger_tasks(logger), workers=0).to_dict()
+    pages = [result[0] for operation, _, result in calls if operation == 'export']
+    assert len(pages) == -(-COUNT // PAGE_SIZE)
+
+
+def test_mining_records_come_in_bounded_pages(remote, logger, calls):
+    since = START + timedelta(seconds=10)
+    records = list(logger_records(remote, since=since, limit=30))
+    assert records == list(logger_records(logger, since=since, limit=30))
+    assert [record['seq'] for record in records] == list(range(10, 40))
+    assert [record.to_dict() for record in remote.iter_decisions()] == [
+        record.to_dict() for record in logger.iter_decisions()
+    ]
+    pages = [result[0] for operation, _, result in calls if operation == 'export']
+    assert all(len(page) <= PAGE_SIZE for page in pages)
+
+
+def test_mining_route_reads_a_capped_window(remote, monkeypatch):
+    from app.api.app import create_app
+    from app.api.routes import MAX_MINING_RECORDS
+    monkeypatch.setenv('DECISION_LOG_AGGREGATOR', remote.client.address)
+    monkeypatch.setenv('DECISION_LOG_AGGREGATOR_KEY', 'key')
+    application = create_app()
+    assert isinstance(application.decision_logger, RemoteDecisionLogger)
+    client = application.test_client()
+    try:
+        response = client.get('/api/policy/mining', query_string={'min_support': 0.05})
+        assert response.status_code == 200
+        assert response.get_json()['records'] == COUNT
+        since = (START + timedelta(seconds=20)).isoformat()
+        response = client.get('/api/policy/mining', query_string={'since': since, 'limit': 10, 'min_support': 0.05})
+        assert response.get_json()['records'] == 10
+        assert client.get('/api/policy/mining', query_string={'limit': MAX_MINING_RECORDS + 1}).status_code == 400
+        assert client.get('/api/policy/mining', query_string={'limit': 0}).status_code == 400
+        assert client.get('/api/policy/mining', query_string={'since': 'yesterday'}).status_code == 400
+    finally:
+        application.decision_logger.close()
@@ -0,0 +1,119 @@
+"""Streaming exports of the decision log: shapes, compression and cursors."""
+
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+import pytest
+from app.authorization.log_columnar import read_columnar
+from benchmarks.generators import Population
+from tests.conftest import make_engine
+
+START = datetime(2024, 1, 1)
+COUNT = 300
+
+
+@pytest.fixture(scope='module')
+def application():
+    from app.api.app import create_app
+    application = create_app()
+    logger = application.decision_logger
+    logger.clear()
+    yield application
+    logger.clear()
+
+
+@pytest.fixture(scope='module')
+def expected(application):
+    engine = make_engine()
+    logger = application.decision_logger
+    for offset, request in enumerate(Population(50, 100, seed=3).requests(COUNT, seed=4)):
+        decision = engine.evaluate(request)
+        decision.timestamp = START + timedelta(seconds=offset)
+        logger.log(decision)
+    logger.flush()
+    return [dict(record.to_dict(), seq=seq) for seq, record in enumerate(logger.iter_decisions())]
+
+
+def export(application, **params):
+    response = application.test_client().get('/api/decisions/export', query_string=params)
+    assert response.status_code == 200
+    body = response.get_data()
+    if params.get('compression') == 'gzip':
+        assert response.headers['Content-Encoding'] == 'gzip'
+        body = gzip.decompress(body)
+    return body, int(response.headers['X-Next-Cursor'])
+
+
+def parse(body: bytes, format: str):
+    if format == 'json':
+        return json.loads(body)
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip'])
+@pytest.mark.parametrize('format', ['json', 'ndjson'])
+def test_json_shapes_round_trip(application, expected, format, compression):
+    params = {'format': format}
+    if compression:
+        params['compression'] = compression
+    body, next_cursor = export(application, **params)
+    if format == 'json':
+        assert body.startswith(b'[') and body.endswith(b']')
+    else:
+        assert body.endswith(b'\n')
+    assert parse(body, format) == expected
+    assert next_cursor == COUNT
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip'])
+def test_columnar_round_trips(application, expected, compression):
+    params = {'format': 'columnar'}
+    if compression:
+        params['compression'] = compression
+    body, _ = export(application, **params)
+    table = read_columnar(io.BytesIO(body))
+    assert len(table) == COUNT
+    assert table.column('seq').values == [record['seq'] for record in expected]
+    assert table.column('decision').values == [record['decision'] for record in expected]
+    assert table.column('user.id').values == [record['request']['user']['id'] for record in expected]
+
+
+@pytest.mark.parametrize('format', ['json', 'ndjson'])
+@pytest.mark.parametrize('limit', [1, 37, 300, 1000])
+def test_cursor_pages_have_no_gap_or_duplicate(application, expected, format, limit):
+    seen = []
+    cursor = 0
+    while True:
+        body, next_cursor = export(application, format=format, cursor=cursor, limit=limit)
+        page = parse(body, format)
+        assert len(page) <= limit
+        if not page:
+            assert next_cursor == cursor
+            break
+        assert next_cursor == page[-1]['seq'] + 1
+        seen.extend(page)
+        cursor = next_cursor
+    assert seen == expected
+
+
+def test_since_selects_later_decisions_and_pages(application, expected):
+    since = START + timedelta(seconds=200)
+    wanted = [record for record in expected if datetime.fromisoformat(record['timestamp']) >= since]
+    seen = []
+    cursor = 0
+    while True:
+        body, cursor = export(application, format='ndjson', since=since.isoformat(), cursor=cursor, limit=40)
+        page = parse(body, 'ndjson')
+        if not page:
+            break
+        seen.extend(page)
+    assert seen == wanted
+
+
+def test_invalid_parameters_are_rejected(application):
+    client = application.test_client()
+    assert client.get('/api/decisions/export?format=xml').status_code == 400
+    assert client.get('/api/decisions/export?compression=zip').status_code == 400
+    assert client.get('/api/decisions/export?cursor=-1').status_code == 400
+    assert client.get('/api/decisions/export?limit=0').status_code == 400
@@ -0,0 +1,80 @@
+"""Index lookups agree with a scan and forget decisions no longer held."""
+
+import random
+from datetime import datetime, timedelta
+import pytest
+from app.authorization.decision_logger import DecisionLogger, LogQueryFilters, DEFAULT_BUFFER_SIZE
+from app.authorization.log_index import DecisionIndex
+from app.authorization.log_store import SegmentedLogStore
+
+START = datetime(2024, 1, 1)
+USERS = ['u1', 'u2', 'u3']
+ACTIONS = ['read', 'publish']
+
+
+def entries(count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    return [
+        (seq, rnd.choice(USERS), rnd.choice(ACTIONS), rnd.choice(['permit', 'deny']),
+         START + timedelta(seconds=seq + rnd.randrange(-5, 5)))
+        for seq in range(count)
+    ]
+
+
+def scan(rows, floor=0, user_id=None, action=None, decision=None, start_time=None, end_time=None):
+    return [
+        seq for seq, user, act, dec, ts in rows
+        if seq >= floor
+        and (user_id is None or user == user_id)
+        and (action is None or act == action)
+        and (decision is None or dec == decision)
+        and (start_time is None or ts >= start_time)
+        and (end_time is None or ts <= end_time)
+    ]
+
+
+QUERIES = [
+    {'user_id': 'u1'},
+    {'user_id': 'u2', 'action': 'publish'},
+    {'decision': 'deny', 'start_time': START + timedelta(seconds=300)},
+    {'action': 'read', 'start_time': START + timedelta(seconds=100), 'end_time': START + timedelta(seconds=700)},
+]
+
+
+@pytest.mark.parametrize('floor', [0, 1, 333, 700, 999, 1000])
+def test_lookup_after_eviction_matches_scan(floor):
+    rows = entries(1000)
+    index = DecisionIndex()
+    for row in rows:
+        index.add(*row)
+    index.evict_before(floor)
+    for query in QUERIES:
+        assert index.lookup(**query) == scan(rows, floor, **query), query
+
+
+def test_eviction_reclaims_memory_as_decisions_arrive():
+    index = DecisionIndex()
+    for seq, user, action, decision, timestamp in entries(10000):
+        index.add(seq, user, action, decision, timestamp)
+        index.evict_before(seq - 99)
+    assert len(index) <= 200
+    assert all(len(seqs) <= 200 for seqs in index.by_user.values())
+
+
+def test_logger_index_follows_segment_retention(tmp_path, engine, requests):
+    logger = DecisionLogger()
+    logger.configure_storage(SegmentedLogStore(str(tmp_path), max_segment_bytes=16 * 1024, max_segments=2), 20)
+    logger.clear()
+    try:
+        for request in requests[:500]:
+            logger.log(engine.evaluate(request))
+        logger.flush()
+        oldest = min(logger.store.oldest_seq, logger.next_seq - len(logger.decisions))
+        assert oldest > 0
+        assert len(logger.index) <= 2 * (logger.next_seq - oldest)
+        denied = logger.query(LogQueryFilters(decision='deny'))
+        assert [record.decision for record in denied] == ['deny'] * len(denied)
+        assert len(denied) == sum(record.decision == 'deny' for record in logger.iter_decisions())
+    finally:
+        logger.configure_storage(None, buffer_size=DEFAULT_BUFFER_SIZE)
+        logger.clear()
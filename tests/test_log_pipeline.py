@@ -0,0 +1,177 @@
+"""Backpressure, flushing and shutdown of the decision log pipeline."""
+
+import threading
+import time
+import pytest
+from app.authorization import log_pipeline
+from app.authorization.log_pipeline import DecisionLogPipeline
+
+TIMEOUT = 5.0
+
+
+class BlockedSink:
+    """A sink that holds the writer inside ``write_batch`` until released."""
+
+    def __init__(self):
+        self.batches = []
+        self.entered = threading.Event()
+        self.released = threading.Event()
+        self.flushes = 0
+
+    def write_batch(self, batch):
+        self.batches.append(list(batch))
+        self.entered.set()
+        assert self.released.wait(TIMEOUT)
+
+    def flush(self):
+        self.flushes += 1
+
+    @property
+    def written(self):
+        return [item for batch in self.batches for item in batch]
+
+
+def wait_until(predicate):
+    deadline = time.monotonic() + TIMEOUT
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def sink():
+    sink = BlockedSink()
+    yield sink
+    sink.released.set()
+
+
+def blocked_pipeline(sink, **options):
+    """A running pipeline whose writer is stuck writing 'first'."""
+    pipeline = DecisionLogPipeline(sink.write_batch, sink.flush, batch_size=1, **options)
+    pipeline.start()
+    pipeline.submit('first')
+    assert sink.entered.wait(TIMEOUT)
+    return pipeline
+
+
+def test_block_waits_for_room(sink):
+    pipeline = blocked_pipeline(sink, max_queue=2, backpressure='block')
+    assert pipeline.submit('a') and pipeline.submit('b')
+    submitter = threading.Thread(target=pipeline.submit, args=('c',))
+    submitter.start()
+    wait_until(lambda: pipeline.get_metrics().blocked == 1)
+    assert submitter.is_alive()
+    assert pipeline.get_metrics().queue_depth == 2
+
+    sink.released.set()
+    submitter.join(TIMEOUT)
+    assert not submitter.is_alive()
+    assert pipeline.flush(TIMEOUT)
+    assert sink.written == ['first', 'a', 'b', 'c']
+    metrics = pipeline.get_metrics()
+    assert (metrics.submitted, metrics.written, metrics.dropped) == (4, 4, 0)
+    pipeline.stop()
+
+
+def test_drop_oldest_discards_the_head_of_the_queue(sink):
+    pipeline = blocked_pipeline(sink, max_queue=2, backpressure='drop_oldest')
+    assert pipeline.submit('a') and pipeline.submit('b')
+    assert pipeline.submit('c')
+    assert pipeline.submit('d')
+    assert pipeline.get_metrics().queue_depth == 2
+
+    sink.released.set()
+    assert pipeline.flush(TIMEOUT)
+    assert sink.written == ['first', 'c', 'd']
+    metrics = pipeline.get_metrics()
+    assert (metrics.submitted, metrics.written, metrics.dropped, metrics.blocked) == (5, 3, 2, 0)
+    pipeline.stop()
+
+
+def test_sample_thins_a_half_full_queue_and_drops_when_full(sink, monkeypatch):
+    draws = iter([0.5, 0.05, 0.0])
+    monkeypatch.setattr(log_pipeline.random, 'random', lambda: next(draws))
+    pipeline = blocked_pipeline(sink, max_queue=4, backpressure='sample', sample_rate=0.1)
+    # Below half full every decision is kept without a draw
+    assert pipeline.submit('a') and pipeline.submit('b')
+    assert not pipeline.submit('c')   # 0.5 >= 0.1: sampled out
+    assert pipeline.submit('d')       # 0.05 < 0.1: kept
+    assert pipeline.submit('e')       # 0.0 < 0.1: kept, queue now full
+    assert not pipeline.submit('f')   # full: dropped without a draw
+
+    sink.released.set()
+    assert pipeline.flush(TIMEOUT)
+    assert sink.written == ['first', 'a', 'b', 'd', 'e']
+    metrics = pipeline.get_metrics()
+    assert (metrics.submitted, metrics.written, metrics.sampled_out, metrics.dropped) == (7, 5, 1, 1)
+    pipeline.stop()
+
+
+def test_flush_times_out_while_the_sink_is_blocked(sink):
+    pipeline = blocked_pipeline(sink, max_queue=10)
+    pipeline.submit('a')
+    started = time.monotonic()
+    assert not pipeline.flush(timeout=0.05)
+    assert time.monotonic() - started < TIMEOUT
+    assert pipeline.get_metrics().written == 0
+
+    sink.released.set()
+    assert pipeline.flush(TIMEOUT)
+    assert sink.written == ['first', 'a']
+    assert sink.flushes >= 1
+    pipeline.stop()
+
+
+def test_stop_drains_the_queue(sink):
+    pipeline = blocked_pipeline(sink, max_queue=100)
+    for index in range(20):
+        pipeline.submit(index)
+    stopper = threading.Thread(target=pipeline.stop, args=(TIMEOUT,))
+    stopper.start()
+    wait_until(lambda: not pipeline.get_metrics().running)
+    assert stopper.is_alive()
+
+    sink.released.set()
+    stopper.join(TIMEOUT)
+    assert not stopper.is_alive()
+    assert sink.written == ['first'] + list(range(20))
+    metrics = pipeline.get_metrics()
+    assert (metrics.queue_depth, metrics.written, metrics.dropped) == (0, 21, 0)
+
+    # After stop, decisions are written on the caller's thread
+    assert pipeline.submit('late')
+    assert sink.written[-1] == 'late'
+
+
+def test_stop_releases_blocked_submitters(sink):
+    pipeline = blocked_pipeline(sink, max_queue=1, backpressure='block')
+    pipeline.submit('a')
+    submitter = threading.Thread(target=pipeline.submit, args=('b',))
+    submitter.start()
+    wait_until(lambda: pipeline.get_metrics().blocked == 1)
+    stopper = threading.Thread(target=pipeline.stop, args=(TIMEOUT,))
+    stopper.start()
+    sink.released.set()
+    submitter.join(TIMEOUT)
+    stopper.join(TIMEOUT)
+    assert not submitter.is_alive() and not stopper.is_alive()
+    assert sorted(map(str, sink.written)) == ['a', 'b', 'first']
+
+
+def test_failing_sink_counts_errors_and_keeps_running():
+    written = []
+
+    def write_batch(batch):
+        if 'bad' in batch:
+            raise RuntimeError("sink down")
+        written.extend(batch)
+
+    pipeline = DecisionLogPipeline(write_batch, batch_size=1)
+    pipeline.start()
+    for item in ['a', 'bad', 'b']:
+        pipeline.submit(item)
+    assert pipeline.flush(TIMEOUT)
+    metrics = pipeline.get_metrics()
+    assert written == ['a', 'b']
+    assert (metrics.errors, metrics.dropped, metrics.written) == (1, 1, 2)
+    pipeline.stop()
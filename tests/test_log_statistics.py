@@ -0,0 +1,105 @@
+"""Running statistics agree with counts recomputed from the logged records."""
+
+import random
+from datetime import datetime, timedelta
+import pytest
+from app.authorization import log_statistics
+from app.authorization.decision_logger import DecisionLogger
+from app.authorization.log_statistics import WINDOWS, WindowCounter
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(NOW.timestamp())
+    monkeypatch.setattr(log_statistics, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def logger():
+    logger = DecisionLogger()
+    logger.clear()
+    yield logger
+    logger.clear()
+
+
+def in_window(timestamp: float, now: float, span: float, buckets: int = 60) -> bool:
+    """Whether a decision falls in the trailing window's tumbling buckets."""
+    width = span / buckets
+    return int(timestamp // width) > int(now // width) - buckets
+
+
+def test_statistics_match_recomputed_counts(clock, logger, engine, requests):
+    rnd = random.Random(17)
+    for request in requests[:2000]:
+        decision = engine.evaluate(request)
+        # Spread over the last two hours, slightly out of order
+        decision.timestamp = NOW - timedelta(seconds=rnd.uniform(0, 7200))
+        logger.log(decision)
+    logger.flush()
+
+    records = list(logger.iter_decisions())
+    statistics = logger.get_statistics()
+    permits = sum(record.decision == 'permit' for record in records)
+    assert statistics.total_decisions == len(records) == 2000
+    assert statistics.permit_rate == pytest.approx(permits / len(records))
+    assert statistics.deny_rate == pytest.approx(1 - permits / len(records))
+
+    by_action, by_rule = {}, {}
+    for record in records:
+        by_action[record.get('action')] = by_action.get(record.get('action'), 0) + 1
+        if record.matched_rule:
+            by_rule[record.matched_rule] = by_rule.get(record.matched_rule, 0) + 1
+    assert statistics.by_action_type == by_action
+    assert statistics.by_matched_rule == by_rule
+
+    # Later windows only see decisions still inside them
+    for advance in (0, 30, 600, 4000):
+        clock.now = NOW.timestamp() + advance
+        windows = logger.get_statistics().windows
+        for name, span in WINDOWS.items():
+            inside = [
+                record for record in records
+                if in_window(record.timestamp.timestamp(), clock.now, span)
+            ]
+            expected_permits = sum(record.decision == 'permit' for record in inside)
+            assert windows[name]['total'] == len(inside), (name, advance)
+            assert windows[name]['permits'] == expected_permits, (name, advance)
+            assert windows[name]['denies'] == len(inside) - expected_permits, (name, advance)
+
+
+def test_window_counter_expires_buckets():
+    counter = WindowCounter(60, buckets=6)
+    start = 6000.0
+    counter.add(start, 'permit')
+    counter.add(start + 15, 'deny')
+    counter.add(start + 35, 'permit')
+    assert counter.totals(start + 35)['total'] == 3
+    # The first ten-second bucket leaves the window
+    assert counter.totals(start + 60)['total'] == 2
+    totals = counter.totals(start + 75)
+    assert (totals['permits'], totals['denies']) == (1, 0)
+    assert totals['permit_rate'] == 1.0
+    assert counter.totals(start + 100)['total'] == 0
+    assert counter.totals(start + 100)['permit_rate'] == 0.0
+
+
+def test_window_counter_counts_late_arrivals_still_in_window():
+    counter = WindowCounter(60, buckets=6)
+    counter.add(6050.0, 'permit')
+    counter.add(6015.0, 'deny')
+    # Older than the window: dropped
+    counter.add(5980.0, 'deny')
+    totals = counter.totals(6050.0)
+    assert (totals['permits'], totals['denies']) == (1, 1)
+    assert counter.totals(6075.0)['denies'] == 0
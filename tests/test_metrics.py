@@ -0,0 +1,75 @@
+"""Rule metrics agree with the decisions the engine returns."""
+
+import re
+from collections import Counter
+import pytest
+from tests.conftest import make_engine
+
+SAMPLE_LINE = re.compile(r'^(\w+)\{rule="([^"]+)"\} (\d+)$')
+
+
+def expected_counts(engine, decisions):
+    """Per-rule (calls, matches) recomputed from each decision's evaluated_rules."""
+    ids = {rule.name: rule.id for rule in engine.get_rules()}
+    calls = Counter()
+    matches = Counter()
+    for decision in decisions:
+        decider = ids[decision.evaluated_rules[-1]] if decision.evaluated_rules else None
+        if decider is not None:
+            matches[decider] += 1
+        # Candidates are checked in order until one matches
+        for rule, _ in engine.get_decision_table().candidates(decision.request):
+            calls[rule.id] += 1
+            if rule.id == decider:
+                break
+    return calls, matches
+
+
+def test_rule_metrics_match_evaluated_rules(population):
+    engine = make_engine()
+    metrics = engine.enable_metrics()
+    decisions = [engine.evaluate(request) for request in population.requests(2000, seed=71)]
+    calls, matches = expected_counts(engine, decisions)
+
+    totals = metrics.rule_totals()
+    assert {rule_id: total[0] for rule_id, total in totals.items()} == calls
+    assert {rule_id: total[1] for rule_id, total in totals.items() if total[1]} == matches
+    assert sum(matches.values()) == sum(1 for decision in decisions if decision.evaluated_rules)
+    assert metrics.evaluation_latency.count == len(decisions)
+
+
+@pytest.fixture
+def application(monkeypatch):
+    from app.api.app import create_app
+    monkeypatch.setenv('METRICS_ENABLED', 'true')
+    # Cache hits skip the rule checks; count every request
+    monkeypatch.setenv('DECISION_CACHE_SIZE', '0')
+    application = create_app()
+    application.decision_logger.clear()
+    yield application
+    application.decision_logger.metrics = None
+    application.decision_logger.clear()
+
+
+def test_metrics_endpoint_reports_rule_counts(application, population):
+    engine = application.auth_engine
+    decisions = []
+    for request in population.requests(300, seed=73):
+        decision = engine.evaluate(request)
+        application.decision_logger.log(decision)
+        decisions.append(decision)
+    calls, matches = expected_counts(engine, decisions)
+
+    response = application.test_client().get('/api/metrics')
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    samples = {'abac_rule_calls_total': {}, 'abac_rule_matches_total': {}}
+    for line in text.splitlines():
+        match = SAMPLE_LINE.match(line)
+        if match and match.group(1) in samples:
+            samples[match.group(1)][match.group(2)] = int(match.group(3))
+    assert samples['abac_rule_calls_total'] == calls
+    assert {rule: count for rule, count in samples['abac_rule_matches_total'].items() if count} == matches
+    assert f'abac_engine_evaluation_seconds_count {len(decisions)}' in text
+    assert f'abac_decision_log_seconds_count {len(decisions)}' in text
+    assert '# TYPE abac_rule_check_seconds histogram' in text
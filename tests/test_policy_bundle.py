@@ -0,0 +1,97 @@
+"""Bundle reloads survive failures and rule additions never lose a rule."""
+
+import threading
+import time
+from app.authorization import engine as engine_module
+from app.authorization.banking_rules import create_all_rules
+from app.authorization.policy_bundle import BundleLoader, write_bundle
+from app.authorization.rules import AuthorizationRule
+from tests.conftest import make_engine
+
+
+def test_check_records_unexpected_errors_and_keeps_watching(tmp_path):
+    path = str(tmp_path / 'bundle.json')
+    rules = create_all_rules()
+    write_bundle(path, rules, '1')
+    applied = []
+    failures = [RuntimeError("apply failed")]
+
+    def apply(snapshot):
+        if failures:
+            raise failures.pop()
+        applied.append(snapshot.version)
+
+    loader = BundleLoader(path, apply)
+    loader.load()
+    write_bundle(path, rules[:-1], '2')
+    loader.watch(interval=0.01)
+    try:
+        deadline = time.monotonic() + 5
+        while loader.status()['last_error'] is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        assert loader.status()['last_error'] == 'RuntimeError: apply failed'
+        assert loader.status()['watching']
+
+        # The watcher retries the same file and recovers
+        while not applied:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        assert applied == ['2']
+        assert loader.status()['last_error'] is None
+    finally:
+        loader.stop()
+
+
+def test_check_reports_invalid_bundles(tmp_path):
+    path = tmp_path / 'bundle.json'
+    write_bundle(str(path), create_all_rules(), '1')
+    loader = BundleLoader(str(path), lambda snapshot: None)
+    loader.load()
+    path.write_text('{"version": "2", "rules": [')
+    assert not loader.check()
+    assert 'Invalid JSON' in loader.status()['last_error']
+    path.unlink()
+    assert not loader.check()
+    assert loader.status()['last_error']
+
+
+def rule(rule_id):
+    return AuthorizationRule(id=rule_id, name=rule_id, condition=lambda request: False, priority=1, effect='deny')
+
+
+def test_add_rule_retries_when_another_swap_lands(monkeypatch):
+    engine = make_engine()
+    before = len(engine.get_rules())
+    compile_snapshot = engine_module.PolicySnapshot
+    raced = []
+
+    def racing_snapshot(*args, **kwargs):
+        snapshot = compile_snapshot(*args, **kwargs)
+        if not raced:
+            raced.append(True)
+            # Another writer swaps in its rules while this snapshot compiles
+            engine.add_rule(rule('other'))
+        return snapshot
+
+    monkeypatch.setattr(engine_module, 'PolicySnapshot', racing_snapshot)
+    engine.add_rule(rule('mine'))
+    ids = [rule.id for rule in engine.get_rules()]
+    assert len(ids) == before + 2
+    assert {'mine', 'other'} <= set(ids)
+
+
+def test_concurrent_add_rule_keeps_every_rule():
+    engine = make_engine()
+    before = len(engine.get_rules())
+
+    def add(thread):
+        for index in range(20):
+            engine.add_rule(rule(f'r{thread}-{index}'))
+
+    threads = [threading.Thread(target=add, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(engine.get_rules()) == before + 160
@@ -0,0 +1,79 @@
+"""SQLite backend connections and cross-process transactions."""
+
+import multiprocessing
+import threading
+import pytest
+from app.models.account import Account, AccountAttributes
+from app.models.datastore import DataStore
+from app.models.storage import InMemoryBackend
+from app.models.sqlite_backend import SQLiteBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'store.db'))
+    yield backend
+    backend.close()
+
+
+def test_thread_connections_close_when_threads_end(backend, population):
+    backend.insert_user(population.users[0])
+
+    def read():
+        assert backend.get_user(population.users[0].id).id == population.users[0].id
+
+    threads = [threading.Thread(target=read) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Only the connection of the thread that created the backend is left
+    assert len(backend._connections) == 1
+
+
+def increment(path: str, times: int):
+    datastore = DataStore()
+    datastore.configure_backend(SQLiteBackend(path))
+    for _ in range(times):
+        with datastore.lock_account('counter'):
+            account = datastore.get_account('counter')
+            account.attributes.sensitivity_level += 1
+            datastore.update_account(account)
+    datastore.backend.close()
+
+
+@pytest.fixture
+def counter(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    datastore = DataStore()
+    datastore.configure_backend(SQLiteBackend(path))
+    datastore.create_account(Account(
+        id='counter', attributes=AccountAttributes(
+            resource_type='type_a', owner_id='owner', status='active', sensitivity_level=0, location='NYC'
+        )
+    ))
+    yield datastore, path
+    datastore.configure_backend(InMemoryBackend())
+
+
+def test_account_lock_excludes_other_processes(counter):
+    datastore, path = counter
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=increment, args=(path, 50)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * 4
+    assert datastore.get_account('counter').attributes.sensitivity_level == 200
+
+
+def test_failed_read_modify_write_rolls_back(counter):
+    datastore, _ = counter
+    with pytest.raises(RuntimeError):
+        with datastore.lock_account('counter'):
+            account = datastore.get_account('counter')
+            account.attributes.sensitivity_level = 99
+            datastore.update_account(account)
+            raise RuntimeError("failed after the write")
+    assert datastore.get_account('counter').attributes.sensitivity_level == 0
@@ -0,0 +1,64 @@
+"""Transactions are authorized against the account version they change."""
+
+import copy
+import pytest
+from app.authorization.decision_logger import DecisionLogger
+from app.models.account import Account, AccountAttributes
+from app.models.datastore import DataStore
+from app.models.storage import InMemoryBackend
+from app.models.transaction_executor import TransactionExecutor
+from app.models.user import User, UserAttributes, Location
+from tests.conftest import make_engine
+
+
+@pytest.fixture
+def datastore():
+    datastore = DataStore()
+    datastore.configure_backend(InMemoryBackend())
+    yield datastore
+    datastore.configure_backend(InMemoryBackend())
+
+
+@pytest.fixture
+def executor(datastore):
+    return TransactionExecutor(datastore, make_engine(), DecisionLogger())
+
+
+@pytest.fixture
+def user(datastore):
+    return datastore.create_user(User(
+        id='editor', name='editor',
+        attributes=UserAttributes(role='editor', level='senior', location=Location('NYC', 'LA', 'region'),
+                                  clearance_level=5)
+    ))
+
+
+@pytest.fixture
+def account(datastore):
+    return datastore.create_account(Account(
+        id='article', attributes=AccountAttributes(
+            resource_type='type_a', owner_id='someone', status='active', sensitivity_level=1, location='NYC'
+        )
+    ))
+
+
+def test_commit_applies_a_still_permitted_transaction(executor, user, account):
+    success, _, _ = executor.execute_transaction(user, account, 'view_history')
+    assert success
+
+
+def test_commit_rechecks_an_account_changed_after_authorization(executor, datastore, user, account):
+    decision, transaction = executor.authorize(user, copy.deepcopy(account), 'view_history')
+    assert decision.decision == 'permit'
+
+    # Another request deactivates the account before this one takes the lock
+    changed = copy.deepcopy(account)
+    changed.attributes.status = 'inactive'
+    datastore.update_account(changed)
+
+    logged = executor.decision_logger.next_seq
+    success, message, _ = executor.commit(decision, transaction)
+    assert not success
+    assert message == 'Denied by rule: Inactive Resource Restriction'
+    executor.decision_logger.flush()
+    assert executor.decision_logger.next_seq == logged + 1
@@ -0,0 +1,46 @@
+"""The NumPy evaluator decides like scalar evaluation."""
+
+import random
+import pytest
+from app.authorization.rules import AuthorizationRule
+from app.authorization.conditions import Condition
+from tests.conftest import make_engine
+
+pytest.importorskip('numpy')
+
+
+def outcomes(decisions):
+    return [(decision.decision, decision.reason) for decision in decisions]
+
+
+def test_vectorized_matches_scalar(engine, requests):
+    scalar = engine.evaluate_batch(requests)
+    vectorized = engine.evaluate_batch(requests, vectorized=True)
+    assert outcomes(vectorized) == outcomes(scalar)
+
+
+def test_vectorized_matches_scalar_on_odd_values(population):
+    engine = make_engine()
+    requests = population.requests(2000, seed=31)
+    rnd = random.Random(9)
+    for request in requests:
+        # Missing and mixed-type values go through the fallback paths
+        request.environment.business_hours = rnd.choice([True, False, None, '', 0, 1])
+        request.action_attributes.amount = rnd.choice([None, 0, 500, 5000, 1000.5])
+    scalar = [engine.evaluate(request) for request in requests]
+    assert outcomes(engine.evaluate_batch(requests, vectorized=True)) == outcomes(scalar)
+
+
+def test_vectorized_falls_back_for_opaque_rules(requests):
+    engine = make_engine([
+        AuthorizationRule(
+            id='opaque', name='Opaque', priority=10,
+            condition=lambda req: req.user.attributes.clearance_level > 3
+        ),
+        AuthorizationRule(
+            id='declarative', name='Declarative', priority=5, effect='deny',
+            conditions=[Condition('resource.attributes.status', 'in', {'inactive', 'archived'})]
+        )
+    ])
+    scalar = engine.evaluate_batch(requests)
+    assert outcomes(engine.evaluate_batch(requests, vectorized=True)) == outcomes(scalar)